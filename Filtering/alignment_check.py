@@ -0,0 +1,295 @@
+# How to use:
+'''
+
+python3 alignment_check.py /path/to/Domain_Wise_Arranged_Parallel -o alignment_flags -s alignment_summary.csv
+    - check every source_translated/source_reviewed file, write the flagged lines per file and a summary CSV
+python3 alignment_check.py /path/to/Parallel_v2 -s summary.csv --min-ratio 0.5 --max-ratio 2 --min-script 0.6
+python3 alignment_check.py /path/to/Parallel_v2 -s summary.csv --types source_reviewed -w 16
+
+Flags (a line can have several):
+    ratio        - target/source length (in characters without spaces) outside --min-ratio..--max-ratio
+    script       - less than --min-script of the target letters are in the script of the lang pair
+                   (e.g. Odia for HIN-ODI, Ol Chiki for HIN-SAT), or of the source letters in Devanagari
+    numbers      - the numbers in the source and target differ (Indic digits are read as 0-9)
+    punctuation  - the source and target have a different number of question/exclamation marks
+    copy         - the target is the same as the source
+    empty        - the source or the target is empty
+
+'''
+
+import os
+import re
+import sys
+import csv
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tsv_reader import TSVStats, read_tsv
+from text_normalize import LANG_SCRIPTS
+import fs_crawler
+import corpus_paths
+import instrumentation
+
+# --- Configuration ---
+# The specific folders you want to check within the target directory.
+FOLDERS_TO_CHECK = {'source_translated', 'source_reviewed'}
+# Allowed target/source length ratio, in characters without spaces.
+MIN_RATIO = 0.4
+MAX_RATIO = 2.5
+# Minimum share of the letters that must be in the expected script.
+MIN_SCRIPT = 0.5
+# Lines shorter than this many characters (without spaces) are not checked for ratio and script.
+MIN_CHARS = 4
+FLAGS = ['ratio', 'script', 'numbers', 'punctuation', 'copy', 'empty']
+
+# Unicode blocks of the scripts, as (first, last) code points.
+SCRIPT_BLOCKS = {
+    'Latin': [(0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F)],
+    'Arabic': [(0x0600, 0x06FF), (0x0750, 0x077F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)],
+    'Devanagari': [(0x0900, 0x097F), (0xA8E0, 0xA8FF)],
+    'Bengali': [(0x0980, 0x09FF)],
+    'Gurmukhi': [(0x0A00, 0x0A7F)],
+    'Gujarati': [(0x0A80, 0x0AFF)],
+    'Odia': [(0x0B00, 0x0B7F)],
+    'Tamil': [(0x0B80, 0x0BFF)],
+    'Telugu': [(0x0C00, 0x0C7F)],
+    'Kannada': [(0x0C80, 0x0CFF)],
+    'Malayalam': [(0x0D00, 0x0D7F)],
+    'Sinhala': [(0x0D80, 0x0DFF)],
+    'Ol Chiki': [(0x1C50, 0x1C7F)],
+    'Meetei Mayek': [(0xABC0, 0xABFF), (0xAAE0, 0xAAFF)],
+}
+# Digits of the Indic and Arabic scripts (the first code point of each 0-9 run), left out of the script counts.
+DIGIT_STARTS = [0x0660, 0x06F0, 0x0966, 0x09E6, 0x0A66, 0x0AE6, 0x0B66, 0x0BE6,
+                0x0C66, 0x0CE6, 0x0D66, 0x0DE6, 0x1C50, 0xABF0]
+QUESTION_MARKS = '?؟'
+EXCLAMATION_MARKS = '!'
+
+
+def _build_tables():
+    """
+    Translation tables, built once per process:
+    SCRIPT_TABLE maps every letter of a known script to one class character and deletes
+    digits, spaces, punctuation and signs shared by all scripts (danda, ZWJ, ...), so
+    line.translate(SCRIPT_TABLE).count(c) counts the letters of a script in one C pass.
+    """
+    script_table = {}
+    script_codes = {}
+    for index, (script, blocks) in enumerate(SCRIPT_BLOCKS.items()):
+        code = chr(0x41 + index)
+        script_codes[script] = code
+        for first, last in blocks:
+            for cp in range(first, last + 1):
+                script_table[cp] = code
+
+    for start in DIGIT_STARTS:
+        for digit in range(10):
+            script_table[start + digit] = None
+    # ASCII that is not a letter, danda/double danda, and the General Punctuation block
+    for cp in list(range(0x00, 0x41)) + list(range(0x5B, 0x61)) + list(range(0x7B, 0xC0)):
+        script_table[cp] = None
+    for cp in (0x0964, 0x0965, 0x060C, 0x061B, 0x061F, 0x06D4):
+        script_table[cp] = None
+    for cp in range(0x2000, 0x2070):
+        script_table[cp] = None
+    script_table[0xFEFF] = None
+    script_table[0x00A0] = None
+    return script_table, script_codes
+
+
+SCRIPT_TABLE, SCRIPT_CODES = _build_tables()
+# Runs of digits of any script; int() reads Indic digits as well.
+NUMBER_RE = re.compile(r'\d+')
+
+
+def expected_scripts(lang_pair):
+    """(source script codes, target script codes) for a lang pair like 'HIN-ODI', or None if unknown."""
+    try:
+        source_lang, target_lang = lang_pair.split('-')
+        source = LANG_SCRIPTS[source_lang]
+        target = LANG_SCRIPTS[target_lang]
+    except (ValueError, KeyError):
+        return None
+    return [SCRIPT_CODES[s] for s in source], [SCRIPT_CODES[s] for s in target]
+
+
+def script_share(classes, codes):
+    """Share of the letters of a line passed through SCRIPT_TABLE that are in one of the scripts."""
+    if not classes:
+        return 1.0
+    return sum(classes.count(code) for code in codes) / len(classes)
+
+
+def check_batch(batch, scripts, min_ratio=MIN_RATIO, max_ratio=MAX_RATIO, min_script=MIN_SCRIPT):
+    """
+    Check a batch of (src, tgt, lineno) tuples.
+
+    Returns:
+        list: (lineno, flags, ratio, target script share, src, tgt) for every flagged pair.
+    """
+    flagged = []
+    for src, tgt, lineno in batch:
+        flags = []
+        if not src or not tgt:
+            flagged.append((lineno, ['empty'], 0.0, 0.0, src, tgt))
+            continue
+        if src == tgt:
+            flags.append('copy')
+
+        src_chars = len(src) - src.count(' ')
+        tgt_chars = len(tgt) - tgt.count(' ')
+        ratio = tgt_chars / src_chars
+        share = 1.0
+        if src_chars >= MIN_CHARS and tgt_chars >= MIN_CHARS:
+            if not min_ratio <= ratio <= max_ratio:
+                flags.append('ratio')
+            if scripts:
+                share = script_share(tgt.translate(SCRIPT_TABLE), scripts[1])
+                if share < min_script or script_share(src.translate(SCRIPT_TABLE), scripts[0]) < min_script:
+                    flags.append('script')
+
+        src_numbers = NUMBER_RE.findall(src)
+        tgt_numbers = NUMBER_RE.findall(tgt)
+        if (src_numbers or tgt_numbers) and sorted(map(int, src_numbers)) != sorted(map(int, tgt_numbers)):
+            flags.append('numbers')
+
+        if (sum(src.count(c) for c in QUESTION_MARKS) != sum(tgt.count(c) for c in QUESTION_MARKS)
+                or src.count(EXCLAMATION_MARKS) != tgt.count(EXCLAMATION_MARKS)):
+            flags.append('punctuation')
+
+        if flags:
+            flagged.append((lineno, flags, ratio, share, src, tgt))
+    return flagged
+
+
+def check_file(job):
+    """Check one file (runs in a worker process); writes its flagged lines and returns its summary row."""
+    file_path, lang_pair, flags_path, options = job
+    scripts = expected_scripts(lang_pair) if lang_pair else None
+    counts = dict.fromkeys(FLAGS, 0)
+    stats = TSVStats(file_path)
+    flagged_lines = 0
+
+    out = None
+    try:
+        for batch in read_tsv(file_path, stats=stats):
+            flagged = check_batch(batch, scripts, **options)
+            if not flagged:
+                continue
+            flagged_lines += len(flagged)
+            if flags_path and out is None:
+                os.makedirs(os.path.dirname(flags_path), exist_ok=True)
+                out = open(flags_path, 'w', newline='', encoding='utf-8')
+                writer = csv.writer(out, delimiter='\t', quoting=csv.QUOTE_NONE, quotechar=None, escapechar='\\')
+                writer.writerow(['line', 'flags', 'ratio', 'target_script', 'source', 'target'])
+            for lineno, flags, ratio, share, src, tgt in flagged:
+                for flag in flags:
+                    counts[flag] += 1
+                if out is not None:
+                    writer.writerow([lineno, ','.join(flags), round(ratio, 2), round(share, 2), src, tgt])
+    except Exception as e:
+        print(f"An error occurred while processing {file_path}: {e}")
+    finally:
+        if out is not None:
+            out.close()
+
+    return {
+        'File': file_path,
+        'Language Pair': lang_pair or 'Unknown',
+        'Script Known': scripts is not None,
+        'Pairs': stats.pairs,
+        'Malformed': stats.malformed,
+        'Flagged': flagged_lines,
+        'Flagged %': round(100 * flagged_lines / stats.pairs, 2) if stats.pairs else 0.0,
+        **{f'{flag}': counts[flag] for flag in FLAGS},
+        'Bytes': os.path.getsize(file_path)
+    }
+
+
+def find_files(target_dir, types=FOLDERS_TO_CHECK, scan_threads=0):
+    """Find the (file, lang pair) pairs to check in either corpus layout."""
+    found = []
+    for root, dirs, files in fs_crawler.walk(target_dir, scan_threads):
+        if os.path.basename(root) not in types:
+            continue
+        info = corpus_paths.lookup(root, action="Script checks are skipped for it.")
+        lang_pair = info.lang_pair if info else None
+        for filename in files:
+            if filename.endswith('.txt'):
+                found.append((os.path.join(root, filename), lang_pair))
+    found.sort()
+    return found
+
+
+def check_tree(target_dir, flags_dir=None, types=FOLDERS_TO_CHECK, workers=None, scan_threads=0, **options):
+    """Check every file of the tree with a process pool; returns the summary rows."""
+    files = find_files(target_dir, types, scan_threads)
+    print(f"Checking {len(files)} files in '{target_dir}'...")
+
+    jobs = []
+    for file_path, lang_pair in files:
+        flags_path = None
+        if flags_dir:
+            flags_path = os.path.join(flags_dir, os.path.relpath(file_path, target_dir))[:-len('.txt')] + '.flags.tsv'
+        jobs.append((file_path, lang_pair, flags_path, options))
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for row in executor.map(check_file, jobs, chunksize=4):
+            instrumentation.add(files=1, lines=row['Pairs'], flagged_lines=row['Flagged'], bytes=row.pop('Bytes'))
+            row['File'] = os.path.relpath(row['File'], target_dir)
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag source/target pairs that look misaligned or in the wrong script")
+    parser.add_argument("target_dir", help="Parallel_v2 or Domain-wise arranged folder to check")
+    parser.add_argument("-o", "--output", help="Folder for the flagged lines, one .flags.tsv per checked file")
+    parser.add_argument("-s", "--summary", help="Path to save the per-file summary as CSV")
+    parser.add_argument("--types", nargs="+", default=sorted(FOLDERS_TO_CHECK), help="Folders to check (default: source_reviewed source_translated)")
+    parser.add_argument("--min-ratio", type=float, default=MIN_RATIO, help=f"Lowest allowed target/source length ratio (default: {MIN_RATIO})")
+    parser.add_argument("--max-ratio", type=float, default=MAX_RATIO, help=f"Highest allowed target/source length ratio (default: {MAX_RATIO})")
+    parser.add_argument("--min-script", type=float, default=MIN_SCRIPT, help=f"Lowest allowed share of letters in the expected script (default: {MIN_SCRIPT})")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    fs_crawler.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.target_dir):
+        print(f"❌ Error: The directory '{args.target_dir}' does not exist.")
+        return
+
+    with instrumentation.instrumented_run("alignment_check", args):
+        with instrumentation.stage("check_files"):
+            rows = check_tree(args.target_dir, args.output, set(args.types), args.workers, args.scan_threads,
+                              min_ratio=args.min_ratio, max_ratio=args.max_ratio, min_script=args.min_script)
+
+        if not rows:
+            print("\nNo files were found to check.")
+            return
+
+        if args.summary:
+            with open(args.summary, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"\n✅ Summary saved to '{args.summary}'.")
+
+        # Totals per lang pair
+        totals = {}
+        for row in rows:
+            total = totals.setdefault(row['Language Pair'], dict.fromkeys(['Pairs', 'Flagged'] + FLAGS, 0))
+            for key in total:
+                total[key] += row[key]
+
+        print(f"\n{'Lang Pair':<10} | {'Pairs':<9} | {'Flagged %':<9} | " + " | ".join(f"{flag:<11}" for flag in FLAGS))
+        print("-" * (37 + 14 * len(FLAGS)))
+        for lang_pair, total in sorted(totals.items()):
+            percent = 100 * total['Flagged'] / total['Pairs'] if total['Pairs'] else 0.0
+            print(f"{lang_pair:<10} | {total['Pairs']:<9} | {percent:<9.2f} | " + " | ".join(f"{total[flag]:<11}" for flag in FLAGS))
+
+
+if __name__ == "__main__":
+    main()
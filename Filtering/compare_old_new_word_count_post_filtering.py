@@ -1,6 +1,14 @@
 import os
+import sys
+import argparse
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fs_crawler
+import corpus_paths
+import instrumentation
+import stats_db
+
 # --- Configuration ---
 # The name of your original directory.
 SOURCE_DIR = '/home/soham37/python/Domain_Wise_Arranged_Parallel'
@@ -26,18 +34,24 @@ def count_lines_in_file(filepath):
         print(f"Warning: Could not read file {filepath}: {e}")
         return 0
 
-def generate_comparison_report():
+def generate_comparison_report(scan_threads=0):
     """
     Compares line counts between original and filtered directories,
     and returns the results as a pandas DataFrame.
+    With scan_threads > 0 the original directory is listed by that many threads.
     """
     comparison_data = []
 
     print("Starting analysis of directories...")
-    for root, dirs, files in os.walk(SOURCE_DIR):
+    for root, dirs, files in fs_crawler.walk(SOURCE_DIR, scan_threads):
         current_dir_name = os.path.basename(root)
 
         if current_dir_name in FOLDERS_TO_ANALYZE:
+            # Metadata of the folder, e.g. "AGRI/HIN-ASM/AGRI_SUBDOMAIN/translation_text/source_translated"
+            info = corpus_paths.lookup(root)
+            if info is None:
+                continue
+
             for filename in files:
                 if not filename.endswith('.txt'):
                     continue
@@ -51,56 +65,67 @@ def generate_comparison_report():
                     filtered_count = count_lines_in_file(filtered_file_path)
                     difference = old_count - filtered_count
 
-                    # --- FIXED METADATA EXTRACTION ---
-                    # Get the path of the directory containing the file, relative to the start.
-                    # e.g., "AGRI/HIN-ASM/AGRI_SUBDOMAIN/translation_text/source_translated"
-                    relative_dir_path = os.path.dirname(relative_path_to_file)
-                    path_parts = relative_dir_path.split(os.sep)
-                    
-                    # Now path_parts[0] will be 'AGRI', path_parts[1] will be 'HIN-ASM', etc.
-                    primary_domain = path_parts[0]
-                    lang_pair = path_parts[1]
-                    sub_domain = path_parts[2]
-                    bi_text_type = path_parts[4] # or simply current_dir_name
-
                     comparison_data.append({
-                        'Primary Domain': primary_domain,
-                        'Language Pair': lang_pair,
-                        'Sub Domain': sub_domain,
-                        'Bi-text Type': bi_text_type,
+                        'Path': original_file_path,
+                        'Primary Domain': info.domain,
+                        'Language Pair': info.lang_pair,
+                        'Sub Domain': info.sub_domain,
+                        'Bi-text Type': info.folder_type,
                         'File Name': filename,
                         'Line Count_Old': old_count,
                         'Line Count_Filtered': filtered_count,
                         'Difference': difference
                     })
-                    print(f"  - Analyzed: {relative_path_to_file}")
+                    instrumentation.add(files=1, lines=old_count)
 
-                except IndexError:
-                    print(f"Warning: Could not parse metadata from path: '{relative_dir_path}'. Skipping file.")
                 except Exception as e:
                     print(f"An unexpected error occurred while processing {original_file_path}: {e}")
 
     report_df = pd.DataFrame(comparison_data)
     return report_df
 
+REPORT_COLUMNS = ['Primary Domain', 'Language Pair', 'Sub Domain', 'Bi-text Type', 'File Name',
+                  'Line Count_Old', 'Line Count_Filtered', 'Difference']
+
 # --- Main execution block ---
 if __name__ == "__main__":
-    if not os.path.isdir(SOURCE_DIR) or not os.path.isdir(FILTERED_DIR):
-        print(f"❌ Error: Please ensure both '{SOURCE_DIR}' and '{FILTERED_DIR}' directories exist.")
-    else:
-        # Create the directory for the output CSV if it doesn't exist
-        output_dir = os.path.dirname(OUTPUT_CSV)
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-
-        results_df = generate_comparison_report()
+    parser = argparse.ArgumentParser(description="Compare line counts between the original and the filtered directory")
+    parser.add_argument("source", nargs="?", default=SOURCE_DIR, help=f"Original directory (default: {SOURCE_DIR})")
+    parser.add_argument("filtered", nargs="?", default=FILTERED_DIR, help=f"Filtered directory (default: {FILTERED_DIR})")
+    parser.add_argument("-o", "--output", default=OUTPUT_CSV, help=f"Path of the report CSV (default: {OUTPUT_CSV})")
+    fs_crawler.add_arguments(parser)
+    stats_db.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    SOURCE_DIR = args.source
+    FILTERED_DIR = args.filtered
+    OUTPUT_CSV = args.output
+
+    with instrumentation.instrumented_run("compare_old_new_word_count_post_filtering", args):
+        if not os.path.isdir(SOURCE_DIR) or not os.path.isdir(FILTERED_DIR):
+            print(f"❌ Error: Please ensure both '{SOURCE_DIR}' and '{FILTERED_DIR}' directories exist.")
+        else:
+            # Create the directory for the output CSV if it doesn't exist
+            output_dir = os.path.dirname(OUTPUT_CSV)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+            results_df = generate_comparison_report(args.scan_threads)
         
-        if not results_df.empty:
-            results_df = results_df.sort_values(by='Difference', ascending=False)
-            results_df.to_csv(OUTPUT_CSV, index=False)
+            if not results_df.empty:
+                # Save the old and filtered line counts of every file to the stats database if specified
+                if args.db:
+                    stats_db.record_run(
+                        args.db, "compare_old_new_word_count_post_filtering", SOURCE_DIR, args.db_label,
+                        files=[{"path": r['Path'], "lines": int(r['Line Count_Old']), "filtered_lines": int(r['Line Count_Filtered'])}
+                               for r in results_df.to_dict('records')]
+                    )
+
+                results_df = results_df.sort_values(by='Difference', ascending=False)[REPORT_COLUMNS]
+                results_df.to_csv(OUTPUT_CSV, index=False)
             
-            print(f"\n✅ Analysis complete! Report saved to '{OUTPUT_CSV}'.")
-            print("\nPreview of the report (top 5 files with largest sentence loss):")
-            print(results_df.head())
-        else:
-            print("\nNo files were found to analyze in the specified directories.")
\ No newline at end of file
+                print(f"\n✅ Analysis complete! Report saved to '{OUTPUT_CSV}'.")
+                print("\nPreview of the report (top 5 files with largest sentence loss):")
+                print(results_df.head())
+            else:
+                print("\nNo files were found to analyze in the specified directories.")
\ No newline at end of file
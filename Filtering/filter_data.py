@@ -1,5 +1,11 @@
 import os
+import sys
 import shutil
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fs_crawler
+import instrumentation
 
 # --- Configuration ---
 # The name of your original parent directory.
@@ -17,6 +23,9 @@ def filter_and_copy_file(source_path, dest_path):
     Reads a source file, filters its lines based on word count in the first column,
     and writes the valid lines to the destination file.
     Assumes the file is tab-separated.
+
+    Returns:
+        tuple: (lines before filtering, lines kept)
     """
     try:
         # Keep a count of lines before and after filtering.
@@ -41,23 +50,23 @@ def filter_and_copy_file(source_path, dest_path):
                     if MIN_WORDS <= word_count <= MAX_WORDS:
                         dest_file.write(line)
                         lines_after += 1
-                        
-        print(f"    - Filtered '{os.path.basename(source_path)}': Kept {lines_after} of {lines_before} lines.")
+
+        instrumentation.add(files=1, lines=lines_before, kept_lines=lines_after, bytes=os.path.getsize(source_path))
+        return lines_before, lines_after
 
     except FileNotFoundError:
         print(f"Warning: Source file not found: {source_path}")
     except Exception as e:
         print(f"An error occurred while processing {source_path}: {e}")
+    return 0, 0
 
-def process_directories(source_dir, dest_dir):
+def find_files_to_process(source_dir, dest_dir, scan_threads=0):
     """
     Walks through the source directory, replicates a filtered structure,
-    and processes files based on the rules defined in the configuration.
+    and yields the (source file, destination file) pairs to process.
     """
-    print(f"Starting the filtering process from '{source_dir}' to '{dest_dir}'...")
-
     # Walk through the entire source directory tree.
-    for root, dirs, files in os.walk(source_dir, topdown=True):
+    for root, dirs, files in fs_crawler.walk(source_dir, scan_threads):
         
         # --- 1. Prune the directory list to skip unwanted folders ---
         # This modification of 'dirs' in-place tells os.walk() not to descend
@@ -76,28 +85,50 @@ def process_directories(source_dir, dest_dir):
         # --- 3. Check if the current directory is one we need to process ---
         current_dir_name = os.path.basename(root)
         if current_dir_name in FOLDERS_TO_PROCESS:
-            print(f"\n[INFO] Processing folder: {root}")
-            
             # Process each file in this directory
             for filename in files:
                 if filename.endswith('.txt'):
                     source_file_path = os.path.join(root, filename)
                     dest_file_path = os.path.join(dest_root, filename)
                     
-                    filter_and_copy_file(source_file_path, dest_file_path)
+                    yield source_file_path, dest_file_path
+
+def process_directories(source_dir, dest_dir, scan_threads=0):
+    """
+    Processes every file found by find_files_to_process. With scan_threads > 0 the
+    directories are listed and the files filtered by that many threads, which hides
+    the latency of network mounts.
+    """
+    print(f"Starting the filtering process from '{source_dir}' to '{dest_dir}'...")
+
+    file_pairs = find_files_to_process(source_dir, dest_dir, scan_threads)
+    for _ in fs_crawler.prefetch(lambda pair: filter_and_copy_file(*pair), file_pairs, scan_threads):
+        pass
 
 # --- Main execution block ---
 if __name__ == "__main__":
-    # Check if the source directory exists before starting.
-    if not os.path.isdir(SOURCE_PARENT_DIR):
-        print(f"❌ Error: Source directory '{SOURCE_PARENT_DIR}' not found.")
-        print("Please ensure this script is in the same location as the 'Parent' folder, or update the SOURCE_PARENT_DIR variable.")
-    else:
-        # Remove the destination directory if it exists for a fresh start.
-        if os.path.exists(DEST_PARENT_DIR):
-            print(f"Removing existing destination directory: {DEST_PARENT_DIR}")
-            shutil.rmtree(DEST_PARENT_DIR)
+    parser = argparse.ArgumentParser(description="Copy the source_translated/source_reviewed files, keeping lines with MIN_WORDS..MAX_WORDS source words")
+    parser.add_argument("source", nargs="?", default=SOURCE_PARENT_DIR, help=f"Source parent directory (default: {SOURCE_PARENT_DIR})")
+    parser.add_argument("dest", nargs="?", default=DEST_PARENT_DIR, help=f"Destination directory, removed first if it exists (default: {DEST_PARENT_DIR})")
+    fs_crawler.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    SOURCE_PARENT_DIR = args.source
+    DEST_PARENT_DIR = args.dest
+
+    with instrumentation.instrumented_run("filter_data", args):
+        # Check if the source directory exists before starting.
+        if not os.path.isdir(SOURCE_PARENT_DIR):
+            print(f"❌ Error: Source directory '{SOURCE_PARENT_DIR}' not found.")
+            print("Please ensure this script is in the same location as the 'Parent' folder, or update the SOURCE_PARENT_DIR variable.")
+        else:
+            # Remove the destination directory if it exists for a fresh start.
+            if os.path.exists(DEST_PARENT_DIR):
+                print(f"Removing existing destination directory: {DEST_PARENT_DIR}")
+                shutil.rmtree(DEST_PARENT_DIR)
         
-        process_directories(SOURCE_PARENT_DIR, DEST_PARENT_DIR)
-        print("\n✅ Filtering and copying process completed successfully!")
-        print(f"The new, filtered directory is available at: '{DEST_PARENT_DIR}'")
\ No newline at end of file
+            with instrumentation.stage("filter_files") as st:
+                process_directories(SOURCE_PARENT_DIR, DEST_PARENT_DIR, args.scan_threads)
+            print(f"\nKept {st.counts.get('kept_lines', 0)} of {st.counts['lines']} lines in {st.counts['files']} files.")
+            print("\n✅ Filtering and copying process completed successfully!")
+            print(f"The new, filtered directory is available at: '{DEST_PARENT_DIR}'")
\ No newline at end of file
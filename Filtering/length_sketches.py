@@ -0,0 +1,301 @@
+# How to use:
+'''
+
+python3 length_sketches.py /path/to/Domain_Wise_Arranged_Parallel -o length_distribution.csv -s sketches.json
+    - scan the tree once, write percentiles per (lang pair, domain, sub domain, type) and keep the sketches
+python3 length_sketches.py -l sketches.json --range 6 55 -o kept_6_55.csv
+    - answer new questions from the saved sketches, without rescanning the corpus
+python3 length_sketches.py -l week1.json -l week2.json -s merged.json - merge sketches of several runs
+
+'''
+
+import os
+import sys
+import csv
+import json
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tsv_reader import TSVStats, read_tsv
+import fs_crawler
+import corpus_paths
+
+# --- Configuration ---
+# The specific folders you want to analyze within the target directory.
+FOLDERS_TO_ANALYZE = {'source_translated', 'source_reviewed'}
+# Sentences longer than this many words share the last histogram bin.
+MAX_WORDS = 1024
+# Target/source length ratios are binned in steps of RATIO_STEP up to MAX_RATIO.
+RATIO_STEP = 0.05
+MAX_RATIO = 10.0
+# Percentiles written to the report.
+PERCENTILES = [5, 25, 50, 75, 95, 99]
+# Key of every distribution, in the order of the path components.
+KEY_FIELDS = ['Primary Domain', 'Language Pair', 'Sub Domain', 'Bi-text Type']
+
+
+class Histogram:
+    """
+    Fixed-width integer histogram. Two histograms with the same number of bins
+    can be merged by adding their counts, so files and workers can be combined in any order.
+    """
+
+    def __init__(self, bins, width=1.0):
+        self.width = width
+        self.counts = array('Q', bytes(8 * bins))
+        self.total = 0
+        self.sum = 0.0
+
+    def _edge(self, index):
+        return index if self.width == 1 else round(index * self.width, 4)
+
+    def add(self, value):
+        # The small epsilon keeps values like 1.2 / 0.05 in their own bin
+        index = int(value / self.width + 1e-9)
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        self.total += 1
+        self.sum += value
+
+    def same_layout(self, other):
+        return len(self.counts) == len(other.counts) and self.width == other.width
+
+    def merge(self, other):
+        if not self.same_layout(other):
+            raise ValueError(f"Cannot merge a histogram of {len(other.counts)} bins of width {other.width} "
+                             f"into one of {len(self.counts)} bins of width {self.width}")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+    def percentile(self, q):
+        """Lower edge of the bin holding the q-th percentile (exact for word counts)."""
+        if not self.total:
+            return 0
+        rank = max(1, -(-self.total * q // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._edge(index)
+        return self._edge(len(self.counts) - 1)
+
+    def count_between(self, low, high):
+        """Number of values v with low <= v <= high (bin-exact for word counts)."""
+        first = max(0, int(low / self.width))
+        last = min(len(self.counts) - 1, int(high / self.width))
+        return sum(self.counts[first:last + 1])
+
+    def to_dict(self):
+        return {
+            "width": self.width,
+            "bins": len(self.counts),
+            "total": self.total,
+            "sum": self.sum,
+            # Sparse counts keep the saved sketches small
+            "counts": {str(i): c for i, c in enumerate(self.counts) if c}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data["bins"], data["width"])
+        for index, count in data["counts"].items():
+            hist.counts[int(index)] = count
+        hist.total = data["total"]
+        hist.sum = data["sum"]
+        return hist
+
+
+class LengthSketch:
+    """Source length, target length and target/source ratio distributions of one key."""
+
+    def __init__(self):
+        self.source = Histogram(MAX_WORDS + 1)
+        self.target = Histogram(MAX_WORDS + 1)
+        self.ratio = Histogram(int(MAX_RATIO / RATIO_STEP) + 1, RATIO_STEP)
+
+    def add(self, src, tgt):
+        src_words = len(src.split())
+        tgt_words = len(tgt.split())
+        self.source.add(src_words)
+        self.target.add(tgt_words)
+        if src_words:
+            self.ratio.add(tgt_words / src_words)
+
+    def merge(self, other):
+        self.source.merge(other.source)
+        self.target.merge(other.target)
+        self.ratio.merge(other.ratio)
+
+    def to_dict(self):
+        return {"source": self.source.to_dict(), "target": self.target.to_dict(), "ratio": self.ratio.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Raises ValueError if the histograms were saved with other MAX_WORDS/RATIO_STEP/MAX_RATIO settings."""
+        sketch = cls()
+        for side in ("source", "target", "ratio"):
+            hist = Histogram.from_dict(data[side])
+            expected = getattr(sketch, side)
+            if not expected.same_layout(hist):
+                raise ValueError(f"the {side} histogram has {len(hist.counts)} bins of width {hist.width}, "
+                                 f"expected {len(expected.counts)} bins of width {expected.width}")
+            setattr(sketch, side, hist)
+        return sketch
+
+
+def sketch_file(file_path):
+    """Build the sketch of a single file (runs in a worker process)."""
+    sketch = LengthSketch()
+    stats = TSVStats(file_path)
+    try:
+        for batch in read_tsv(file_path, stats=stats):
+            for src, tgt, _ in batch:
+                sketch.add(src, tgt)
+    except Exception as e:
+        print(f"An error occurred while processing {file_path}: {e}")
+    return sketch
+
+
+def find_files(target_dir, scan_threads=0):
+    """Find the analysed files and their keys in the Domain-wise layout."""
+    found = []
+    for root, dirs, files in fs_crawler.walk(target_dir, scan_threads):
+        if os.path.basename(root) not in FOLDERS_TO_ANALYZE:
+            continue
+
+        # e.g. "AGRI/HIN-ASM/AGRI_SUBDOMAIN/translation_text/source_translated"
+        info = corpus_paths.lookup(root, layout='Domain-wise')
+        if info is None:
+            continue
+        key = (info.domain, info.lang_pair, info.sub_domain, info.folder_type)
+
+        for filename in files:
+            if filename.endswith('.txt'):
+                found.append((key, os.path.join(root, filename)))
+    return found
+
+
+def build_sketches(target_dir, workers=None, scan_threads=0):
+    """Scan the tree once with a process pool and merge the per-file sketches by key."""
+    files = find_files(target_dir, scan_threads)
+    print(f"Sketching {len(files)} files in '{target_dir}'...")
+
+    sketches = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        paths = [file_path for _, file_path in files]
+        for (key, _), file_sketch in zip(files, executor.map(sketch_file, paths, chunksize=4)):
+            sketches.setdefault(key, LengthSketch()).merge(file_sketch)
+    return sketches
+
+
+def save_sketches(sketches, path):
+    data = [dict(zip(KEY_FIELDS, key), **sketch.to_dict()) for key, sketch in sorted(sketches.items())]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"max_words": MAX_WORDS, "ratio_step": RATIO_STEP, "sketches": data}, f)
+    print(f"Sketches saved to {path}")
+
+
+def load_sketches(paths, sketches=None):
+    """
+    Load saved sketch files, merging sketches with the same key. Raises ValueError for a file
+    saved with a different bin layout (MAX_WORDS, RATIO_STEP or MAX_RATIO), which cannot be merged.
+    """
+    sketches = {} if sketches is None else sketches
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if (data.get("max_words"), data.get("ratio_step")) != (MAX_WORDS, RATIO_STEP):
+            raise ValueError(f"'{path}' was saved with max_words={data.get('max_words')} and ratio_step={data.get('ratio_step')}, "
+                             f"this script uses {MAX_WORDS} and {RATIO_STEP}")
+        for entry in data["sketches"]:
+            key = tuple(entry[field] for field in KEY_FIELDS)
+            try:
+                loaded = LengthSketch.from_dict(entry)
+            except ValueError as e:
+                raise ValueError(f"'{path}', {' / '.join(key)}: {e}") from None
+            sketches.setdefault(key, LengthSketch()).merge(loaded)
+    return sketches
+
+
+def report_rows(sketches, word_range=None):
+    """One report row per key, plus an 'ALL' row for every language pair."""
+    merged = dict(sketches)
+    for key, sketch in sketches.items():
+        merged.setdefault(('ALL', key[1], 'ALL', key[3]), LengthSketch()).merge(sketch)
+
+    rows = []
+    for key, sketch in sorted(merged.items()):
+        row = dict(zip(KEY_FIELDS, key))
+        row['Pairs'] = sketch.source.total
+        for side, hist in (('Source', sketch.source), ('Target', sketch.target)):
+            row[f'{side} Mean'] = round(hist.mean(), 2)
+            for q in PERCENTILES:
+                row[f'{side} P{q}'] = hist.percentile(q)
+        row['Ratio Mean'] = round(sketch.ratio.mean(), 3)
+        for q in (5, 50, 95):
+            row[f'Ratio P{q}'] = sketch.ratio.percentile(q)
+        if word_range:
+            kept = sketch.source.count_between(*word_range)
+            row[f'Source {word_range[0]}-{word_range[1]} words'] = kept
+            row['Kept %'] = round(100 * kept / sketch.source.total, 2) if sketch.source.total else 0.0
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mergeable sentence-length distributions per language pair and domain")
+    parser.add_argument("target_dir", nargs="?", help="Domain-wise arranged folder to scan (optional with --load)")
+    parser.add_argument("-l", "--load", action="append", default=[], help="Saved sketch file to merge (repeatable)")
+    parser.add_argument("-s", "--save", help="Path to save the merged sketches as JSON")
+    parser.add_argument("-o", "--output", help="Path to save the percentile report as CSV")
+    parser.add_argument("--range", nargs=2, type=int, metavar=("MIN", "MAX"), help="Also report how many pairs have MIN..MAX source words")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    fs_crawler.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.target_dir and not args.load:
+        parser.error("give a folder to scan and/or --load sketch files")
+
+    sketches = {}
+    if args.target_dir:
+        if not os.path.isdir(args.target_dir):
+            print(f"❌ Error: The directory '{args.target_dir}' does not exist.")
+            return
+        sketches = build_sketches(args.target_dir, args.workers, args.scan_threads)
+    try:
+        load_sketches(args.load, sketches)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return
+
+    if not sketches:
+        print("\nNo valid files were found to analyze.")
+        return
+
+    if args.save:
+        save_sketches(sketches, args.save)
+
+    rows = report_rows(sketches, args.range)
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\n✅ Report saved to '{args.output}'.")
+
+    print(f"\n{'Domain':<8} | {'Lang Pair':<10} | {'Sub Domain':<20} | {'Type':<18} | {'Pairs':<8} | {'Src P50':<7} | {'Tgt P50':<7} | {'Ratio P50':<9}")
+    print("-" * 106)
+    for row in rows:
+        print(f"{row['Primary Domain']:<8} | {row['Language Pair']:<10} | {row['Sub Domain'][:20]:<20} | {row['Bi-text Type']:<18} | "
+              f"{row['Pairs']:<8} | {row['Source P50']:<7} | {row['Target P50']:<7} | {row['Ratio P50']:<9}")
+
+
+if __name__ == "__main__":
+    main()
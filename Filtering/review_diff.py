@@ -0,0 +1,279 @@
+# How to use:
+'''
+
+python3 review_diff.py /path/to/Parallel_v2 -s review_summary.csv - edit rate of the review per file, and per lang pair/domain
+python3 review_diff.py /path/to/Domain_Wise_Arranged_Parallel -s summary.csv -o review_diffs -w 16
+    - also write the changed lines of every reviewed file to review_diffs/.../FILE.diff.tsv
+
+For every sub-domain, the source_translated files are loaded into a {source: translation} dict and
+every line of the source_reviewed files is looked up in it by its source (column 0). Per matched line:
+
+    char_distance  - Levenshtein distance between the translation and the reviewed text, in characters
+    token_distance - the same over whitespace tokens
+    edit rate      - distance / length of the reviewed text (as HTER), in characters and in tokens
+
+Uses rapidfuzz for the distances when it is installed (pip install rapidfuzz), otherwise a bit-parallel
+Levenshtein in pure Python.
+
+'''
+
+import os
+import sys
+import csv
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tsv_reader import TSVStats, read_tsv
+import fs_crawler
+import corpus_paths
+import instrumentation
+
+try:
+    from rapidfuzz.distance import Levenshtein as rapidfuzz_levenshtein
+except ImportError:
+    rapidfuzz_levenshtein = None
+
+# --- Configuration ---
+TRANSLATED = 'source_translated'
+REVIEWED = 'source_reviewed'
+# Upper bounds of the token edit rate buckets of the changed-lines distribution (the last one is open).
+RATE_BUCKETS = [0.1, 0.3, 0.5, 1.0]
+BUCKET_NAMES = ['unchanged', '<=10%', '10-30%', '30-50%', '50-100%', '>100%']
+SUMMARY_FIELDS = ['File', 'Language Pair', 'Domain', 'Sub Domain', 'Reviewed Lines', 'Matched', 'Unmatched',
+                  'Changed', 'Changed %', 'Char Distance', 'Reviewed Chars', 'Char Edit Rate %',
+                  'Token Distance', 'Reviewed Tokens', 'Token Edit Rate %'] + BUCKET_NAMES
+
+
+def bit_parallel_levenshtein(a, b):
+    """
+    Levenshtein distance of two sequences (strings, or lists of tokens) with the bit-vector
+    algorithm of Myers/Hyyrö: one column of the DP matrix per element of b, as bits of an int.
+    """
+    # The common prefix and suffix never change the distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    # Bits of the positions of every element in b (the shorter one is the pattern)
+    peq = {}
+    for i, x in enumerate(b):
+        peq[x] = peq.get(x, 0) | (1 << i)
+    full = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+    vp, vn = full, 0
+    distance = len(b)
+    for x in a:
+        eq = peq.get(x, 0)
+        d0 = ((((eq & vp) + vp) ^ vp) | eq | vn) & full
+        hp = (vn | ~(d0 | vp)) & full
+        hn = d0 & vp
+        if hp & last:
+            distance += 1
+        elif hn & last:
+            distance -= 1
+        hp = ((hp << 1) | 1) & full
+        hn = (hn << 1) & full
+        vp = (hn | ~(d0 | hp)) & full
+        vn = hp & d0
+    return distance
+
+
+def levenshtein(a, b):
+    if rapidfuzz_levenshtein is not None:
+        return rapidfuzz_levenshtein.distance(a, b)
+    return bit_parallel_levenshtein(a, b)
+
+
+def rate_bucket(token_distance, reviewed_tokens):
+    if token_distance == 0:
+        return BUCKET_NAMES[0]
+    rate = token_distance / max(reviewed_tokens, 1)
+    for bound, name in zip(RATE_BUCKETS, BUCKET_NAMES[1:]):
+        if rate <= bound:
+            return name
+    return BUCKET_NAMES[-1]
+
+
+def diff_sub_domain(job):
+    """
+    Hash join of the translated and reviewed files of one sub-domain (runs in a worker process).
+
+    Returns:
+        tuple: (summary row per reviewed file, translated lines, lines read)
+    """
+    translated_files, reviewed_files, info, diffs_paths = job
+    # Build side: source -> translation (the last one wins for a repeated source)
+    translations = {}
+    lines_read = 0
+    for file_path in translated_files:
+        stats = TSVStats(file_path)
+        try:
+            for batch in read_tsv(file_path, stats=stats):
+                for src, tgt, _ in batch:
+                    translations[src] = tgt
+        except Exception as e:
+            print(f"An error occurred while processing {file_path}: {e}")
+        lines_read += stats.lines
+
+    rows = []
+    for file_path, diffs_path in zip(reviewed_files, diffs_paths):
+        row = dict.fromkeys(SUMMARY_FIELDS, 0)
+        row.update({'File': file_path, 'Language Pair': info.lang_pair, 'Domain': info.domain, 'Sub Domain': info.sub_domain})
+        stats = TSVStats(file_path)
+        out = None
+        try:
+            # Probe side: every reviewed line
+            for batch in read_tsv(file_path, stats=stats):
+                for src, reviewed, lineno in batch:
+                    row['Reviewed Lines'] += 1
+                    translation = translations.get(src)
+                    if translation is None:
+                        row['Unmatched'] += 1
+                        continue
+                    row['Matched'] += 1
+                    reviewed_tokens = reviewed.split()
+                    row['Reviewed Chars'] += len(reviewed)
+                    row['Reviewed Tokens'] += len(reviewed_tokens)
+                    if translation == reviewed:
+                        row['unchanged'] += 1
+                        continue
+                    char_distance = levenshtein(translation, reviewed)
+                    token_distance = levenshtein(translation.split(), reviewed_tokens)
+                    row['Changed'] += 1
+                    row['Char Distance'] += char_distance
+                    row['Token Distance'] += token_distance
+                    row[rate_bucket(token_distance, len(reviewed_tokens))] += 1
+                    if diffs_path:
+                        if out is None:
+                            os.makedirs(os.path.dirname(diffs_path), exist_ok=True)
+                            out = open(diffs_path, 'w', encoding='utf-8')
+                            out.write("line\tchar_distance\ttoken_distance\ttoken_edit_rate\tsource\ttranslation\treviewed\n")
+                        rate = token_distance / max(len(reviewed_tokens), 1)
+                        out.write(f"{lineno}\t{char_distance}\t{token_distance}\t{rate:.3f}\t{src}\t{translation}\t{reviewed}\n")
+        except Exception as e:
+            print(f"An error occurred while processing {file_path}: {e}")
+        finally:
+            if out is not None:
+                out.close()
+        lines_read += stats.lines
+        add_rates(row)
+        rows.append(row)
+    return rows, len(translations), lines_read
+
+
+def add_rates(row):
+    row['Changed %'] = round(100 * row['Changed'] / row['Matched'], 2) if row['Matched'] else 0.0
+    row['Char Edit Rate %'] = round(100 * row['Char Distance'] / row['Reviewed Chars'], 2) if row['Reviewed Chars'] else 0.0
+    row['Token Edit Rate %'] = round(100 * row['Token Distance'] / row['Reviewed Tokens'], 2) if row['Reviewed Tokens'] else 0.0
+    return row
+
+
+def find_sub_domains(target_dir, scan_threads=0):
+    """{translation_text folder: {type: [files]}} of the sub-domains that have both types, and their metadata."""
+    found = {}
+    for root, dirs, files in fs_crawler.walk(target_dir, scan_threads):
+        folder_type = os.path.basename(root)
+        if folder_type not in (TRANSLATED, REVIEWED):
+            continue
+        info = corpus_paths.lookup(root)
+        if info is None:
+            continue
+        entry = found.setdefault(os.path.dirname(root), {"info": info, TRANSLATED: [], REVIEWED: []})
+        entry[folder_type].extend(sorted(os.path.join(root, name) for name in files if name.endswith('.txt')))
+
+    complete = {}
+    for text_dir, entry in sorted(found.items()):
+        if entry[TRANSLATED] and entry[REVIEWED]:
+            complete[text_dir] = entry
+        else:
+            missing = TRANSLATED if not entry[TRANSLATED] else REVIEWED
+            print(f"Warning: No {missing} files in {text_dir}. Skipping.")
+    return complete
+
+
+def diff_tree(target_dir, diffs_dir=None, workers=None, scan_threads=0):
+    """Diff every sub-domain of the tree with a process pool; returns the summary rows per reviewed file."""
+    sub_domains = find_sub_domains(target_dir, scan_threads)
+    print(f"Comparing {len(sub_domains)} sub-domains in '{target_dir}'...")
+
+    jobs = []
+    for entry in sub_domains.values():
+        diffs_paths = [os.path.join(diffs_dir, os.path.relpath(path, target_dir))[:-len('.txt')] + '.diff.tsv' if diffs_dir else None
+                       for path in entry[REVIEWED]]
+        jobs.append((entry[TRANSLATED], entry[REVIEWED], entry["info"], diffs_paths))
+
+    rows = []
+    with instrumentation.stage("diff_sub_domains", total=len(jobs), unit="sub_domains") as st, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_rows, _, lines_read in executor.map(diff_sub_domain, jobs):
+            for row in file_rows:
+                row['File'] = os.path.relpath(row['File'], target_dir)
+            rows.extend(file_rows)
+            st.add(sub_domains=1, files=len(file_rows), lines=lines_read, pairs=sum(r['Matched'] for r in file_rows))
+    return rows
+
+
+def totals_by(rows, keys):
+    """The summary rows added up per value of keys, with the rates computed from the sums."""
+    summed = ['Reviewed Lines', 'Matched', 'Unmatched', 'Changed', 'Char Distance', 'Reviewed Chars',
+              'Token Distance', 'Reviewed Tokens'] + BUCKET_NAMES
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(tuple(row[k] for k in keys), dict.fromkeys(summed, 0))
+        for field in summed:
+            total[field] += row[field]
+    return {key: add_rates(total) for key, total in sorted(totals.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Edit distance between the translated and the reviewed text of every sub-domain")
+    parser.add_argument("target_dir", help="Parallel_v2 or Domain-wise arranged folder")
+    parser.add_argument("-s", "--summary", help="Path to save the per-file summary as CSV")
+    parser.add_argument("-o", "--output", help="Folder for the changed lines, one .diff.tsv per reviewed file")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    fs_crawler.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.target_dir):
+        print(f"❌ Error: The directory '{args.target_dir}' does not exist.")
+        return 1
+
+    if rapidfuzz_levenshtein is None:
+        print("rapidfuzz is not installed, using the pure-Python Levenshtein (pip install rapidfuzz for a faster run)")
+
+    with instrumentation.instrumented_run("review_diff", args):
+        rows = diff_tree(args.target_dir, args.output, args.workers, args.scan_threads)
+        if not rows:
+            print("\nNo sub-domains with both translated and reviewed files were found.")
+            return 1
+
+        if args.summary:
+            with open(args.summary, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"\n✅ Summary saved to '{args.summary}'.")
+
+        print(f"\n{'Lang Pair':<10} | {'Domain':<8} | {'Matched':<9} | {'Unmatched':<9} | {'Changed %':<9} | "
+              f"{'Char Edit %':<11} | {'Token Edit %':<12} | " + " | ".join(f"{name:<9}" for name in BUCKET_NAMES[1:]))
+        print("-" * (92 + 12 * (len(BUCKET_NAMES) - 1)))
+        for (lang_pair, domain), total in totals_by(rows, ['Language Pair', 'Domain']).items():
+            print(f"{lang_pair:<10} | {domain:<8} | {total['Matched']:<9} | {total['Unmatched']:<9} | {total['Changed %']:<9} | "
+                  f"{total['Char Edit Rate %']:<11} | {total['Token Edit Rate %']:<12} | " +
+                  " | ".join(f"{total[name]:<9}" for name in BUCKET_NAMES[1:]))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,9 +1,19 @@
 import os
+import sys
+import argparse
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fs_crawler
+import corpus_paths
+import instrumentation
+import stats_db
+
 # --- Configuration ---
 # The specific folders you want to analyze within the target directory.
 FOLDERS_TO_ANALYZE = {'source_translated', 'source_reviewed'}
+# The name of the output CSV file for the report.
+OUTPUT_CSV = "/home/soham37/python/Stats/word_count_distribution_old.csv"
 
 def analyze_file_word_counts(filepath):
     """
@@ -68,12 +78,13 @@ def analyze_file_word_counts(filepath):
 
     return total_lines, word_bins
 
-def generate_distribution_report(target_dir):
+def generate_distribution_report(target_dir, scan_threads=0):
     """
     Generates a full report on sentence length distribution for a target directory.
 
     Args:
         target_dir (str): The path to the directory to analyze.
+        scan_threads (int): Threads listing the directories (0 for os.walk).
 
     Returns:
         pandas.DataFrame: A DataFrame containing the full analysis.
@@ -83,11 +94,16 @@ def generate_distribution_report(target_dir):
     print(f"\nStarting analysis of directory: '{target_dir}'...")
     
     # Walk through the entire target directory tree
-    for root, dirs, files in os.walk(target_dir):
+    for root, dirs, files in fs_crawler.walk(target_dir, scan_threads):
         current_dir_name = os.path.basename(root)
 
         # Only process files inside the specified analysis folders
         if current_dir_name in FOLDERS_TO_ANALYZE:
+            # Metadata of the folder, e.g. "AGRI/HIN-ASM/AGRI_SUBDOMAIN/translation_text/source_translated"
+            info = corpus_paths.lookup(root)
+            if info is None:
+                continue
+
             for filename in files:
                 if not filename.endswith('.txt'):
                     continue
@@ -101,21 +117,13 @@ def generate_distribution_report(target_dir):
                     if total_lines == 0:
                         continue # Skip empty or unreadable files
 
-                    # 2. Extract metadata from the path
-                    relative_dir_path = os.path.dirname(os.path.relpath(full_path, target_dir))
-                    path_parts = relative_dir_path.split(os.sep)
-
-                    primary_domain = path_parts[0]
-                    lang_pair = path_parts[1]
-                    sub_domain = path_parts[2]
-                    bi_text_type = path_parts[4] # Or simply current_dir_name
-
-                    # 3. Combine all data into a single record
+                    # 2. Combine the folder metadata and the counts into a single record
                     record = {
-                        'Primary Domain': primary_domain,
-                        'Language Pair': lang_pair,
-                        'Sub Domain': sub_domain,
-                        'Bi-text Type': bi_text_type,
+                        'Path': full_path,
+                        'Primary Domain': info.domain,
+                        'Language Pair': info.lang_pair,
+                        'Sub Domain': info.sub_domain,
+                        'Bi-text Type': info.folder_type,
                         'File Name': filename,
                         'Total Lines': total_lines,
                     }
@@ -123,45 +131,65 @@ def generate_distribution_report(target_dir):
                     record.update(word_bins)
                     
                     analysis_data.append(record)
-                    print(f"  - Analyzed: {os.path.relpath(full_path, target_dir)}")
+                    instrumentation.add(files=1, lines=total_lines)
 
-                except IndexError:
-                    print(f"Warning: Could not parse metadata from path: '{relative_dir_path}'. Skipping file.")
                 except Exception as e:
                     print(f"An unexpected error occurred for file '{filename}': {e}")
 
+    # The threaded crawl finds the folders in no fixed order
+    if scan_threads:
+        analysis_data.sort(key=lambda r: (r['Primary Domain'], r['Language Pair'], r['Sub Domain'], r['Bi-text Type'], r['File Name']))
     return pd.DataFrame(analysis_data)
 
 # --- Main execution block ---
 if __name__ == "__main__":
-    # Get the directory path from the user
-    input_path = input("Enter the full path to the directory to analyze (e.g., Parent): ").strip()
-
-    if not os.path.isdir(input_path):
-        print(f"❌ Error: The directory '{input_path}' does not exist. Please check the path and try again.")
-    else:
-        results_df = generate_distribution_report(input_path)
-
-        if not results_df.empty:
-            # Define the final column order for the CSV file
-            column_order = [
-                'Primary Domain', 'Language Pair', 'Sub Domain', 'Bi-text Type', 'File Name', 
-                'Total Lines', '0-5 words', '6-10 words', '11-20 words', '21-30 words', 
-                '31-55 words', '> 55 words'
-            ]
-            results_df = results_df[column_order]
-
-            # Create a dynamic output filename based on the input folder's name
-            base_folder_name = os.path.basename(os.path.normpath(input_path))
-            # output_csv_name = f"{base_folder_name}_sentence_distribution.csv"
-            output_csv_name = "/home/soham37/python/Stats/word_count_distribution_old.csv"
-
-            # Save the report to a CSV file
-            results_df.to_csv(output_csv_name, index=False)
-            
-            print(f"\n✅ Analysis complete! Report saved to '{output_csv_name}'.")
-            print("\nPreview of the report:")
-            print(results_df.head())
+    parser = argparse.ArgumentParser(description="Sentence length distribution of the source_translated/source_reviewed files")
+    parser.add_argument("target_dir", nargs="?", help="Directory to analyze (asked for if not given)")
+    parser.add_argument("-o", "--output", default=OUTPUT_CSV, help=f"Path of the report CSV (default: {OUTPUT_CSV})")
+    fs_crawler.add_arguments(parser)
+    stats_db.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumentation.instrumented_run("word_count_distribution", args):
+        # Get the directory path from the user
+        input_path = args.target_dir or input("Enter the full path to the directory to analyze (e.g., Parent): ").strip()
+
+        if not os.path.isdir(input_path):
+            print(f"❌ Error: The directory '{input_path}' does not exist. Please check the path and try again.")
         else:
-            print("\nNo valid files were found to analyze in the specified directory.")
+            results_df = generate_distribution_report(input_path, args.scan_threads)
+
+            if not results_df.empty:
+                # Define the final column order for the CSV file
+                column_order = [
+                    'Primary Domain', 'Language Pair', 'Sub Domain', 'Bi-text Type', 'File Name', 
+                    'Total Lines', '0-5 words', '6-10 words', '11-20 words', '21-30 words', 
+                    '31-55 words', '> 55 words'
+                ]
+
+                # Create a dynamic output filename based on the input folder's name
+                base_folder_name = os.path.basename(os.path.normpath(input_path))
+                # output_csv_name = f"{base_folder_name}_sentence_distribution.csv"
+                output_csv_name = args.output
+
+                # Save the per-file line counts and bins to the stats database if specified
+                if args.db:
+                    bins = column_order[6:]
+                    records = results_df.to_dict('records')
+                    stats_db.record_run(
+                        args.db, "word_count_distribution", input_path, args.db_label,
+                        files=[{"path": r['Path'], "lines": int(r['Total Lines'])} for r in records],
+                        distributions=[(r['Path'], "source_words", {b: int(r[b]) for b in bins}) for r in records]
+                    )
+
+                # Save the report to a CSV file
+                results_df = results_df[column_order]
+                results_df.to_csv(output_csv_name, index=False)
+            
+                print(f"\n✅ Analysis complete! Report saved to '{output_csv_name}'.")
+                print("\nPreview of the report:")
+                print(results_df.head())
+            else:
+                print("\nNo valid files were found to analyze in the specified directory.")
 
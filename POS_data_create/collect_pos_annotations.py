@@ -0,0 +1,275 @@
+# How to use:
+'''
+
+python3 collect_pos_annotations.py EDU/IITP returned_chunks/ -o EDU/IITP_annotated
+python3 collect_pos_annotations.py EDU/IITP returned_chunks/ -o EDU/IITP_annotated --lang-pairs HIN-BAN --format parquet
+
+EDU/IITP is the output folder of package_pos_batches.py (with manifest.json and LP/LP_non_empty.txt).
+returned_chunks/ is searched for the annotated {LP}_non_empty_part_{N} files, in any sub-folder and
+with any extension. A chunk is either in SSF:
+
+    <Sentence id='1'>
+    1	token	TAG
+    ...
+    </Sentence>
+
+or tagged text, one sentence per line, tokens written as token\\TAG (see --tag-sep).
+
+Writes OUT/LP_annotated.tsv (or .parquet) per lang pair: source_id, translation_id, chunk, sentence,
+source, translation, tokens, tags, token_count, expected_tokens, status.
+
+'''
+
+import os
+import re
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fs_crawler
+import instrumentation
+from tokenizer_for_all_indian_languages_in_SSF_format import tokenize, convert_raw_sentences_into_ssf_format
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# --- Configuration ---
+MANIFEST_NAME = "manifest.json"
+# Separator between a token and its tag in tagged (non-SSF) chunks, e.g. "किताब\\N_NN".
+TAG_SEP = "\\"
+# Returned chunk names, after the lang pair; the lang pairs come from the manifest (see chunk_re).
+CHUNK_SUFFIX = r'_non_empty_part_(\d+)'
+SENTENCE_RE = re.compile(r"<Sentence id=['\"]?(\d+)['\"]?>")
+COLUMNS = ["source_id", "translation_id", "chunk", "sentence", "source", "translation",
+           "tokens", "tags", "token_count", "expected_tokens", "status"]
+# ok: the tokens are those of the SSF tokenizer (or of a plain whitespace split) of the translation;
+# token_text: the same number of tokens with a different text; token_count: a different number of tokens;
+# missing: the sentence (or the whole chunk) did not come back; extra: a sentence not in the manifest.
+STATUSES = ["ok", "token_text", "token_count", "missing", "extra"]
+
+
+def parse_ssf(text):
+    """{sentence number: [(token, tag)]} of an SSF file; the sentence ids give the positions."""
+    sentences = {}
+    current = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        header = SENTENCE_RE.match(line)
+        if header:
+            current = sentences.setdefault(int(header.group(1)), [])
+        elif line.startswith('</Sentence'):
+            current = None
+        elif current is not None:
+            cells = line.split('\t')
+            if len(cells) >= 2 and cells[1] not in ('((', '))'):
+                current.append((cells[1].strip(), cells[2].strip() if len(cells) > 2 else ''))
+    return sentences
+
+
+def parse_tagged(text, tag_sep=TAG_SEP):
+    """{line number: [(token, tag)]} of a one-sentence-per-line tagged file (empty lines are skipped)."""
+    sentences = {}
+    for number, line in enumerate((l for l in text.splitlines() if l.strip()), start=1):
+        pairs = []
+        for item in line.split():
+            token, sep, tag = item.rpartition(tag_sep)
+            pairs.append((token, tag) if sep and token else (item, ''))
+        sentences[number] = pairs
+    return sentences
+
+
+def expected_tokens(translation):
+    """The tokens of a translation in the SSF written by the tokenizer, and of a whitespace split."""
+    tokenized = convert_raw_sentences_into_ssf_format([' '.join(tokenize(translation.split()))])[0]
+    ssf_tokens = [token for token, _ in parse_ssf(tokenized)[1]]
+    return ssf_tokens, translation.split()
+
+
+def collect_chunk(job):
+    """Parse one returned chunk and join it with its manifest entry; returns the output rows."""
+    lang_pair, chunk_number, chunk_path, entry, sources, translations, tag_sep = job
+    rows = []
+    returned = {}
+    if chunk_path is not None:
+        with open(chunk_path, 'r', encoding='utf-8-sig') as f:
+            text = f.read()
+        returned = parse_ssf(text) if SENTENCE_RE.search(text) else parse_tagged(text, tag_sep)
+
+    for position, (source_id, translation_id) in enumerate(zip(entry["source_ids"], entry["translation_ids"]), start=1):
+        translation = translations[position - 1]
+        ssf_tokens, split_tokens = expected_tokens(translation)
+        pairs = returned.pop(position, None)
+        row = {
+            "source_id": source_id, "translation_id": translation_id, "chunk": chunk_number, "sentence": position,
+            "source": sources[position - 1], "translation": translation, "expected_tokens": len(ssf_tokens)
+        }
+        if pairs is None:
+            row.update(tokens="", tags="", token_count=0, status="missing")
+        else:
+            tokens = [token for token, _ in pairs]
+            if tokens in (ssf_tokens, split_tokens):
+                status = "ok"
+            elif len(tokens) in (len(ssf_tokens), len(split_tokens)):
+                status = "token_text"
+            else:
+                status = "token_count"
+            row.update(tokens=" ".join(tokens), tags=" ".join(tag for _, tag in pairs), token_count=len(tokens), status=status)
+        rows.append(row)
+
+    # Sentences the annotators added (e.g. by splitting a line) cannot be joined to a source id
+    for position, pairs in sorted(returned.items()):
+        rows.append({
+            "source_id": "", "translation_id": "", "chunk": chunk_number, "sentence": position, "source": "",
+            "translation": "", "tokens": " ".join(t for t, _ in pairs), "tags": " ".join(tag for _, tag in pairs),
+            "token_count": len(pairs), "expected_tokens": 0, "status": "extra"
+        })
+    return lang_pair, chunk_number, chunk_path, rows
+
+
+def chunk_re(lang_pairs):
+    """
+    Regex of the chunk names of the given lang pairs. The names are the column names of the merged
+    TSV (HIN-BAN, HIN-MNI_BENG, ...), so they are matched as they are, the longest first.
+    """
+    names = sorted(lang_pairs, key=len, reverse=True)
+    return re.compile('^(' + '|'.join(re.escape(name) for name in names) + ')' + CHUNK_SUFFIX)
+
+
+def find_returned_chunks(returned_dir, lang_pairs, scan_threads=0):
+    """
+    {(lang pair, chunk number): path} of the returned chunk files of the lang pairs,
+    whatever their folder or extension.
+    """
+    found = {}
+    pattern = chunk_re(lang_pairs)
+    for root, dirs, files in fs_crawler.walk(returned_dir, scan_threads):
+        for name in files:
+            match = pattern.match(name)
+            if match:
+                key = (match.group(1), int(match.group(2)))
+                if key in found:
+                    print(f"Warning: Chunk {name} found twice, using {found[key]}")
+                    continue
+                found[key] = os.path.join(root, name)
+    return found
+
+
+def load_non_empty(package_dir, lang_pair):
+    """{translation id: (source, translation)} from the LP_non_empty.txt written by the packager."""
+    texts = {}
+    with open(os.path.join(package_dir, lang_pair, f"{lang_pair}_non_empty.txt"), 'r', encoding='utf-8') as f:
+        for line in f:
+            cells = line.rstrip('\n').split('\t')
+            if len(cells) >= 4:
+                texts[cells[2]] = (cells[1], cells[3])
+    return texts
+
+
+def write_rows(rows, output_path, output_format):
+    if output_format == "parquet":
+        table = pa.Table.from_pylist(rows, schema=pa.schema([
+            (name, pa.int32() if name in ("chunk", "sentence", "token_count", "expected_tokens") else pa.string())
+            for name in COLUMNS
+        ]))
+        pq.write_table(table, output_path)
+        return
+    # Quoting is disabled like in tsv_reader; no cell has a tab or a newline
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("\t".join(COLUMNS) + "\n")
+        f.writelines("\t".join(str(row[name]) for name in COLUMNS) + "\n" for row in rows)
+
+
+def collect(package_dir, returned_dir, out_dir, lang_pairs=None, tag_sep=TAG_SEP, output_format="tsv", workers=None, scan_threads=0):
+    """
+    Join the returned chunks of every lang pair with the manifest and write one file per lang pair.
+
+    Returns:
+        dict: {lang pair: {status: sentence count}}
+    """
+    with open(os.path.join(package_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    lang_pairs = lang_pairs or list(manifest["lang_pairs"])
+
+    with instrumentation.stage("find_chunks"):
+        returned = find_returned_chunks(returned_dir, manifest["lang_pairs"], scan_threads)
+    print(f"Found {len(returned)} returned chunk file(s) in '{returned_dir}'")
+
+    jobs = []
+    for lang_pair in lang_pairs:
+        if lang_pair not in manifest["lang_pairs"]:
+            print(f"Warning: {lang_pair} is not in the manifest. Skipping.")
+            continue
+        # Hash join: translation id -> texts, (lang pair, chunk number) -> returned file
+        texts = load_non_empty(package_dir, lang_pair)
+        for chunk_number, entry in enumerate(manifest["lang_pairs"][lang_pair]["chunks"], start=1):
+            pairs = [texts.get(tid, ("", "")) for tid in entry["translation_ids"]]
+            jobs.append((lang_pair, chunk_number, returned.get((lang_pair, chunk_number)), entry,
+                         [s for s, _ in pairs], [t for _, t in pairs], tag_sep))
+
+    results = {lp: [] for lp in lang_pairs if lp in manifest["lang_pairs"]}
+    missing_chunks = {lp: 0 for lp in results}
+    with instrumentation.stage("collect_chunks", total=len(jobs)) as st, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        for lang_pair, chunk_number, chunk_path, rows in executor.map(collect_chunk, jobs, chunksize=8):
+            results[lang_pair].extend(rows)
+            if chunk_path is None:
+                missing_chunks[lang_pair] += 1
+            st.add(files=1, lines=len(rows))
+
+    os.makedirs(out_dir, exist_ok=True)
+    extension = "parquet" if output_format == "parquet" else "tsv"
+    summary = {}
+    for lang_pair, rows in results.items():
+        write_rows(rows, os.path.join(out_dir, f"{lang_pair}_annotated.{extension}"), output_format)
+        counts = {status: 0 for status in STATUSES}
+        for row in rows:
+            counts[row["status"]] += 1
+        counts["missing_chunks"] = missing_chunks[lang_pair]
+        summary[lang_pair] = counts
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Join annotated POS chunks back to their source ids, one file per lang pair")
+    parser.add_argument("package_dir", help="Output folder of package_pos_batches.py (with manifest.json)")
+    parser.add_argument("returned_dir", help="Folder with the annotated chunk files")
+    parser.add_argument("-o", "--output", required=True, help="Folder to write the per-lang-pair files to")
+    parser.add_argument("--lang-pairs", nargs="+", help="Lang pairs to collect (default: all in the manifest)")
+    parser.add_argument("--tag-sep", default=TAG_SEP, help=f"Token/tag separator of tagged (non-SSF) chunks (default: {TAG_SEP})")
+    parser.add_argument("--format", choices=["tsv", "parquet"], default="tsv", help="Output format (default: tsv; parquet needs pyarrow)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    fs_crawler.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isfile(os.path.join(args.package_dir, MANIFEST_NAME)):
+        print(f"Error: No {MANIFEST_NAME} in {args.package_dir}")
+        return 1
+    if not os.path.isdir(args.returned_dir):
+        print(f"Error: {args.returned_dir} is not a valid directory")
+        return 1
+    if args.format == "parquet" and pa is None:
+        print("Error: pyarrow is required for --format parquet (pip install pyarrow)", file=sys.stderr)
+        return 1
+
+    with instrumentation.instrumented_run("collect_pos_annotations", args):
+        summary = collect(args.package_dir, args.returned_dir, args.output, args.lang_pairs, args.tag_sep,
+                          args.format, args.workers, args.scan_threads)
+
+    print(f"\n{'Lang Pair':<10} | " + " | ".join(f"{s:>11}" for s in STATUSES + ["missing_chunks"]))
+    print("-" * (13 + 14 * (len(STATUSES) + 1)))
+    for lang_pair, counts in sorted(summary.items()):
+        print(f"{lang_pair:<10} | " + " | ".join(f"{counts[s]:>11}" for s in STATUSES + ["missing_chunks"]))
+    print(f"\nFiles saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
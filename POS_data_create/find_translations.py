@@ -4,7 +4,17 @@ import argparse
 import sys
 from collections import defaultdict
 
-def find_translations(source_file_path, data_directory, output_file_path):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tsv_reader import TSVStats, iter_pairs
+from text_normalize import normalize, normalizers_for_lang_pair
+import instrumentation
+import corpus_paths
+from external_merge import SortedRuns, merge_by_key
+
+# Script of the source sentences (Hindi).
+SOURCE_SCRIPT = 'Devanagari'
+
+def find_translations(source_file_path, data_directory, output_file_path, normalize_text=False, external=False):
     """
     Finds and aggregates translations for a list of source sentences from a
     structured directory of translation files.
@@ -13,12 +23,18 @@ def find_translations(source_file_path, data_directory, output_file_path):
         source_file_path (str): Path to a text file with one source sentence per line.
         data_directory (str): Path to the root directory containing the language pair folders.
         output_file_path (str): Path for the output TSV file.
+        normalize_text (bool): Unicode-normalize both sides (text_normalize) before matching,
+            so NFC/NFD forms, stray ZWJ/ZWNJ, NBSPs and '|' for '।' do not prevent a match.
+        external (bool): Keep the found translations in sorted temporary runs per language pair
+            and merge them into the output, instead of in one dict, for very large lookups.
     """
     # --- 1. Read the source sentences to search for ---
     try:
         with open(source_file_path, 'r', encoding='utf-8') as f:
             # Use a set for efficient O(1) average time complexity lookups
             source_sentences_to_find = {line.strip() for line in f if line.strip()}
+        if normalize_text:
+            source_sentences_to_find = {normalize(s, SOURCE_SCRIPT) for s in source_sentences_to_find}
         print(f"Loaded {len(source_sentences_to_find)} unique source sentences to find.")
     except FileNotFoundError:
         print(f"Error: The source sentence file was not found at '{source_file_path}'", file=sys.stderr)
@@ -27,48 +43,53 @@ def find_translations(source_file_path, data_directory, output_file_path):
     # --- 2. Scan the directory and build a map of translations ---
     # This will store our results in the format:
     # { "source_sentence": {"LANG_PAIR_1": "translation_1", "LANG_PAIR_2": "translation_2"} }
-    found_translations = {sentence: {} for sentence in source_sentences_to_find}
+    # With external, {lang_pair: SortedRuns of source -> translation} instead
+    found_translations = {} if external else {sentence: {} for sentence in source_sentences_to_find}
     all_lang_pairs = set()
 
     print(f"Scanning data directory: '{data_directory}'...")
     
-    # os.walk is perfect for traversing the entire directory tree
-    for dirpath, dirnames, filenames in os.walk(data_directory):
-        # We only care about folders specifically named 'source_reviewed'
-        if os.path.basename(dirpath) == 'source_reviewed':
+    with instrumentation.stage("scan_source_reviewed"):
+        # os.walk is perfect for traversing the entire directory tree
+        for dirpath, dirnames, filenames in os.walk(data_directory):
+            # We only care about folders specifically named 'source_reviewed'
+            if os.path.basename(dirpath) == 'source_reviewed':
             
-            # Extract the language pair from the directory path.
-            # It's the first directory inside the main data_directory.
-            try:
-                # relpath gives us the path relative to the data_directory root
+                # Extract the language pair from the directory path,
                 # e.g., "HIN-BAN/AGRI/EDU_NCERT_PHY/translation_text/source_reviewed"
-                relative_path = os.path.relpath(dirpath, data_directory)
-                # The first part of this path is the language pair
-                lang_pair = relative_path.split(os.sep)[0]
+                info = corpus_paths.lookup(dirpath, layout='Parallel_v2')
+                if info is None:
+                    # Skip if the path structure is not as expected
+                    continue
+                lang_pair = info.lang_pair
                 all_lang_pairs.add(lang_pair)
-            except (IndexError, ValueError):
-                # Skip if the path structure is not as expected
-                continue
+                normalize_source, normalize_target = normalizers_for_lang_pair(lang_pair)
 
-            # Now process all text files within this 'source_reviewed' folder
-            for filename in filenames:
-                if filename.endswith('.txt'):
-                    file_path = os.path.join(dirpath, filename)
-                    try:
-                        with open(file_path, 'r', newline='', encoding='utf-8') as infile:
-                            reader = csv.reader(infile, delimiter='\t')
-                            for row in reader:
-                                # Ensure the row is valid (has at least source and translation)
-                                if len(row) >= 2:
-                                    source_text = row[0]
-                                    translation_text = row[1]
-                                    
-                                    # If this is one of the sentences we are looking for...
-                                    if source_text in source_sentences_to_find:
-                                        # ...store the translation under its language pair.
+                # Now process all text files within this 'source_reviewed' folder
+                for filename in filenames:
+                    if filename.endswith('.txt'):
+                        file_path = os.path.join(dirpath, filename)
+                        try:
+                            # Quoting is disabled: stray quotes in the text are kept as they are
+                            file_stats = TSVStats(file_path)
+                            for source_text, translation_text, _ in iter_pairs(file_path, stats=file_stats):
+                                if normalize_text:
+                                    source_text = normalize_source(source_text)
+                                    translation_text = normalize_target(translation_text)
+                                # If this is one of the sentences we are looking for...
+                                if source_text in source_sentences_to_find:
+                                    # ...store the translation under its language pair.
+                                    if external:
+                                        if lang_pair not in found_translations:
+                                            found_translations[lang_pair] = SortedRuns(os.path.dirname(os.path.abspath(output_file_path)))
+                                        found_translations[lang_pair][source_text] = translation_text
+                                    else:
                                         found_translations[source_text][lang_pair] = translation_text
-                    except Exception as e:
-                        print(f"Warning: Could not process file {file_path}. Error: {e}", file=sys.stderr)
+                            if file_stats.malformed:
+                                print(f"Warning: {file_stats.malformed} malformed line(s) skipped in {file_path}", file=sys.stderr)
+                            instrumentation.add(files=1, lines=file_stats.lines)
+                        except Exception as e:
+                            print(f"Warning: Could not process file {file_path}. Error: {e}", file=sys.stderr)
 
     print("Directory scan complete. Aggregating results...")
 
@@ -83,17 +104,25 @@ def find_translations(source_file_path, data_directory, output_file_path):
             header = ['source'] + sorted_lang_pairs
             writer.writerow(header)
             
-            # Write the data for each source sentence
-            for sentence in sorted(list(source_sentences_to_find)):
-                row_data = [sentence]
-                translations = found_translations[sentence]
+            if external:
+                # k-way merge of the sorted sentences with the sorted runs of every language pair
+                streams = {'': ((sentence, '') for sentence in sorted(source_sentences_to_find)), **found_translations}
+                for sentence, translations in merge_by_key(streams):
+                    writer.writerow([sentence] + [translations.get(lang_pair, '') for lang_pair in sorted_lang_pairs])
+                for runs in found_translations.values():
+                    runs.close()
+            else:
+                # Write the data for each source sentence
+                for sentence in sorted(list(source_sentences_to_find)):
+                    row_data = [sentence]
+                    translations = found_translations[sentence]
                 
-                # For each language pair in our header, get the translation.
-                # Use .get() to return an empty string if no translation was found.
-                for lang_pair in sorted_lang_pairs:
-                    row_data.append(translations.get(lang_pair, '')) # Appends empty string if not found
+                    # For each language pair in our header, get the translation.
+                    # Use .get() to return an empty string if no translation was found.
+                    for lang_pair in sorted_lang_pairs:
+                        row_data.append(translations.get(lang_pair, '')) # Appends empty string if not found
                     
-                writer.writerow(row_data)
+                    writer.writerow(row_data)
 
         print(f"\nSuccessfully created the translation report at '{output_file_path}'.")
         print(f"Found translations for {len(all_lang_pairs)} language pairs: {', '.join(sorted_lang_pairs)}")
@@ -124,6 +153,21 @@ if __name__ == "__main__":
         help="Path for the final merged output TSV file."
     )
     
+    parser.add_argument(
+        "--external",
+        action="store_true",
+        help="Merge the translations from sorted temporary runs instead of holding them in memory (see external_merge.py)."
+    )
+    
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="Unicode-normalize the sentences and the corpus before matching (see text_normalize.py)."
+    )
+    
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
     
-    find_translations(args.source_file, args.data_directory, args.output)
+    with instrumentation.instrumented_run("find_translations", args):
+        find_translations(args.source_file, args.data_directory, args.output, args.normalize, args.external)
+
@@ -1,26 +1,43 @@
 import os
 import sys
 import csv
+import argparse
 from pathlib import Path
 from collections import defaultdict
 
-def load_all_gov_pairs_for_langpair(lp_root: Path):
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tsv_reader import TSVStats, read_tsv
+from text_normalize import normalizers_for_lang_pair
+from external_merge import SortedRuns, merge_by_key
+from lp_overlap import OverlapCounter, overlap_matrix, print_result
+import instrumentation
+
+# --- Configuration ---
+# Domain folder read under every LP folder (--domain); change accordingly for different domains.
+DOMAIN = "EDU"
+
+def load_all_gov_pairs_for_langpair(lp_root: Path, normalize: bool = False, mapping=None, domain: str = DOMAIN):
     """
     Aggregate all <source>\t<target> pairs from all .txt files under:
-      lp_root / "GOV" / ** / "translation_text" / "source_translated" / *.txt
+      lp_root / domain / ** / "translation_text" / "source_reviewed" / *.txt
     Returns:
       - mapping: dict {source: target}
       - stats: dict counts (files, lines, bad_lines)
-    Last occurrence wins if duplicates. Skips lines without a tab.
+    Last occurrence wins if duplicates. Skips header rows, empty lines and lines without a tab.
+    With normalize, both sides are Unicode-normalized first (text_normalize), so the same
+    sentence typed differently by two translators counts once.
+    mapping can be given to fill something else than a new dict, e.g. an external_merge.SortedRuns.
     """
-    gov_dir = lp_root / "EDU" # change accordingly for different domains
-    mapping = {}
+    gov_dir = lp_root / domain
+    mapping = {} if mapping is None else mapping
     stats = {"files": 0, "lines": 0, "bad_lines": 0}
 
     if not gov_dir.is_dir():
         return mapping, stats
 
-    # Walk all subfolders under GOV
+    normalize_source, normalize_target = normalizers_for_lang_pair(lp_root.name)
+
+    # Walk all subfolders under the domain
     for dirpath, dirnames, filenames in os.walk(gov_dir):
         # Only read files from directories named .../translation_text/source_translated
         p = Path(dirpath)
@@ -34,22 +51,21 @@ def load_all_gov_pairs_for_langpair(lp_root: Path):
             if not fp.is_file() or fp.suffix.lower() != ".txt":
                 continue
             stats["files"] += 1
+            file_stats = TSVStats(str(fp))
             try:
-                with fp.open("r", encoding="utf-8") as f:
-                    for line in f:
-                        stats["lines"] += 1
-                        ln = line.rstrip("\n")
-                        if "\t" not in ln:
-                            stats["bad_lines"] += 1
-                            continue
-                        src, tgt = ln.split("\t", 1)
-                        src = src.strip()
-                        tgt = tgt.strip()
+                for batch in read_tsv(fp, stats=file_stats):
+                    for src, tgt, _ in batch:
+                        if normalize:
+                            src = normalize_source(src)
+                            tgt = normalize_target(tgt)
                         if not src:
                             continue
                         mapping[src] = tgt
             except Exception as e:
                 print(f"Warning: Failed to read {fp}: {e}")
+            stats["lines"] += file_stats.lines
+            stats["bad_lines"] += file_stats.malformed
+            instrumentation.add(files=1, lines=file_stats.lines, bytes=fp.stat().st_size)
 
     return mapping, stats
 
@@ -116,17 +132,66 @@ def write_universal_tsv(out_path: Path, langpairs: list, universal_sources: list
                 row.append(per_lp_map[lp].get(s, ""))
             w.writerow(row)
 
-def main():
-    if len(sys.argv) not in (3, 4):
-        print("Usage: python select_gov_universal_agnostic.py <root_dir> <output_tsv> [--report]")
-        print("  <root_dir>: path containing HIN-XXX directories")
-        print("  <output_tsv>: path to final TSV with universal sentences across all LPs")
-        print("  --report (optional): print per-LP stats and coverage diagnostics")
-        sys.exit(1)
+def write_universal_tsv_external(out_path: Path, langpairs: list, per_lp_runs: dict, min_fraction: float = 0.6,
+                                 counter: OverlapCounter = None):
+    """
+    Same output as relaxed_sources_across_langpairs + write_universal_tsv, from the sorted
+    runs of every LP: a k-way merge streams the sources in order and the threshold is applied
+    per source, so only one pair per LP is in memory.
+    Returns (rows written, unique sources per LP, overlap with the written rows per LP).
+    As with write_universal_tsv, out_path is only created if there is at least one row.
+    counter, if given, gets the LPs of every source, for the LP x LP matrix of --report.
+    """
+    min_required = max(1, int(len(per_lp_runs) * min_fraction))
+    unique = dict.fromkeys(langpairs, 0)
+    overlap = dict.fromkeys(langpairs, 0)
+    rows = 0
 
-    root = Path(sys.argv[1]).resolve()
-    out_tsv = Path(sys.argv[2]).resolve()
-    report = len(sys.argv) == 4 and sys.argv[3] == "--report"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    # Rows are only known while merging, so they go to a temporary file first
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    try:
+        with tmp_path.open("w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, delimiter="\t")
+            w.writerow(["source_HIN"] + langpairs)
+            for s, targets in merge_by_key(per_lp_runs):
+                for lp in targets:
+                    unique[lp] += 1
+                if counter is not None:
+                    counter.add(targets)
+                if len(targets) < min_required:
+                    continue
+                for lp in targets:
+                    overlap[lp] += 1
+                w.writerow([s] + [targets.get(lp, "") for lp in langpairs])
+                rows += 1
+        if rows:
+            os.replace(tmp_path, out_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return rows, unique, overlap
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Select the source sentences translated into most language pairs")
+    parser.add_argument("root_dir", help="Path containing HIN-XXX directories")
+    parser.add_argument("output_tsv", help="Path to final TSV with universal sentences across all LPs")
+    parser.add_argument("--domain", default=DOMAIN, help=f"Domain folder to read under every LP folder (default: {DOMAIN})")
+    parser.add_argument("--report", action="store_true", help="Print per-LP stats and coverage diagnostics")
+    parser.add_argument("--normalize", action="store_true",
+                        help="Unicode-normalize sources and targets before matching them across LPs")
+    parser.add_argument("--external", action="store_true",
+                        help="Keep the pairs in sorted temporary runs and merge them, for domains too large for memory")
+    instrumentation.add_arguments(parser)
+    return parser.parse_args()
+
+def main(args):
+    root = Path(args.root_dir).resolve()
+    out_tsv = Path(args.output_tsv).resolve()
+    report = args.report
+    normalize = args.normalize
+    external = args.external
+    domain = args.domain
 
     if not root.is_dir():
         print(f"Error: root_dir not found: {root}")
@@ -139,35 +204,76 @@ def main():
 
     per_lp_map = {}
     stats_all = {}
-    for lp in langpairs:
-        mapping, stats = load_all_gov_pairs_for_langpair(root / lp)
-        if not mapping:
-            print(f"[{lp}] No GOV data found.")
-        else:
-            print(f"[{lp}] Loaded {len(mapping)} pairs from {stats['files']} file(s), {stats['bad_lines']} malformed line(s) skipped.")
-        per_lp_map[lp] = mapping
-        stats_all[lp] = stats
+    if external:
+        # The runs go next to the output, which is usually on a larger disk than /tmp
+        out_tsv.parent.mkdir(parents=True, exist_ok=True)
+    with instrumentation.stage("load_langpairs"):
+        for lp in langpairs:
+            runs = SortedRuns(tmp_dir=out_tsv.parent) if external else None
+            mapping, stats = load_all_gov_pairs_for_langpair(root / lp, normalize, runs, domain)
+            if not mapping:
+                print(f"[{lp}] No {domain} data found.")
+            elif not external:
+                # With --external only the merge knows the distinct sources; printed after it
+                print(f"[{lp}] Loaded {len(mapping)} pairs from {stats['files']} file(s), {stats['bad_lines']} malformed line(s) skipped.")
+            per_lp_map[lp] = mapping
+            stats_all[lp] = stats
+
+    if external:
+        try:
+            counter = OverlapCounter(langpairs, min_fraction=0.6) if report else None
+            with instrumentation.stage("write_universal_tsv", unit="lines") as st:
+                rows, unique, overlap = write_universal_tsv_external(out_tsv, langpairs, per_lp_map, min_fraction=0.6,
+                                                                     counter=counter)
+                st.add(lines=rows)
+        finally:
+            for runs in per_lp_map.values():
+                runs.close()
+        for lp in langpairs:
+            if unique[lp]:
+                stats = stats_all[lp]
+                print(f"[{lp}] Loaded {unique[lp]} pairs from {stats['files']} file(s), {stats['bad_lines']} malformed line(s) skipped.")
+        if not rows:
+            print(f"No universal source sentences found across all language pairs' {domain} data.")
+            if report:
+                for lp in langpairs:
+                    print(f"  - {lp}: {unique[lp]} unique sources")
+            return
+        print(f"✓ Wrote universal TSV with {rows} rows: {out_tsv}")
+        if report:
+            print("\nDiagnostics:")
+            for lp in langpairs:
+                print(f"  - {lp}: {unique[lp]} unique {domain} sources; overlap with universal: {overlap[lp]}")
+            print_result(domain, counter.result())
+        return
 
     # Require presence across ALL language pairs
     # If any LP has zero pairs, the intersection will be empty.
     universal_sources = relaxed_sources_across_langpairs(per_lp_map, min_fraction=0.6)
 
     if not universal_sources:
-        print("No universal source sentences found across all language pairs' GOV data.")
+        print(f"No universal source sentences found across all language pairs' {domain} data.")
         if report:
             # Simple coverage hints: show top-N frequent sources per LP or counts
             for lp in langpairs:
                 print(f"  - {lp}: {len(per_lp_map[lp])} unique sources")
         sys.exit(0)
 
-    write_universal_tsv(out_tsv, langpairs, universal_sources, per_lp_map)
+    with instrumentation.stage("write_universal_tsv", unit="lines") as st:
+        write_universal_tsv(out_tsv, langpairs, universal_sources, per_lp_map)
+        st.add(lines=len(universal_sources))
     print(f"✓ Wrote universal TSV with {len(universal_sources)} rows: {out_tsv}")
 
     if report:
         print("\nDiagnostics:")
+        universal_set = set(universal_sources)
         for lp in langpairs:
             total = len(per_lp_map[lp])
-            print(f"  - {lp}: {total} unique GOV sources; overlap with universal: {sum(1 for s in universal_sources if s in per_lp_map[lp])}")
+            print(f"  - {lp}: {total} unique {domain} sources; overlap with universal: {len(universal_set & per_lp_map[lp].keys())}")
+        # Sources shared by each two LPs, and in how many LPs each source is (see lp_overlap.py)
+        print_result(domain, overlap_matrix(per_lp_map, min_fraction=0.6))
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    with instrumentation.instrumented_run("find_translations_directly_new", args):
+        main(args)
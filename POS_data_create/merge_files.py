@@ -3,6 +3,12 @@ import argparse
 import sys
 import os
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import instrumentation
+
+# Folder merged when no input folder is given.
+INPUT_DIR = "/home/soham37/python/Parallel_v2/HIN-MNI"
+
 def merge_tsv_files(input_files, output_file):
     """
     Merges multiple tab-separated (TSV) files vertically.
@@ -27,7 +33,6 @@ def merge_tsv_files(input_files, output_file):
 
             # --- Process the first file ---
             first_file = input_files[0]
-            print(f"Processing first file (with header): {first_file}")
             with open(first_file, 'r', newline='', encoding='utf-8') as infile:
                 reader = csv.reader(infile, delimiter='\t')
                 
@@ -36,12 +41,14 @@ def merge_tsv_files(input_files, output_file):
                 writer.writerow(header)
                 
                 # Write the rest of the rows from the first file
+                rows = 0
                 for row in reader:
                     writer.writerow(row)
+                    rows += 1
+            instrumentation.add(files=1, lines=rows)
 
             # --- Process the remaining files ---
             for file_path in input_files[1:]:
-                print(f"Appending file (skipping header): {file_path}")
                 with open(file_path, 'r', newline='', encoding='utf-8') as infile:
                     reader = csv.reader(infile, delimiter='\t')
                     
@@ -50,8 +57,11 @@ def merge_tsv_files(input_files, output_file):
                     next(reader, None) 
                     
                     # Write the remaining rows to the output
+                    rows = 0
                     for row in reader:
                         writer.writerow(row)
+                        rows += 1
+                instrumentation.add(files=1, lines=rows)
                         
         print(f"\nSuccessfully merged {len(input_files)} files into '{output_file}'.")
 
@@ -106,7 +116,12 @@ if __name__ == "__main__":
     #     help="One or more paths to the input TSV files to be merged."
     # )
 
-    input_files = collect_all_files_from_dir_as_list_of_path("/home/soham37/python/Parallel_v2/HIN-MNI")
+    parser.add_argument(
+        "input_dir",
+        nargs="?",
+        default=INPUT_DIR,
+        help=f"Folder whose translated_reviewed files are merged (default: {INPUT_DIR})"
+    )
     
     parser.add_argument(
         "-o", "--output", 
@@ -114,7 +129,11 @@ if __name__ == "__main__":
         help="Path for the final merged output file."
     )
     
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
+
+    input_files = collect_all_files_from_dir_as_list_of_path(args.input_dir)
     
-    merge_tsv_files(input_files, args.output)
+    with instrumentation.instrumented_run("merge_files", args), instrumentation.stage("merge", total=len(input_files)):
+        merge_tsv_files(input_files, args.output)
 
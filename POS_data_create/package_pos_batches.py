@@ -0,0 +1,164 @@
+# How to use:
+'''
+
+python3 package_pos_batches.py subset_edu_1000.tsv -o EDU/IITP --lang-pairs HIN-BAN HIN-MAI HIN-ODI HIN-SAT
+python3 package_pos_batches.py merged_edu.tsv -o EDU/all --chunk-size 30 - every column after the source is a lang pair
+
+Input: a merged TSV with a header, the source in the first column (or --source-col) and one
+column per lang pair, as written by find_translations.py or find_translations_directly_new.py.
+
+Writes, per lang pair:
+    OUT/LP/LP_empty.txt              - source_id, source of the rows without a translation
+    OUT/LP/LP_non_empty.txt          - source_id, source, translation_id, translation
+    OUT/LP/LP_non_empty_part_N.txt   - the translations only, --chunk-size lines per file, for the annotators
+and OUT/manifest.json with the source ids, translation ids and input line numbers of every chunk.
+
+'''
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import instrumentation
+
+# --- Configuration ---
+# Sentences per file sent to an annotator.
+CHUNK_SIZE = 30
+SOURCE_ID_PREFIX = "SRC"
+MANIFEST_NAME = "manifest.json"
+
+
+def chunk_name(lang_pair, number):
+    return f"{lang_pair}_non_empty_part_{number}.txt"
+
+
+def read_merged_tsv(tsv_path):
+    """
+    Read the merged TSV column-wise: (header, {column: [stripped cells]}).
+    Quoting is disabled like in tsv_reader; short rows are padded with empty cells.
+    """
+    with open(tsv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        lines = f.read().split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    if not lines:
+        return [], {}
+
+    header = [cell.strip() for cell in lines[0].rstrip('\r').split('\t')]
+    width = len(header)
+    # Split and strip every cell once, then transpose; every later step works on whole columns
+    rows = [(line.rstrip('\r').split('\t') + [''] * width)[:width] for line in lines[1:]]
+    columns = [[cell.strip() for cell in column] for column in zip(*rows)] if rows else [[] for _ in header]
+    return header, dict(zip(header, columns))
+
+
+def package_lang_pair(job):
+    """Write the empty, non-empty and chunk files of one lang pair; returns its manifest entry."""
+    lang_pair, out_dir, source_ids, sources, translations, chunk_size = job
+    lp_dir = os.path.join(out_dir, lang_pair)
+    os.makedirs(lp_dir, exist_ok=True)
+
+    # The mask is computed once; ids are the 1-based row number, like the source ids
+    non_empty = [i for i, text in enumerate(translations) if text]
+    empty = [i for i, text in enumerate(translations) if not text]
+    translation_ids = [f"{lang_pair}_{i + 1}" for i in non_empty]
+
+    with open(os.path.join(lp_dir, f"{lang_pair}_empty.txt"), 'w', encoding='utf-8') as f:
+        f.writelines(f"{source_ids[i]}\t{sources[i]}\n" for i in empty)
+    with open(os.path.join(lp_dir, f"{lang_pair}_non_empty.txt"), 'w', encoding='utf-8') as f:
+        f.writelines(f"{source_ids[i]}\t{sources[i]}\t{tid}\t{translations[i]}\n" for i, tid in zip(non_empty, translation_ids))
+
+    chunks = []
+    for start in range(0, len(non_empty), chunk_size):
+        rows = non_empty[start:start + chunk_size]
+        name = chunk_name(lang_pair, len(chunks) + 1)
+        with open(os.path.join(lp_dir, name), 'w', encoding='utf-8') as f:
+            f.writelines(translations[i] + "\n" for i in rows)
+        chunks.append({
+            "file": f"{lang_pair}/{name}",
+            "source_ids": [source_ids[i] for i in rows],
+            "translation_ids": translation_ids[start:start + chunk_size],
+            # Line numbers in the input TSV (the header is line 1), for line_index.fetch
+            "input_lines": [i + 2 for i in rows],
+        })
+    return lang_pair, {"non_empty": len(non_empty), "empty": len(empty), "chunks": chunks}
+
+
+def package(tsv_path, out_dir, lang_pairs=None, source_col=None, chunk_size=CHUNK_SIZE, workers=None):
+    """
+    Package a merged TSV into per-lang-pair annotation batches, one lang pair per worker process.
+
+    Returns:
+        dict: The manifest, also saved as OUT/manifest.json.
+    """
+    with instrumentation.stage("read_tsv", unit="lines") as st:
+        header, columns = read_merged_tsv(tsv_path)
+        st.add(files=1, lines=len(next(iter(columns.values()), [])), bytes=os.path.getsize(tsv_path))
+    if not header:
+        raise ValueError(f"'{tsv_path}' is empty")
+
+    source_col = source_col or header[0]
+    if source_col not in columns:
+        raise ValueError(f"No column '{source_col}' in '{tsv_path}' (columns: {', '.join(header)})")
+    lang_pairs = lang_pairs or [c for c in header if c != source_col]
+    missing = [lp for lp in lang_pairs if lp not in columns]
+    if missing:
+        raise ValueError(f"No column for {', '.join(missing)} in '{tsv_path}' (columns: {', '.join(header)})")
+
+    sources = columns[source_col]
+    source_ids = [f"{SOURCE_ID_PREFIX}_{i + 1}" for i in range(len(sources))]
+    print(f"Read {len(sources)} rows with {len(lang_pairs)} lang pair(s) from '{tsv_path}'")
+
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(lp, out_dir, source_ids, sources, columns[lp], chunk_size) for lp in lang_pairs]
+    manifest = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "input": os.path.abspath(tsv_path),
+        "source_column": source_col,
+        "chunk_size": chunk_size,
+        "rows": len(sources),
+        "lang_pairs": {}
+    }
+    with instrumentation.stage("write_chunks", total=len(jobs), unit="lang_pairs") as st, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        for lang_pair, entry in executor.map(package_lang_pair, jobs):
+            manifest["lang_pairs"][lang_pair] = entry
+            st.add(lang_pairs=1, lines=entry["non_empty"])
+            print(f"  {lang_pair}: {entry['non_empty']} translations in {len(entry['chunks'])} chunk(s), {entry['empty']} empty")
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    print(f"\nFiles created successfully in: {out_dir}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split a merged TSV into per-lang-pair POS annotation chunks with a manifest")
+    parser.add_argument("tsv", help="Merged TSV: source column and one column per lang pair")
+    parser.add_argument("-o", "--output", required=True, help="Folder to write the lang pair folders and the manifest to")
+    parser.add_argument("--lang-pairs", nargs="+", help="Lang pair columns to package (default: all except the source)")
+    parser.add_argument("--source-col", help="Source column (default: the first column)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Sentences per chunk file (default: {CHUNK_SIZE})")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.tsv):
+        print(f"Error: {args.tsv} is not a valid file")
+        return 1
+
+    with instrumentation.instrumented_run("package_pos_batches", args):
+        try:
+            package(args.tsv, args.output, args.lang_pairs, args.source_col, args.chunk_size, args.workers)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
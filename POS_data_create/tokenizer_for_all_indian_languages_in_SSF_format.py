@@ -11,8 +11,12 @@
 import re
 import argparse
 import os
+import sys
 from string import punctuation
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import instrumentation
+
 
 # the below code defines different kinds of regular expressions
 token_specification = [
@@ -205,34 +209,38 @@ def main():
         '--output', dest='out', help="enter the output file path")
     parser.add_argument(
         '--lang', dest='lang', help="enter the language code, 2 lettered ISO 639-1 language codes")
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
-    if os.path.isdir(args.inp) and not os.path.isdir(args.out):
-        os.mkdir(args.out)
-    lang_code = args.lang
-    if not os.path.isdir(args.inp):
-        if lang_code in ['hi', 'or', 'mn', 'as', 'bn', 'pa']:
-            lang = 0
-        elif lang_code in ['ur', 'ks']:
-            lang = 1
-        elif lang_code in ['en', 'gu', 'mr', 'ml', 'kn', 'te', 'ta']:
-            lang = 2
-        sentences = read_file_and_tokenize(args.inp, lang)
-        ssf_sentences = convert_raw_sentences_into_ssf_format(sentences)
-        write_list_to_file(args.out, ssf_sentences)
-    else:
-        for root, dirs, files in os.walk(args.inp):
-            for fl in files:
-                input_file_path = os.path.join(root, fl)
-                if lang_code in ['hi', 'or', 'mn', 'as', 'bn', 'pa']:
-                    lang = 0
-                elif lang_code in ['ur', 'ks']:
-                    lang = 1
-                elif lang_code in ['en', 'gu', 'mr', 'ml', 'kn', 'te', 'ta']:
-                    lang = 2
-                sentences = read_file_and_tokenize(input_file_path, lang)
-                ssf_sentences = convert_raw_sentences_into_ssf_format(sentences)
-                output_file_path = os.path.join(args.out, fl)
-                write_list_to_file(output_file_path, ssf_sentences)
+    with instrumentation.instrumented_run("tokenizer_ssf", args), instrumentation.stage("tokenize"):
+        if os.path.isdir(args.inp) and not os.path.isdir(args.out):
+            os.mkdir(args.out)
+        lang_code = args.lang
+        if not os.path.isdir(args.inp):
+            if lang_code in ['hi', 'or', 'mn', 'as', 'bn', 'pa']:
+                lang = 0
+            elif lang_code in ['ur', 'ks']:
+                lang = 1
+            elif lang_code in ['en', 'gu', 'mr', 'ml', 'kn', 'te', 'ta']:
+                lang = 2
+            sentences = read_file_and_tokenize(args.inp, lang)
+            ssf_sentences = convert_raw_sentences_into_ssf_format(sentences)
+            write_list_to_file(args.out, ssf_sentences)
+            instrumentation.add(files=1, lines=len(sentences))
+        else:
+            for root, dirs, files in os.walk(args.inp):
+                for fl in files:
+                    input_file_path = os.path.join(root, fl)
+                    if lang_code in ['hi', 'or', 'mn', 'as', 'bn', 'pa']:
+                        lang = 0
+                    elif lang_code in ['ur', 'ks']:
+                        lang = 1
+                    elif lang_code in ['en', 'gu', 'mr', 'ml', 'kn', 'te', 'ta']:
+                        lang = 2
+                    sentences = read_file_and_tokenize(input_file_path, lang)
+                    ssf_sentences = convert_raw_sentences_into_ssf_format(sentences)
+                    output_file_path = os.path.join(args.out, fl)
+                    write_list_to_file(output_file_path, ssf_sentences)
+                    instrumentation.add(files=1, lines=len(sentences))
 
 
 if __name__ == '__main__':
@@ -1,59 +1,45 @@
 #!/usr/bin/env python3
-import os
 import shutil
 import zipfile
 import argparse
 from pathlib import Path
 
+import instrumentation
+import folder_cleanup
+
+def unzip_delivery(zip_file):
+    """Extract a delivered zip next to it (into a folder of the same name) and delete the zip."""
+    zip_file = Path(zip_file)
+    extract_dir = zip_file.with_suffix('')  # Removes .zip extension
+    extract_dir.mkdir(exist_ok=True)
+    # print(zip_file)
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        zip_ref.extractall(extract_dir)
+        # extracted_files = zip_ref.namelist()  # List of files extracted
+        # print("Extracted files:")
+        # for file in extracted_files:
+        #     print(f"  - {zip_file.parent / file}")
+
+    zip_file.unlink()
+    return extract_dir
+
 def preprocess_new_folder(new_folder_path):
     """
     Preprocess the new_folder by:
     1. Unzipping all files in the parent folder
-    2. Deleting folders named "translation_domain_terms" wherever they exist
+    2. Deleting junk folders (folder_cleanup.JUNK_NAMES, e.g. "translation_domain_terms") wherever they exist
     3. Deleting empty folders (folders with no leaf files)
     """
     new_folder = Path(new_folder_path)
     
     # Step 1: Unzip all files
     for zip_file in new_folder.glob("*.zip"):
+        unzip_delivery(zip_file)
 
-        extract_dir = zip_file.with_suffix('')  # Removes .zip extension
-        extract_dir.mkdir(exist_ok=True)
-        # print(zip_file)
-        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-            # extracted_files = zip_ref.namelist()  # List of files extracted
-            # print("Extracted files:")
-            # for file in extracted_files:
-            #     print(f"  - {zip_file.parent / file}")
-    
-        zip_file.unlink()
-
-    # Step 2: Delete folders named "translation_domain_terms"
-    for folder in new_folder.rglob("translation_domain_terms"):
-        if folder.is_dir():
-            shutil.rmtree(folder)
-    
-    # Step 3: Delete empty folders
-    def has_files(directory):
-        for root, dirs, files in os.walk(directory):
-            if files:
-                return True
-        return False
-    
-    # Multiple passes to handle nested empty folders
-    while True:
-        removed_any = False
-        all_dirs = [d for d in new_folder.rglob("*") if d.is_dir()]
-        all_dirs.sort(key=lambda x: len(x.parts), reverse=True)
-        
-        for dir_path in all_dirs:
-            if dir_path.exists() and not has_files(dir_path):
-                shutil.rmtree(dir_path)
-                removed_any = True
-        
-        if not removed_any:
-            break
+    # Steps 2 and 3 in one bottom-up pass
+    cleanup = folder_cleanup.clean_tree(new_folder)
+    print(cleanup.summary())
+    return cleanup
 
 def find_actual_folders_in_old_parent(old_parent_path):
     """
@@ -77,7 +63,7 @@ def find_actual_folders_in_old_parent(old_parent_path):
                         if actual_folder.is_dir():
                             folder_name = actual_folder.name
                             actual_folders[folder_name] = actual_folder
-                            print(f"Found in old_parent: {folder_name} at {actual_folder}")
+                            instrumentation.add(folders=1)
     
     return actual_folders
 
@@ -103,7 +89,7 @@ def find_actual_folders_in_old_parent(old_parent_path):
                         if actual_folder.is_dir():
                             folder_name = actual_folder.name
                             actual_folders[folder_name] = actual_folder
-                            print(f"Found in old_parent: {folder_name} at {actual_folder}")
+                            instrumentation.add(folders=1)
     
     return actual_folders
 
@@ -124,10 +110,27 @@ def find_actual_folders_in_new_folder(new_folder_path):
         if actual_folder.is_dir():
             folder_name = actual_folder.name
             actual_folders[folder_name] = actual_folder
-            print(f"Found in new_folder: {folder_name} at {actual_folder}")
+            instrumentation.add(folders=1)
     
     return actual_folders
 
+def replace_folder(old_path, new_path):
+    """Replace the folder old_path in old_parent by the delivered new_path. Returns True if it was moved."""
+    try:
+        # Remove the existing folder in old_parent
+        if old_path.exists():
+            shutil.rmtree(old_path)
+            print(f"  Removed existing: {old_path}")
+        
+        # Move the folder from new_folder to old_parent location
+        shutil.move(str(new_path), str(old_path))
+        print(f"  Moved: {new_path} -> {old_path}")
+        return True
+        
+    except Exception as e:
+        print(f"  ERROR: Failed to move {new_path.name}: {e}")
+        return False
+
 def move_matching_folders(old_parent_path, new_folder_path, dry_run=True):
     """
     Match folders by name and move from new_folder to old_parent structure.
@@ -146,8 +149,10 @@ def move_matching_folders(old_parent_path, new_folder_path, dry_run=True):
     print(f"{'='*60}")
     
     # Find folders in both locations
-    old_folders = find_actual_folders_in_old_parent(old_parent_path)
-    new_folders = find_actual_folders_in_new_folder(new_folder_path)
+    with instrumentation.stage("scan_old_parent", unit="folders"):
+        old_folders = find_actual_folders_in_old_parent(old_parent_path)
+    with instrumentation.stage("scan_new_folder", unit="folders"):
+        new_folders = find_actual_folders_in_new_folder(new_folder_path)
     
     if not old_folders:
         print("No folders found in old_parent structure")
@@ -184,19 +189,8 @@ def move_matching_folders(old_parent_path, new_folder_path, dry_run=True):
         if dry_run:
             print("  [DRY RUN] Would remove existing folder and move new one")
         else:
-            try:
-                # Remove the existing folder in old_parent
-                if old_path.exists():
-                    shutil.rmtree(old_path)
-                    print(f"  Removed existing: {old_path}")
-                
-                # Move the folder from new_folder to old_parent location
-                shutil.move(str(new_path), str(old_path))
-                print(f"  Moved: {new_path} -> {old_path}")
+            if replace_folder(old_path, new_path):
                 moved_count += 1
-                
-            except Exception as e:
-                print(f"  ERROR: Failed to move {folder_name}: {e}")
     
     # Show remaining folders in new_folder
     remaining_folders = [name for name in new_folders if name not in matches]
@@ -258,9 +252,17 @@ Directory Structure:
         help='Skip confirmation prompts (use with caution)'
     )
     
+    instrumentation.add_arguments(parser)
+    
     # Parse arguments
     args = parser.parse_args()
-    
+
+    with instrumentation.instrumented_run("arrange_downloaded", args):
+        return run(args)
+
+
+def run(args):
+    """Preprocess and move the folders for the parsed command line arguments."""
     old_parent = args.old_parent_path.strip()
     new_folder = args.new_folder_path.strip()
     
@@ -284,7 +286,8 @@ Directory Structure:
     
     # Preprocess new_folder if requested
     if args.preprocess:
-        preprocess_new_folder(new_folder)
+        with instrumentation.stage("preprocess"):
+            preprocess_new_folder(new_folder)
         
         if not args.skip_confirmation:
             proceed = input("\nPreprocessing completed. Press Enter to continue or 'q' to quit: ").strip().lower()
@@ -312,7 +315,8 @@ Directory Structure:
     print(f"\n{'='*60}")
     print("RUNNING ACTUAL MOVE OPERATION")
     print("="*60)
-    move_matching_folders(old_parent, new_folder, dry_run=False)
+    with instrumentation.stage("move_folders"):
+        move_matching_folders(old_parent, new_folder, dry_run=False)
     print("\nOperation completed successfully!")
     
     return 0
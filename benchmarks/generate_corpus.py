@@ -0,0 +1,236 @@
+# How to use:
+'''
+
+python3 generate_corpus.py /tmp/coild_bench - default size (about 60 MB)
+python3 generate_corpus.py /tmp/coild_bench --lang-pairs 6 --lines 2000 --skew 1.2 --seed 7
+python3 generate_corpus.py /tmp/coild_bench --scale 0.1 - a tenth of the default size, for a quick check
+
+An existing folder is replaced only if it is empty or holds a corpus.json of an earlier run
+(--force replaces any folder).
+
+Writes, below the given folder:
+    Parallel_v2/LANG_PAIR/DOMAIN/SUB_DOMAIN/translation_text/{source_translated,source_reviewed,translated_reviewed}/*.txt
+    Domain_Wise/DOMAIN/LANG_PAIR/SUB_DOMAIN/translation_text/{source_translated,source_reviewed}/*.txt
+    raw_text/*.txt       - plain Hindi paragraphs for the SSF tokenizer
+    pos_sources.txt      - Hindi sources to look up with find_translations.py
+    corpus.json          - the parameters, so a benchmark result says what it ran on
+
+'''
+
+import os
+import json
+import random
+import shutil
+import argparse
+
+# --- Configuration ---
+# Target language of every lang pair and the first code point of its script block.
+# The source side is always Hindi (Devanagari).
+SCRIPTS = {
+    "HIN-BAN": 0x0980,   # Bengali
+    "HIN-ODI": 0x0B00,   # Odia
+    "HIN-SAT": 0x1C50,   # Ol Chiki
+    "HIN-GUJ": 0x0A80,   # Gujarati
+    "HIN-TAM": 0x0B80,   # Tamil
+    "HIN-TEL": 0x0C00,   # Telugu
+    "HIN-KAN": 0x0C80,   # Kannada
+    "HIN-MAL": 0x0D00,   # Malayalam
+    "HIN-PAN": 0x0A00,   # Gurmukhi
+    "HIN-MAR": 0x0900,   # Devanagari
+}
+DEVANAGARI = 0x0900
+# Letters used for words, as offsets into the script block; Ol Chiki is a smaller block.
+LETTERS = (0x05, 0x39)
+BLOCK_LETTERS = {0x1C50: (0x1A, 0x28)}
+DOMAINS = ["EDU", "HLT", "AGRI", "GOV", "JUD", "TOUR"]
+HEADER = "Source_Text\tTranslated_Text"
+REVIEWED_HEADER = "Source_Text\tReviewed_Text"
+
+# Defaults of the generated corpus.
+LANG_PAIRS = 4
+SUB_DOMAINS = 3
+FILES_PER_FOLDER = 4
+LINES_PER_FILE = 300
+# Lang pair i gets 1 / (i + 1) ** SKEW of the lines of the first one, like the real deliveries.
+SKEW = 1.0
+# Share of the sources that come from a pool shared by all lang pairs (so lookups find matches).
+SHARED_FRACTION = 0.3
+SHARED_POOL = 20000
+# Sentence lengths in words: lognormal, so there is a long tail above the 55-word filter.
+LENGTH_MU = 2.6
+LENGTH_SIGMA = 0.6
+MAX_LENGTH = 150
+
+
+class SentenceMaker:
+    """Random words in a script block, with a fixed vocabulary per script so word frequencies look natural."""
+
+    def __init__(self, rng, vocab_size=5000):
+        self.rng = rng
+        self.vocab_size = vocab_size
+        self.vocabs = {}
+
+    def vocab(self, base):
+        if base not in self.vocabs:
+            # Letters of the block (skipping the signs at its start), 2-8 letters per word
+            first, last = BLOCK_LETTERS.get(base, LETTERS)
+            letters = [chr(base + offset) for offset in range(first, last)]
+            self.vocabs[base] = [
+                "".join(self.rng.choice(letters) for _ in range(self.rng.randint(2, 8)))
+                for _ in range(self.vocab_size)
+            ]
+        return self.vocabs[base]
+
+    def length(self):
+        return max(1, min(MAX_LENGTH, int(self.rng.lognormvariate(LENGTH_MU, LENGTH_SIGMA))))
+
+    def sentence(self, base, n_words=None):
+        vocab = self.vocab(base)
+        words = self.rng.choices(vocab, k=n_words or self.length())
+        # Numbers and the danda show up in real text and matter to the tokenizer and checkers
+        if self.rng.random() < 0.1:
+            words.insert(self.rng.randrange(len(words) + 1), str(self.rng.randint(1, 2024)))
+        return " ".join(words) + (" ।" if base == DEVANAGARI else "")
+
+    def translation(self, base, source):
+        # Roughly the length of the source, like an aligned pair
+        n_words = max(1, int(len(source.split()) * self.rng.uniform(0.8, 1.25)))
+        return self.sentence(base, n_words)
+
+
+def write_tsv(path, header, pairs):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(header + "\n")
+        for src, tgt in pairs:
+            f.write(f"{src}\t{tgt}\n")
+
+
+def check_replaceable(root):
+    """Raise ValueError unless root is missing, an empty folder, or a corpus written by generate()."""
+    if not os.path.exists(root):
+        return
+    if not os.path.isdir(root):
+        raise ValueError(f"'{root}' is not a folder")
+    if os.listdir(root) and not os.path.isfile(os.path.join(root, "corpus.json")):
+        raise ValueError(f"'{root}' is not empty and was not written by generate_corpus.py (no corpus.json); "
+                         f"use --force to replace it anyway")
+
+
+def generate(root, lang_pairs=LANG_PAIRS, domains=None, sub_domains=SUB_DOMAINS, files_per_folder=FILES_PER_FOLDER,
+             lines_per_file=LINES_PER_FILE, skew=SKEW, seed=0, scale=1.0, force=False):
+    """
+    Generate the synthetic corpus below root. An existing root is removed first, but only if it is
+    empty or holds the corpus.json of an earlier run (any folder with force), otherwise ValueError.
+    The same arguments and seed always give the same bytes.
+
+    Returns:
+        dict: The parameters and the number of files, lines and bytes written.
+    """
+    if lang_pairs > len(SCRIPTS):
+        raise ValueError(f"At most {len(SCRIPTS)} lang pairs are supported")
+    if not force:
+        check_replaceable(root)
+    domains = domains or DOMAINS[:3]
+    rng = random.Random(seed)
+    maker = SentenceMaker(rng)
+
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    parallel_root = os.path.join(root, "Parallel_v2")
+    domain_wise_root = os.path.join(root, "Domain_Wise")
+    raw_root = os.path.join(root, "raw_text")
+
+    shared_pool = [maker.sentence(DEVANAGARI) for _ in range(int(SHARED_POOL * scale) or 1)]
+    totals = {"files": 0, "lines": 0}
+
+    for lp_index, lang_pair in enumerate(list(SCRIPTS)[:lang_pairs]):
+        target_base = SCRIPTS[lang_pair]
+        lp_lines = max(1, int(lines_per_file * scale / (lp_index + 1) ** skew))
+
+        for domain in domains:
+            for sub_index in range(sub_domains):
+                sub_domain = f"{domain}_SUB{sub_index + 1}"
+                for file_index in range(files_per_folder):
+                    # File sizes vary around the lang pair's mean
+                    n_lines = max(1, int(lp_lines * rng.uniform(0.5, 1.5)))
+                    pairs = []
+                    for _ in range(n_lines):
+                        src = rng.choice(shared_pool) if rng.random() < SHARED_FRACTION else maker.sentence(DEVANAGARI)
+                        pairs.append((src, maker.translation(target_base, src)))
+                    # A few edits by the reviewer
+                    reviewed = [(src, maker.translation(target_base, src) if rng.random() < 0.2 else tgt) for src, tgt in pairs]
+
+                    filename = f"{sub_domain}_{file_index + 1}.txt"
+                    for layout_root, parts in ((parallel_root, (lang_pair, domain)), (domain_wise_root, (domain, lang_pair))):
+                        text_dir = os.path.join(layout_root, *parts, sub_domain, "translation_text")
+                        for folder_type, header, rows in (("source_translated", HEADER, pairs),
+                                                          ("source_reviewed", REVIEWED_HEADER, reviewed)):
+                            os.makedirs(os.path.join(text_dir, folder_type), exist_ok=True)
+                            write_tsv(os.path.join(text_dir, folder_type, filename), header, rows)
+                            totals["files"] += 1
+                            totals["lines"] += len(rows)
+                        if layout_root == parallel_root:
+                            os.makedirs(os.path.join(text_dir, "translated_reviewed"), exist_ok=True)
+                            write_tsv(os.path.join(text_dir, "translated_reviewed", filename), REVIEWED_HEADER, reviewed)
+                            totals["files"] += 1
+                            totals["lines"] += len(reviewed)
+
+    # Plain paragraphs for the tokenizer
+    os.makedirs(raw_root, exist_ok=True)
+    for file_index in range(max(1, int(10 * scale))):
+        paragraphs = [" ".join(maker.sentence(DEVANAGARI) for _ in range(rng.randint(1, 6))) for _ in range(200)]
+        with open(os.path.join(raw_root, f"raw_{file_index + 1}.txt"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(paragraphs) + "\n")
+        totals["files"] += 1
+
+    # Sources to look up: half from the shared pool, half that are not in the corpus
+    lookups = rng.sample(shared_pool, min(len(shared_pool), 1000)) + [maker.sentence(DEVANAGARI) for _ in range(1000)]
+    with open(os.path.join(root, "pos_sources.txt"), 'w', encoding='utf-8') as f:
+        f.write("\n".join(lookups) + "\n")
+
+    total_bytes = sum(os.path.getsize(os.path.join(dirpath, name))
+                      for dirpath, _, filenames in os.walk(root) for name in filenames)
+    info = {
+        "lang_pairs": lang_pairs,
+        "domains": domains,
+        "sub_domains": sub_domains,
+        "files_per_folder": files_per_folder,
+        "lines_per_file": lines_per_file,
+        "skew": skew,
+        "seed": seed,
+        "scale": scale,
+        "files": totals["files"],
+        "lines": totals["lines"],
+        "bytes": total_bytes
+    }
+    with open(os.path.join(root, "corpus.json"), 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic corpus with the COIL-D folder layouts")
+    parser.add_argument("root", help="Folder to write the corpus to (an earlier corpus there is replaced)")
+    parser.add_argument("--lang-pairs", type=int, default=LANG_PAIRS, help=f"Number of lang pairs (default: {LANG_PAIRS}, at most {len(SCRIPTS)})")
+    parser.add_argument("--domains", nargs="+", default=DOMAINS[:3], help=f"Domains (default: {' '.join(DOMAINS[:3])})")
+    parser.add_argument("--sub-domains", type=int, default=SUB_DOMAINS, help=f"Sub-domains per domain (default: {SUB_DOMAINS})")
+    parser.add_argument("--files", type=int, default=FILES_PER_FOLDER, help=f"Files per folder (default: {FILES_PER_FOLDER})")
+    parser.add_argument("--lines", type=int, default=LINES_PER_FILE, help=f"Mean lines per file of the largest lang pair (default: {LINES_PER_FILE})")
+    parser.add_argument("--skew", type=float, default=SKEW, help=f"Size skew between lang pairs, 0 for equal sizes (default: {SKEW})")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the number of lines by this factor (default: 1.0)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--force", action="store_true", help="Replace root even if it is not empty and not an earlier corpus")
+    args = parser.parse_args()
+
+    try:
+        info = generate(args.root, args.lang_pairs, args.domains, args.sub_domains, args.files,
+                        args.lines, args.skew, args.seed, args.scale, force=args.force)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Wrote {info['files']} files, {info['lines']} lines, {info['bytes'] / (1024 * 1024):.1f} MB to {args.root}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,252 @@
+# How to use:
+'''
+
+python3 benchmarks/run_benchmarks.py run - generate the synthetic corpus (once) and time every script on it
+python3 benchmarks/run_benchmarks.py run --only filter_data combine_translated_files -n 5
+python3 benchmarks/run_benchmarks.py run --scale 0.1 - a small corpus, for a quick check
+python3 benchmarks/run_benchmarks.py run --compare benchmarks/results/20251001_101500_ab12cd3.json
+    - time and compare against an earlier result (e.g. of the previous commit)
+python3 benchmarks/run_benchmarks.py compare OLD.json NEW.json - compare two saved results
+
+'''
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+from generate_corpus import generate
+
+# --- Configuration ---
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+# Timed runs per benchmark; the median is compared.
+REPEATS = 3
+# A benchmark is reported as a regression when its median is this much slower.
+THRESHOLD = 0.10
+
+# Commands run from the repository folder. {corpus} is the corpus folder, {out} a fresh
+# output folder per run. All scripts take the instrumentation options, which give the stages.
+BENCHMARKS = {
+    "combine_translated_files": ["combine_translated_files.py", "{corpus}/Parallel_v2",
+                                 "-c", "{out}/stats.csv", "-cons", "{out}/consortium"],
+    "filter_data": ["Filtering/filter_data.py", "{corpus}/Domain_Wise", "{out}/filtered"],
+    "word_count_distribution": ["Filtering/word_count_distribution.py", "{corpus}/Domain_Wise",
+                                "-o", "{out}/word_count_distribution.csv"],
+    "find_translations": ["POS_data_create/find_translations.py", "{corpus}/pos_sources.txt",
+                          "{corpus}/Parallel_v2", "-o", "{out}/translations.tsv"],
+    "merge_files": ["POS_data_create/merge_files.py", "{corpus}/Parallel_v2/HIN-BAN", "-o", "{out}/merged.tsv"],
+    "tokenizer_ssf": ["POS_data_create/tokenizer_for_all_indian_languages_in_SSF_format.py",
+                      "--input", "{corpus}/raw_text", "--output", "{out}/ssf", "--lang", "hi"],
+}
+
+
+def git_info():
+    """Commit of the benchmarked code and whether it has uncommitted changes."""
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+def ensure_corpus(corpus_dir, scale, seed):
+    """Reuse the corpus if it was generated with the same scale and seed, otherwise generate it."""
+    info_path = os.path.join(corpus_dir, "corpus.json")
+    if os.path.exists(info_path):
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if info.get("scale") == scale and info.get("seed") == seed:
+            return info
+
+    print(f"Generating the synthetic corpus in {corpus_dir} (scale {scale}, seed {seed})...")
+    info = generate(corpus_dir, scale=scale, seed=seed)
+    print(f"  {info['files']} files, {info['lines']} lines, {info['bytes'] / (1024 * 1024):.1f} MB")
+    return info
+
+
+def last_run_record(log_path):
+    """Stage seconds and peak RSS of the last run in an instrumentation run log."""
+    stages, run = {}, None
+    if not os.path.exists(log_path):
+        return stages, run
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record["type"] == "stage":
+                stages[record["stage"]] = record["seconds"]
+            else:
+                run = record
+    return stages, run
+
+
+def time_benchmark(name, command, corpus_dir, work_dir, repeats=REPEATS, warmup=1):
+    """Run one benchmark warmup + repeats times in fresh output folders and summarise the timings."""
+    times, stage_times, peak_rss = [], {}, []
+    returncode = 0
+
+    for i in range(warmup + repeats):
+        out_dir = os.path.join(work_dir, name)
+        if os.path.exists(out_dir):
+            shutil.rmtree(out_dir)
+        os.makedirs(out_dir)
+        log_path = os.path.join(out_dir, "run_log.jsonl")
+        args = [arg.format(corpus=corpus_dir, out=out_dir) for arg in command]
+
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, *args, "--run-log", log_path, "--progress-interval", "0"],
+                                cwd=REPO_DIR, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+
+        if result.returncode != 0:
+            returncode = result.returncode
+            tail = (result.stdout + result.stderr).strip().splitlines()[-3:]
+            print(f"  {name} FAILED with exit code {result.returncode}")
+            for line in tail:
+                print(f"    {line}")
+            break
+        if i < warmup:
+            continue
+
+        times.append(elapsed)
+        stages, run = last_run_record(log_path)
+        for stage, seconds in stages.items():
+            stage_times.setdefault(stage, []).append(seconds)
+        if run and run.get("peak_rss_mb") is not None:
+            peak_rss.append(run["peak_rss_mb"])
+
+    if returncode != 0:
+        return {"status": "failed", "returncode": returncode}
+    return {
+        "status": "ok",
+        "runs": len(times),
+        "median": round(statistics.median(times), 4),
+        "min": round(min(times), 4),
+        "stdev": round(statistics.stdev(times), 4) if len(times) > 1 else 0.0,
+        "times": [round(t, 4) for t in times],
+        "stages": {stage: round(statistics.median(values), 4) for stage, values in stage_times.items()},
+        "peak_rss_mb": max(peak_rss) if peak_rss else None
+    }
+
+
+def compare(base, current, threshold=THRESHOLD):
+    """Print the median of every benchmark in both results; returns the names that got slower."""
+    regressions = []
+    print(f"\n{'Benchmark':<26} | {'Base (s)':>9} | {'Now (s)':>9} | {'Change':>8}")
+    print("-" * 62)
+    for name in sorted(current["benchmarks"]):
+        old = base["benchmarks"].get(name, {})
+        new = current["benchmarks"][name]
+        if old.get("status") != "ok" or new.get("status") != "ok":
+            old_text = f"{old['median']:.3f}" if old.get("status") == "ok" else old.get("status", "-")
+            new_text = f"{new['median']:.3f}" if new.get("status") == "ok" else new["status"]
+            print(f"{name:<26} | {old_text:>9} | {new_text:>9} | {'':>8}")
+            continue
+        change = new["median"] / old["median"] - 1 if old["median"] else 0.0
+        flag = ""
+        # Only flag changes larger than the noise of both runs
+        noise = max(old.get("stdev", 0), new.get("stdev", 0))
+        if change > threshold and new["median"] - old["median"] > 2 * noise:
+            flag = "  <-- slower"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<26} | {old['median']:>9.3f} | {new['median']:>9.3f} | {100 * change:>+7.1f}%{flag}")
+
+    if base.get("corpus") != current.get("corpus"):
+        print("\nWarning: the results were measured on different corpora.")
+    return regressions
+
+
+def load_result(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run(args):
+    names = args.only or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        print(f"Error: unknown benchmark(s): {', '.join(sorted(unknown))}")
+        return 1
+
+    try:
+        corpus = ensure_corpus(args.corpus, args.scale, args.seed)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    work_dir = os.path.join(args.corpus, "_runs")
+
+    result = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        **git_info(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": corpus,
+        "benchmarks": {}
+    }
+    for name in names:
+        print(f"Timing {name}...")
+        result["benchmarks"][name] = time_benchmark(name, BENCHMARKS[name], args.corpus, work_dir, args.repeats, args.warmup)
+        bench = result["benchmarks"][name]
+        if bench["status"] == "ok":
+            print(f"  median {bench['median']:.3f}s over {bench['runs']} run(s), peak RSS {bench['peak_rss_mb']} MB")
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    commit = (result["commit"] or "nogit")[:7] + ("-dirty" if result["dirty"] else "")
+    result_path = os.path.join(args.results_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults saved to {result_path}")
+
+    if args.compare:
+        regressions = compare(load_result(args.compare), result, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0 if all(b["status"] == "ok" for b in result["benchmarks"].values()) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the processing scripts on a synthetic COIL-D corpus")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and save the results")
+    run_parser.add_argument("--only", nargs="+", help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    run_parser.add_argument("-n", "--repeats", type=int, default=REPEATS, help=f"Timed runs per benchmark (default: {REPEATS})")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Untimed runs first, to warm the page cache (default: 1)")
+    run_parser.add_argument("--corpus", default=CORPUS_DIR, help=f"Corpus folder, generated if missing (default: {CORPUS_DIR})")
+    run_parser.add_argument("--scale", type=float, default=1.0, help="Size of the generated corpus (default: 1.0, about 60 MB)")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of the generated corpus (default: 0)")
+    run_parser.add_argument("--results-dir", default=RESULTS_DIR, help=f"Where to save the results (default: {RESULTS_DIR})")
+    run_parser.add_argument("--compare", help="Earlier result to compare with")
+    run_parser.add_argument("--threshold", type=float, default=THRESHOLD, help=f"Slowdown reported as a regression (default: {THRESHOLD})")
+    run_parser.add_argument("--fail-on-regression", action="store_true", help="Exit with 1 if a benchmark got slower")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two saved results")
+    compare_parser.add_argument("base", help="Earlier result")
+    compare_parser.add_argument("current", help="Later result")
+    compare_parser.add_argument("--threshold", type=float, default=THRESHOLD, help=f"Slowdown reported as a regression (default: {THRESHOLD})")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        return run(args)
+
+    regressions = compare(load_result(args.base), load_result(args.current), args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -6,71 +6,75 @@ python3 combine_translated_files.py /path/to/parent/folder - just get the stats
 python3 combine_translated_files.py /path/to/parent/folder -o combined_output.txt - write down the combined files as well
 python3 combine_translated_files.py /path/to/root -o output_directory -j stats.json -c stats.csv
 python3 combine_translated_files.py /path/to/root -cons /path/to/consortium/folder  -  Save consortium source_translated files only
+python3 combine_translated_files.py /path/to/iitp -t weekly.csv --counters iitp_counters.json  -  lines/words per institute, sub-domain and week as well (see throughput.py)
 
 '''
 
 import os
 import re
-import shutil
 import json
 import argparse
 import pandas as pd
-from pathlib import Path
 from collections import defaultdict
 
-def find_source_translated_dirs(parent_folder):
-    """Find all source_translated directories in the folder structure."""
+import fs_crawler
+import corpus_paths
+import consortium_export
+import instrumentation
+import folder_cleanup
+import stats_db
+import throughput
+
+# Header written by the translation tool. Headers only ever appear on the first line of a file.
+HEADER_RE = re.compile(r"Source_Text|Translated_Text|Reviewed_Text")
+
+def find_source_translated_dirs(parent_folder, scan_threads=0):
+    """Find all source_translated directories in the folder structure (scan_threads > 0 lists directories in parallel)."""
     source_translated_dirs = []
     
-    for root, dirs, files in os.walk(parent_folder):
+    for root, dirs, files in fs_crawler.walk(parent_folder, scan_threads):
         if os.path.basename(root) == "source_translated":
             source_translated_dirs.append(root)
     
+    if scan_threads:
+        source_translated_dirs.sort()
     return source_translated_dirs
 
 def delete_extra_folders(parent_folder):
     """Delete all folders except source_translated, source_reviewed and translated_reviewed directories in the parent folder"""
-    for root, dirs, files in os.walk(parent_folder):
-        if os.path.basename(root) == "translation_domain_terms":
-            shutil.rmtree(root)
+    # Bottom-up, so no folder is deleted while the walk is still inside it
+    return folder_cleanup.clean_tree(parent_folder, remove_empty=False)
 
-def find_translation_dirs(parent_folder):
+def find_translation_dirs(parent_folder, scan_threads=0):
     """Find all source_translated and source_reviewed directoris with their language pair and domain info"""
     translation_dirs = []
 
-    for root, dirs, files in os.walk(parent_folder):
+    for root, dirs, files in fs_crawler.walk(parent_folder, scan_threads):
         if os.path.basename(root) in ["source_translated", "source_reviewed"]:
             folder_type = os.path.basename(root)
 
-            # Try to identify language pair and domain from the path
-            path_parts = Path(root).parts
-            lang_pair = None
-            domain = None
-
-            # Look for language pairs (HIN-MAI, HIN-SIN, HIN-BAN, etc.)
-            for part in path_parts:
-                if part.startswith("HIN-") or "-" in part:  # Simple heuristic for language pairs
-                    lang_pair = part
-                    break
-            
-            # Look for domains (EDU, HLT, AGRI, etc.)
-            for part in path_parts:
-                if part in ["EDU", "HLT", "AGRI", "GOV", "JUD", "TOUR"]:
-                    domain = part
-                    break
+            # Language pair and domain from the folder layout (Parallel_v2 or Domain-wise)
+            info = corpus_paths.lookup(root, action="Counted as Unknown.")
             
             translation_dirs.append({
                 "path": root,
                 "type": folder_type,
-                "lang_pair": lang_pair,
-                "domain": domain
+                "lang_pair": info.lang_pair if info else None,
+                "domain": info.domain if info else None
             })
     
+    # The threaded crawl finds the directories in no fixed order
+    if scan_threads:
+        translation_dirs.sort(key=lambda d: d["path"])
     return translation_dirs
 
 
-def process_translation_files(directories):
-    """Process all txt files from the given directories and organize by language pair and domain."""
+def process_translation_files(directories, keep_text=True, file_counts=None):
+    """
+    Process all txt files from the given directories and organize by language pair and domain.
+    With keep_text=False only the counts are kept, not the combined text.
+    If file_counts is a list, the counts of every file are appended to it (for stats_db and throughput).
+    """
     stats = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: {"files": 0, "lines": 0, "words": 0, "combined_text": ""})))
     
     for dir_info in directories:
@@ -120,48 +124,27 @@ def process_translation_files(directories):
         #         except Exception as e:
         #             print(f"Error reading file {file_path}: {e}")
 
+        line_count = 0
+        word_count = 0
         for file in os.listdir(path):
             if file.endswith(".txt"):
                 file_path = os.path.join(path, file)
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        text = f.read()
-                        
-                        # Split into lines and filter headers
-                        lines = text.split('\n')
-                        filtered_lines = []
-                        
-                        for line in lines:
-                            # Check if line contains any header
-                            is_header = False
-                            header_found = None
-                            
-                            for header in ["Source_Text", "Translated_Text", "Reviewed_Text"]:
-                                if header in line:
-                                    is_header = True
-                                    header_found = header
-                                    break
-                            
-                            if is_header:
-                                # Only add if this header type hasn't been added yet
-                                if header_found not in headers_added:
-                                    filtered_lines.append(line)
-                                    headers_added.add(header_found)
-                            else:
-                                # Add non-header lines
-                                filtered_lines.append(line)
-                        
-                        # Join back and add to combined text
-                        filtered_text = '\n'.join(filtered_lines)
-                        combined_text += filtered_text + "\n"
-                        
+                    text, lines, words = read_translation_file(file_path, headers_added)
+                    st = os.stat(file_path)
+                    instrumentation.add(files=1, lines=lines, bytes=st.st_size)
+                    if file_counts is not None:
+                        file_counts.append({"path": file_path, "lines": lines, "words": words,
+                                            "bytes": st.st_size, "mtime": st.st_mtime})
+                    if keep_text:
+                        combined_text += text + "\n"
+                    line_count += lines
+                    word_count += words
                     file_count += 1
                 except Exception as e:
                     print(f"Error reading file {file_path}: {e}")
         
-        if combined_text:
-            line_count, word_count = count_lines_and_words(combined_text)
-            
+        if file_count:
             stats[lang_pair][domain][folder_type]["files"] += file_count
             stats[lang_pair][domain][folder_type]["lines"] += line_count
             stats[lang_pair][domain][folder_type]["words"] += word_count
@@ -187,29 +170,40 @@ def process_translation_files(directories):
     
 #     return combined_text, file_count
 
-def count_lines_and_words(text):
-     
-    """Count lines and words in the text, excluding lines that contain 'Translated_Text', 'Reviewed_Text', or 'Source_Text'."""
-    # Split text by newline characters to get all lines
-    lines = text.splitlines()
-
-    # Filter out lines containing the specified words and empty lines
-    filtered_lines = []
-    for line in lines:
-        line_stripped = line.strip()
-        if (line_stripped and 
-            "Translated_Text" not in line and 
-            "Reviewed_Text" not in line and 
-            "Source_Text" not in line):
-            filtered_lines.append(line)
+def read_translation_file(file_path, headers_added):
+    """
+    Read one translation file in a single pass.
 
-    line_count = len(filtered_lines)
+    The header is only looked for on the first line. It is kept in the combined text
+    the first time its type is seen in the directory and never counted. Lines are the
+    non-empty non-header lines, words are counted in the first tab-separated column.
 
+    Returns:
+        tuple: (text to add to the combined text, line count, word count)
+    """
+    pieces = []
+    line_count = 0
     word_count = 0
-    for line in lines:
-        word_count += len(line.split("\t")[0].split())
 
-    return line_count, word_count   
+    with open(file_path, 'r', encoding='utf-8') as f:
+        first_line = f.readline()
+        header = HEADER_RE.search(first_line)
+        if header:
+            # Only add if this header type hasn't been added yet
+            if header.group(0) not in headers_added:
+                pieces.append(first_line)
+                headers_added.add(header.group(0))
+        else:
+            # Not a header: rewind and count it like every other line
+            f.seek(0)
+
+        for line in f:
+            pieces.append(line)
+            if line.strip():
+                line_count += 1
+                word_count += len(line.split("\t", 1)[0].split())
+
+    return "".join(pieces), line_count, word_count
 
 
 # def count_lines_and_words(text):
@@ -369,24 +363,46 @@ def main():
     parser.add_argument("-j", "--json", help="Path to save statistics as JSON (optional)")
     parser.add_argument("-c", "--csv", help="Papython3 combine_translated_files.py /path/to/parent/folder -o combined_output.txtth to save statistics as CSV (optional)")
     parser.add_argument("-cons", "--consortium", help="Add combined source_translated data to a seperate path to be shared with the consortium")
+    parser.add_argument("-t", "--throughput", help="Path to save lines/words per --group-by as CSV (optional)")
+    parser.add_argument("--group-by", nargs="+", default=list(throughput.GROUP_BY),
+                        help=f"Dimensions of --throughput (default: {' '.join(throughput.GROUP_BY)}; from {', '.join(throughput.DIMENSIONS)})")
+    parser.add_argument("--counters", help="Path to save the throughput counters as JSON, for other cuts with throughput.py (optional)")
+    parser.add_argument("--institute", help="Institute of the files in --throughput and --counters (default: --db-label or the name of the folder)")
+    # With any of these, -cons streams the files into shards instead of writing one combined file
+    consortium_export.add_arguments(parser)
+    fs_crawler.add_arguments(parser)
+    stats_db.add_arguments(parser)
+    instrumentation.add_arguments(parser)
     
     args = parser.parse_args()
+
+    with instrumentation.instrumented_run("combine_translated_files", args):
+        run(args)
+
+
+def run(args):
+    """Run the analysis for the parsed command line arguments."""
     parent_folder = args.folder
     output_dir = args.output
     json_file = args.json
     csv_file = args.csv
     consortium_path = args.consortium
+    stream_consortium = consortium_path and consortium_export.sharding_requested(args)
+    if stream_consortium:
+        consortium_export.require_compression(args.compress)
 
     if not os.path.isdir(parent_folder):
         print(f"Error: {parent_folder} is not a valid directory")
         return
     
     print("Deleting the domain_translation_terms extra folders")
-    delete_extra_folders(parent_folder)
+    with instrumentation.stage("delete_extra_folders"):
+        delete_extra_folders(parent_folder)
 
 
     print(f"Searching for translation directories in {parent_folder}...")
-    translation_dirs = find_translation_dirs(parent_folder)
+    with instrumentation.stage("find_translation_dirs"):
+        translation_dirs = find_translation_dirs(parent_folder, args.scan_threads)
     
     if not translation_dirs:
         print("No translation directories found.")
@@ -395,22 +411,59 @@ def main():
     print(f"Found {len(translation_dirs)} translation directories.")
     
     # Process files and calculate statistics
-    stats = process_translation_files(translation_dirs)
+    count_throughput = args.throughput or args.counters
+    if count_throughput:
+        try:
+            throughput.validate_group_by(args.group_by)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+    file_counts = [] if args.db or count_throughput else None
+    with instrumentation.stage("process_files"):
+        stats = process_translation_files(translation_dirs, keep_text=bool(output_dir) or not stream_consortium,
+                                          file_counts=file_counts)
     
     # Display the statistics and collect the df
     df = display_stats(stats, csv_file)
     
-    # Save combined text files if output directory is specified
-    if output_dir:
-        save_combined_text(stats, output_dir)
-    
-    # Save statistics as JSON if specified
-    if json_file:
-        save_stats_json(stats, json_file)
-
-    # Save combined text for source_translated to consortium path if specified
-    if consortium_path:
-        save_consortium_files(stats, consortium_path)
+    with instrumentation.stage("save_outputs"):
+        # Save combined text files if output directory is specified
+        if output_dir:
+            save_combined_text(stats, output_dir)
+        
+        # Save statistics as JSON if specified
+        if json_file:
+            save_stats_json(stats, json_file)
+
+        # Save the counts and the per-file counts to the stats database if specified
+        if args.db:
+            rows = [(lang_pair, domain, folder_type, data["files"], data["lines"], data["words"])
+                    for lang_pair, domains in stats.items()
+                    for domain, types in domains.items()
+                    for folder_type, data in types.items()]
+            stats_db.record_run(args.db, "combine_translated_files", parent_folder, args.db_label,
+                                files=file_counts, translation_counts=rows)
+
+        # Roll the per-file counts up by institute, sub-domain, batch and week if specified
+        if count_throughput:
+            institute = args.institute or args.db_label or os.path.basename(os.path.normpath(os.path.abspath(parent_folder)))
+            counters = throughput.Throughput()
+            for f in file_counts:
+                counters.add_file(institute, f["path"], f["mtime"], f["lines"], f["words"])
+            if args.throughput:
+                rows = counters.rollup(args.group_by)
+                throughput.display(rows, args.group_by)
+                throughput.save_csv(rows, args.group_by, args.throughput)
+            if args.counters:
+                counters.save(args.counters)
+                print(f"Saved throughput counters to {args.counters}")
+
+        # Save combined text for source_translated to consortium path if specified
+        if stream_consortium:
+            consortium_export.export(consortium_export.group_files(translation_dirs), consortium_path,
+                                     source=os.path.abspath(parent_folder), **consortium_export.export_args(args))
+        elif consortium_path:
+            save_consortium_files(stats, consortium_path)
 
     # return df
 
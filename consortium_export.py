@@ -0,0 +1,331 @@
+# How to use:
+'''
+
+python3 consortium_export.py export /path/to/Parallel_v2 /path/to/consortium --shard-size 100M --compress zstd
+python3 consortium_export.py export /path/to/Parallel_v2 /path/to/consortium --shard-lines 500000 --compress gzip
+python3 consortium_export.py verify /path/to/consortium - check the shards against the checksums in the manifest
+
+Writes the source_translated lines of every lang pair and domain as
+    CONSORTIUM/LANG_PAIR/DOMAIN/source_translated_00001.txt[.gz|.zst]
+    CONSORTIUM/manifest.json - lines, bytes and SHA-256 of every shard
+
+The same export runs from combine_translated_files.py with -cons and --shard-size/--shard-lines/--compress.
+
+'''
+
+import os
+import sys
+import glob
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from tsv_reader import is_header
+import corpus_paths
+import fs_crawler
+import instrumentation
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# --- Configuration ---
+# Uncompressed size and line count at which a shard is closed (None: no limit).
+SHARD_SIZE = 100 * 1024 * 1024
+SHARD_LINES = None
+# Threads compressing and checksumming finished shards while the next ones are written.
+THREADS = 4
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Header written at the top of every shard if the input files have none.
+DEFAULT_HEADER = b"Source_Text\tTranslated_Text\n"
+FOLDER_TYPE = "source_translated"
+COPY_BUFFER = 1024 * 1024
+
+EXTENSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    """'100M' -> 104857600; plain numbers are bytes."""
+    text = str(text).strip().upper().rstrip("B")
+    if text and text[-1] in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[text[-1]])
+    return int(text)
+
+
+def require_compression(compress):
+    if compress == "zstd" and zstandard is None:
+        print("Error: zstandard is required for --compress zstd (pip install zstandard)", file=sys.stderr)
+        sys.exit(1)
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_BUFFER), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def finish_shard(part_path, final_path, compress):
+    """Compress a written shard (if asked) into its final name; returns (bytes, sha256) of the final file."""
+    if compress == "none":
+        os.replace(part_path, final_path)
+    else:
+        with open(part_path, 'rb') as src, open(final_path, 'wb') as dst:
+            if compress == "gzip":
+                # No file name or time in the gzip header, so the same shard always has the same checksum
+                with gzip.GzipFile(filename="", mode='wb', compresslevel=GZIP_LEVEL, fileobj=dst, mtime=0) as out:
+                    shutil.copyfileobj(src, out, COPY_BUFFER)
+            else:
+                zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(src, dst, read_size=COPY_BUFFER)
+        os.remove(part_path)
+    return os.path.getsize(final_path), sha256_file(final_path)
+
+
+class ShardWriter:
+    """
+    Writes the lines of one lang pair/domain into numbered shards, closing a shard when the next
+    line would pass max_bytes (uncompressed) or max_lines. Every shard starts with the header.
+    Finished shards are compressed and checksummed by the executor while writing goes on.
+    """
+
+    def __init__(self, out_dir, executor, compress="none", max_bytes=SHARD_SIZE, max_lines=SHARD_LINES, prefix=FOLDER_TYPE):
+        self.out_dir = out_dir
+        self.executor = executor
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self.prefix = prefix
+        self.header = None
+        self.shards = []
+        self.file = None
+
+    def _open(self):
+        number = len(self.shards) + 1
+        final_path = os.path.join(self.out_dir, f"{self.prefix}_{number:05d}.txt{EXTENSIONS[self.compress]}")
+        self.part_path = final_path + ".part"
+        self.final_path = final_path
+        self.file = open(self.part_path, 'wb', buffering=COPY_BUFFER)
+        header = self.header or DEFAULT_HEADER
+        self.file.write(header)
+        self.lines = 0
+        self.bytes = len(header)
+
+    def _close(self):
+        self.file.close()
+        self.file = None
+        future = self.executor.submit(finish_shard, self.part_path, self.final_path, self.compress)
+        self.shards.append({"path": self.final_path, "lines": self.lines, "raw_bytes": self.bytes, "future": future})
+
+    def write(self, line):
+        if self.file is not None and (
+                (self.max_bytes and self.bytes + len(line) > self.max_bytes)
+                or (self.max_lines and self.lines >= self.max_lines)):
+            self._close()
+        if self.file is None:
+            self._open()
+        self.file.write(line)
+        self.lines += 1
+        self.bytes += len(line)
+
+    def close(self):
+        """Close the last shard; returns the shard records, whose "future" gives (bytes, sha256)."""
+        if self.file is not None:
+            self._close()
+        return self.shards
+
+
+def stream_file(file_path, writer):
+    """Copy the non-empty lines of one file to the writer, without its header; returns the line count."""
+    lines = 0
+    with open(file_path, 'rb', buffering=COPY_BUFFER) as f:
+        first_line = f.readline()
+        if is_header(first_line.decode('utf-8-sig', errors='replace')):
+            if writer.header is None:
+                writer.header = first_line.removeprefix(b"\xef\xbb\xbf").rstrip(b"\r\n") + b"\n"
+        else:
+            f.seek(0)
+        for line in f:
+            if not line.strip():
+                continue
+            if not line.endswith(b"\n"):
+                line += b"\n"
+            writer.write(line)
+            lines += 1
+    return lines
+
+
+def group_files(translation_dirs):
+    """{(lang pair, domain): [file paths]} of the source_translated folders found by find_translation_dirs."""
+    groups = {}
+    for dir_info in translation_dirs:
+        if dir_info["type"] != FOLDER_TYPE:
+            continue
+        key = (dir_info["lang_pair"] or "Unknown", dir_info["domain"] or "Unknown")
+        files = sorted(f for f in os.listdir(dir_info["path"]) if f.endswith(".txt"))
+        groups.setdefault(key, []).extend(os.path.join(dir_info["path"], f) for f in files)
+    return groups
+
+
+def find_groups(parallel_root, scan_threads=0):
+    """group_files for a Parallel_v2 or Domain-wise tree."""
+    translation_dirs = []
+    for root, dirs, files in fs_crawler.walk(parallel_root, scan_threads):
+        if os.path.basename(root) != FOLDER_TYPE:
+            continue
+        info = corpus_paths.lookup(root)
+        if info is not None:
+            translation_dirs.append({"path": root, "type": FOLDER_TYPE, "lang_pair": info.lang_pair, "domain": info.domain})
+    translation_dirs.sort(key=lambda d: d["path"])
+    return group_files(translation_dirs)
+
+
+def export(groups, consortium_path, compress="none", max_bytes=SHARD_SIZE, max_lines=SHARD_LINES, threads=THREADS, source=None):
+    """
+    Stream the lines of every group into shards below consortium_path/LANG_PAIR/DOMAIN and
+    write manifest.json. Earlier shards of an exported group are removed first.
+
+    Returns:
+        dict: The manifest.
+    """
+    require_compression(compress)
+    manifest = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        "compression": compress,
+        "shard_size": max_bytes,
+        "shard_lines": max_lines,
+        "shards": []
+    }
+
+    with ThreadPoolExecutor(max_workers=threads) as executor, \
+            instrumentation.stage("export_consortium", total=sum(len(f) for f in groups.values())) as st:
+        for (lang_pair, domain), files in sorted(groups.items()):
+            out_dir = os.path.join(consortium_path, lang_pair, domain)
+            os.makedirs(out_dir, exist_ok=True)
+            for old in glob.glob(os.path.join(out_dir, f"{FOLDER_TYPE}_[0-9]*.txt*")):
+                os.remove(old)
+
+            writer = ShardWriter(out_dir, executor, compress, max_bytes, max_lines)
+            group_lines = 0
+            for file_path in files:
+                try:
+                    lines = stream_file(file_path, writer)
+                except Exception as e:
+                    print(f"Error reading file {file_path}: {e}")
+                    continue
+                group_lines += lines
+                st.add(files=1, lines=lines, bytes=os.path.getsize(file_path))
+
+            shards = writer.close()
+            for shard in shards:
+                manifest["shards"].append({
+                    "path": os.path.relpath(shard["path"], consortium_path),
+                    "lang_pair": lang_pair,
+                    "domain": domain,
+                    "files": len(files),
+                    "lines": shard["lines"],
+                    "raw_bytes": shard["raw_bytes"],
+                    "future": shard["future"]
+                })
+            print(f"Saved: {os.path.join(out_dir, FOLDER_TYPE)}_*  - {len(files)} files, {group_lines} lines in {len(shards)} shard(s)")
+
+        # Compression of the last shards overlaps with writing the next groups; wait for it here
+        for shard in manifest["shards"]:
+            shard["bytes"], shard["sha256"] = shard.pop("future").result()
+
+    manifest["lines"] = sum(s["lines"] for s in manifest["shards"])
+    manifest["raw_bytes"] = sum(s["raw_bytes"] for s in manifest["shards"])
+    manifest["bytes"] = sum(s["bytes"] for s in manifest["shards"])
+    with open(os.path.join(consortium_path, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    ratio = manifest["bytes"] / manifest["raw_bytes"] if manifest["raw_bytes"] else 1.0
+    print(f"\nConsortium export saved to: {consortium_path}")
+    print(f"  {len(manifest['shards'])} shard(s), {manifest['lines']} lines, "
+          f"{manifest['bytes'] / (1024 * 1024):.1f} MB ({100 * ratio:.0f}% of {manifest['raw_bytes'] / (1024 * 1024):.1f} MB)")
+    return manifest
+
+
+def verify(consortium_path):
+    """Check every shard in the manifest for its size and SHA-256; returns the number of bad shards."""
+    with open(os.path.join(consortium_path, "manifest.json"), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    bad = 0
+    for shard in manifest["shards"]:
+        path = os.path.join(consortium_path, shard["path"])
+        if not os.path.exists(path):
+            print(f"Missing: {shard['path']}")
+            bad += 1
+        elif os.path.getsize(path) != shard["bytes"] or sha256_file(path) != shard["sha256"]:
+            print(f"Checksum mismatch: {shard['path']}")
+            bad += 1
+    print(f"{len(manifest['shards']) - bad} of {len(manifest['shards'])} shard(s) OK")
+    return bad
+
+
+def add_arguments(parser):
+    """Add the --shard-size, --shard-lines, --compress and --compress-threads options to an argparse parser."""
+    parser.add_argument("--shard-size", type=parse_size, default=None,
+                        help=f"Close a shard at this uncompressed size, e.g. 100M or 1G (default with --shard-lines/--compress: {SHARD_SIZE // (1024 * 1024)}M)")
+    parser.add_argument("--shard-lines", type=int, default=SHARD_LINES, help="Close a shard after this many lines (default: no limit)")
+    parser.add_argument("--compress", choices=list(EXTENSIONS), default=None, help="Compress the shards (default: none)")
+    parser.add_argument("--compress-threads", type=int, default=THREADS, help=f"Threads compressing finished shards (default: {THREADS})")
+    return parser
+
+
+def sharding_requested(args):
+    """True if any of the options of add_arguments was given."""
+    return args.shard_size is not None or args.shard_lines is not None or args.compress is not None
+
+
+def export_args(args):
+    """The export() keyword arguments of the parsed add_arguments options."""
+    return {
+        "compress": args.compress or "none",
+        "max_bytes": SHARD_SIZE if args.shard_size is None else args.shard_size,
+        "max_lines": args.shard_lines,
+        "threads": args.compress_threads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the source_translated text for the consortium as size-capped, compressed shards")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write the shards and the manifest")
+    export_parser.add_argument("source", help="Parallel_v2 or Domain-wise arranged folder")
+    export_parser.add_argument("consortium", help="Folder to write the shards to")
+    add_arguments(export_parser)
+    fs_crawler.add_arguments(export_parser)
+    instrumentation.add_arguments(export_parser)
+
+    verify_parser = subparsers.add_parser("verify", help="Check the shards against the manifest")
+    verify_parser.add_argument("consortium", help="Folder with manifest.json")
+
+    args = parser.parse_args()
+    if args.command == "verify":
+        return 1 if verify(args.consortium) else 0
+
+    if not os.path.isdir(args.source):
+        print(f"Error: {args.source} is not a valid directory")
+        return 1
+    require_compression(args.compress)
+
+    with instrumentation.instrumented_run("consortium_export", args):
+        with instrumentation.stage("find_groups"):
+            groups = find_groups(args.source, args.scan_threads)
+        export(groups, args.consortium, source=os.path.abspath(args.source), **export_args(args))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
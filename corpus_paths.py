@@ -0,0 +1,209 @@
+# How to use:
+'''
+
+In a script:
+
+    import corpus_paths
+
+    for root, dirs, files in os.walk(target_dir):
+        info = corpus_paths.lookup(root)          # None (and one warning) if the folder does not fit a layout
+        if info is None:
+            continue
+        info.lang_pair, info.domain, info.sub_domain, info.folder_type, info.layout
+
+    info = corpus_paths.resolve_dir(root)         # the same, but raises MalformedPath
+    info = corpus_paths.resolve_file(file_path)   # metadata of the folder of a file
+    info = corpus_paths.lookup(root, layout='Domain-wise')   # only accept one layout
+
+From the command line, list the folders of a tree that do not fit either layout:
+
+python3 corpus_paths.py /path/to/Parallel_v2
+python3 corpus_paths.py /path/to/Domain_Wise --layout Domain-wise
+
+Older deliveries have no sub-domain and translation_text folders (LANG_PAIR/DOMAIN/source_translated);
+they fit the 'Flat' layout, with the domain as the sub-domain.
+
+'''
+
+import os
+import re
+import argparse
+from functools import lru_cache
+from collections import Counter
+from typing import NamedTuple
+
+import fs_crawler
+
+# --- Configuration ---
+# The folder layouts, as the last folders of the path of a translation text folder.
+# {field} is a metadata field; any other folder name has to be there as it is.
+LAYOUTS = {
+    'Parallel_v2': '{lang_pair}/{domain}/{sub_domain}/translation_text/{folder_type}',
+    'Domain-wise': '{domain}/{lang_pair}/{sub_domain}/translation_text/{folder_type}',
+    'Flat': '{lang_pair}/{domain}/{folder_type}',
+}
+# Allowed values of a field; fields that are not here take any folder name.
+# A lang pair is names joined by '-' (HIN-BAN, HIN-MNI_BENG, EN-HI), which tells it apart from a domain.
+FIELD_PATTERNS = {
+    'lang_pair': re.compile(r'^[^\s-]+(?:-[^\s-]+)+$'),
+}
+# Folders whose metadata is kept; every file of a folder asks for the same entry.
+CACHE_SIZE = 65536
+
+FIELDS = ('lang_pair', 'domain', 'sub_domain', 'folder_type')
+# Fields a layout may leave out; a missing sub_domain is the domain.
+OPTIONAL_FIELDS = ('sub_domain',)
+FIELD_RE = re.compile(r'^\{(\w+)\}$')
+
+
+class PathInfo(NamedTuple):
+    lang_pair: str
+    domain: str
+    sub_domain: str
+    folder_type: str
+    layout: str
+
+
+class MalformedPath(ValueError):
+    """A folder path that does not fit any of the layouts."""
+
+
+def is_lang_pair(name):
+    """True for a lang pair folder name such as 'HIN-ODI'."""
+    return bool(FIELD_PATTERNS['lang_pair'].match(name))
+
+
+@lru_cache(maxsize=None)
+def compile_schema(schema):
+    """
+    Split a layout schema into (field or None, folder name) per folder.
+    Every field of PathInfo has to appear exactly once (the OPTIONAL_FIELDS at most once).
+    """
+    parts = []
+    for part in schema.strip('/').split('/'):
+        match = FIELD_RE.match(part)
+        parts.append((match.group(1), None) if match else (None, part))
+    fields = [field for field, _ in parts if field]
+    required = [f for f in FIELDS if f not in OPTIONAL_FIELDS]
+    if len(fields) != len(set(fields)) or not set(required) <= set(fields) <= set(FIELDS):
+        raise ValueError(f"Layout '{schema}' must have each of {', '.join('{' + f + '}' for f in required)} once "
+                         f"(and may have {', '.join('{' + f + '}' for f in OPTIONAL_FIELDS)})")
+    return tuple(parts)
+
+
+def _layouts(layout):
+    """The (name, schema) pairs to try: all of LAYOUTS, one name, or a schema string."""
+    if layout is None:
+        return tuple(LAYOUTS.items())
+    if layout in LAYOUTS:
+        return ((layout, LAYOUTS[layout]),)
+    return ((layout, layout),)
+
+
+def _match(parts, schema):
+    """The field values if the last folders of parts fit the schema, otherwise the reason they do not."""
+    compiled = compile_schema(schema)
+    if len(parts) < len(compiled):
+        return None, f"fewer than {len(compiled)} folders"
+    values = {}
+    for (field, literal), part in zip(compiled, parts[-len(compiled):]):
+        if field is None:
+            if part != literal:
+                return None, f"'{part}' where '{literal}' was expected"
+        elif field in FIELD_PATTERNS and not FIELD_PATTERNS[field].match(part):
+            return None, f"'{part}' is not a valid {field}"
+        else:
+            values[field] = part
+    values.setdefault('sub_domain', values['domain'])
+    return values, None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _resolve(dirpath, layouts):
+    parts = os.path.normpath(dirpath).split(os.sep)
+    reasons = []
+    for name, schema in layouts:
+        values, reason = _match(parts, schema)
+        if values is not None:
+            return PathInfo(layout=name, **values), None
+        reasons.append(f"{name}: {reason}")
+    return None, "; ".join(reasons)
+
+
+def resolve_dir(dirpath, layout=None):
+    """
+    Metadata of a translation text folder, read from the last folders of its path, so it works
+    for absolute paths and paths relative to any root. The result is cached per folder.
+
+    Args:
+        dirpath (str): Path of the folder, e.g. '.../HIN-BAN/EDU/EDU_NCERT/translation_text/source_reviewed'.
+        layout (str): A name in LAYOUTS or a schema string; None tries every layout in LAYOUTS.
+
+    Raises:
+        MalformedPath: If the path fits none of the layouts.
+    """
+    info, reason = _resolve(dirpath, _layouts(layout))
+    if info is None:
+        raise MalformedPath(f"Could not parse metadata from path: '{dirpath}' ({reason})")
+    return info
+
+
+def resolve_file(file_path, layout=None):
+    """Metadata of the folder a file is in; see resolve_dir."""
+    return resolve_dir(os.path.dirname(file_path), layout)
+
+
+_warned = set()
+
+
+def lookup(dirpath, layout=None, action="Skipping folder."):
+    """
+    resolve_dir, but returns None for a malformed path and prints a warning for it,
+    once per folder, ending with `action`.
+    """
+    try:
+        return resolve_dir(dirpath, layout)
+    except MalformedPath as e:
+        if dirpath not in _warned:
+            _warned.add(dirpath)
+            print(f"Warning: {e}. {action}".rstrip())
+        return None
+
+
+def cache_info():
+    """Hits and misses of the per-folder cache."""
+    return _resolve.cache_info()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the translation text folders of a tree fit a folder layout")
+    parser.add_argument("root", help="Parallel_v2 or Domain-wise arranged folder")
+    parser.add_argument("--layout", help=f"Only accept this layout: one of {', '.join(LAYOUTS)} or a schema string (default: any)")
+    parser.add_argument("--types", nargs="+", default=['source_translated', 'source_reviewed', 'translated_reviewed'],
+                        help="Folder names that hold translation text (default: source_translated source_reviewed translated_reviewed)")
+    fs_crawler.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Error: {args.root} is not a valid directory")
+        return 1
+
+    layouts = Counter()
+    malformed = 0
+    for root, dirs, files in fs_crawler.walk(args.root, args.scan_threads):
+        if os.path.basename(root) not in args.types:
+            continue
+        info = lookup(root, args.layout, action="")
+        if info is None:
+            malformed += 1
+        else:
+            layouts[info.layout, info.lang_pair] += 1
+
+    for (layout, lang_pair), count in sorted(layouts.items()):
+        print(f"{layout:<12} {lang_pair:<8} {count} folder(s)")
+    print(f"{sum(layouts.values())} folder(s) fit a layout, {malformed} malformed")
+    return 1 if malformed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
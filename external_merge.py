@@ -0,0 +1,117 @@
+# How to use:
+'''
+
+In a script, instead of a {source: target} dict that would not fit in memory:
+
+    from external_merge import SortedRuns, merge_by_key
+
+    runs = {lp: SortedRuns(tmp_dir) for lp in lang_pairs}
+    runs["HIN-BAN"][source] = target          # like a dict: the last value of a key wins
+    ...
+    for source, targets in merge_by_key(runs):  # every source once, in sorted order
+        targets                               # {lp: target} of the lang pairs that have it
+    for r in runs.values():
+        r.close()                             # removes the temporary run files
+
+'''
+
+import os
+import heapq
+import shutil
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+# --- Configuration ---
+# Distinct keys held in memory per SortedRuns before they are sorted and written to a run file.
+RUN_SIZE = 1_000_000
+BUFFER_SIZE = 1024 * 1024
+
+
+class SortedRuns:
+    """
+    A write-only {key: value} mapping of strings (no tabs or newlines in keys) that spills to
+    sorted run files every run_size distinct keys, so memory does not grow with the input.
+    Iterating it gives the (key, value) pairs sorted by key, once per key, with the value added last.
+    """
+
+    def __init__(self, tmp_dir=None, run_size=RUN_SIZE):
+        self.tmp_dir = tmp_dir
+        self.run_size = run_size
+        self.buffer = {}
+        self.paths = []
+        self.added = 0
+        self.run_dir = None
+
+    def __setitem__(self, key, value):
+        self.buffer[key] = value
+        self.added += 1
+        if len(self.buffer) >= self.run_size:
+            self.flush()
+
+    def __len__(self):
+        """Number of pairs added, duplicates included (the distinct count is only known when merging)."""
+        return self.added
+
+    def flush(self):
+        """Write the buffered pairs as a sorted run file."""
+        if not self.buffer:
+            return
+        if self.run_dir is None:
+            self.run_dir = tempfile.mkdtemp(prefix="runs_", dir=self.tmp_dir)
+        path = os.path.join(self.run_dir, f"run_{len(self.paths):05d}.tsv")
+        # newline='\n' on both sides, as in tsv_reader: a '\r' inside a value must not become a line break
+        with open(path, 'w', encoding='utf-8', newline='\n', buffering=BUFFER_SIZE) as f:
+            f.writelines(f"{key}\t{value}\n" for key, value in sorted(self.buffer.items()))
+        self.paths.append(path)
+        self.buffer = {}
+
+    def __iter__(self):
+        if not self.paths:
+            # Everything fit in one run: no need to touch the disk
+            yield from sorted(self.buffer.items())
+            return
+        self.flush()
+        # (key, -run number): of equal keys, the one of the latest run comes first and wins
+        merged = heapq.merge(*(_read_run(path, -number) for number, path in enumerate(self.paths)))
+        last = None
+        for key, _, value in merged:
+            if key != last:
+                last = key
+                yield key, value
+
+    def close(self):
+        self.buffer = {}
+        if self.run_dir is not None:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            self.run_dir = None
+            self.paths = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_run(path, order):
+    with open(path, 'r', encoding='utf-8', newline='\n', buffering=BUFFER_SIZE) as f:
+        for line in f:
+            key, _, value = line.rstrip('\n').partition('\t')
+            yield key, order, value
+
+
+def _tag(stream, name):
+    for key, value in stream:
+        yield key, name, value
+
+
+def merge_by_key(streams):
+    """
+    k-way heap merge of sorted (key, value) streams with distinct keys per stream, such as
+    SortedRuns. Yields (key, {stream name: value}) for every key, in sorted order; only one
+    pair per stream is held in memory.
+    """
+    merged = heapq.merge(*(_tag(stream, name) for name, stream in streams.items()))
+    for key, group in groupby(merged, key=itemgetter(0)):
+        yield key, {name: value for _, name, value in group}
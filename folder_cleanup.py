@@ -0,0 +1,164 @@
+# How to use:
+'''
+
+In a script:
+
+    import folder_cleanup
+
+    cleanup = folder_cleanup.clean_tree(new_folder)                           # junk and empty folders
+    cleanup = folder_cleanup.clean_tree(parent_folder, remove_empty=False)    # only the junk folders
+    cleanup = folder_cleanup.clean_tree(new_folder, dry_run=True)             # nothing is deleted
+    cleanup.file_counts[path]   # files left under every folder that is kept
+
+From the command line:
+
+python3 folder_cleanup.py /path/to/new_folder --dry-run - list what would be removed
+python3 folder_cleanup.py /path/to/new_folder --counts 2 - remove, and print the files per folder two levels deep
+python3 folder_cleanup.py /path/to/Parallel_v2 --keep-empty --junk translation_domain_terms
+
+One bottom-up walk: every folder is visited after everything below it, so its file count is the sum of
+its own files and the counts of its subfolders, and a folder is deleted only after the walk is done
+with it. A junk folder is deleted with everything in it; a folder with no files left under it is deleted
+when its (already removed) subfolders are gone. The folder given is never removed.
+
+'''
+
+import os
+import shutil
+import argparse
+
+import instrumentation
+
+# --- Configuration ---
+# Folders removed with their contents wherever they are (__MACOSX holds the ._* copies macOS adds to zips).
+JUNK_NAMES = ("translation_domain_terms", "__MACOSX")
+
+
+class Cleanup:
+    """What one clean_tree pass removed (or would remove) and the files left per folder."""
+
+    def __init__(self, top, dry_run):
+        self.top = top
+        self.dry_run = dry_run
+        self.removed = {}       # path -> "junk" or "empty"
+        self.file_counts = {}   # path -> files under it, for the folders that are kept
+        self.failed = []
+
+    @property
+    def files(self):
+        return self.file_counts.get(self.top, 0)
+
+    def count(self, reason):
+        return sum(1 for r in self.removed.values() if r == reason)
+
+    def top_level_removed(self):
+        """The removed folders that are not inside another removed folder, sorted."""
+        return [(path, reason) for path, reason in sorted(self.removed.items())
+                if os.path.dirname(path) not in self.removed]
+
+    def summary(self):
+        verb = "Would remove" if self.dry_run else "Removed"
+        line = f"{verb} {self.count('junk')} junk and {self.count('empty')} empty folders, {self.files} files left"
+        if self.failed:
+            line += f", {len(self.failed)} could not be removed"
+        return line
+
+
+def clean_tree(top, junk_names=JUNK_NAMES, remove_empty=True, dry_run=False):
+    """
+    Remove the junk-named folders and (with remove_empty) the folders without files under top,
+    in one os.walk(topdown=False) pass, counting the files left under every folder on the way up.
+
+    Returns:
+        Cleanup: the removed folders and the file counts
+    """
+    top = os.path.normpath(top)
+    cleanup = Cleanup(top, dry_run)
+    junk_names = set(junk_names)
+
+    def on_error(error):
+        print(f"Warning: Cannot list {error.filename}: {error.strerror}")
+        # Keep the folder and its parents
+        cleanup.file_counts[error.filename] = 1
+
+    for root, dirs, files in os.walk(top, topdown=False, onerror=on_error):
+        instrumentation.add(dirs=1)
+        parts = os.path.relpath(root, top).split(os.sep) if root != top else []
+        # Inside a junk folder: removed with it below
+        if any(part in junk_names for part in parts[:-1]):
+            continue
+        if parts and parts[-1] in junk_names:
+            remove(cleanup, root, "junk")
+            continue
+
+        count = len(files)
+        for name in dirs:
+            path = os.path.join(root, name)
+            if path in cleanup.file_counts:
+                count += cleanup.file_counts[path]
+            elif path not in cleanup.removed and os.path.islink(path):
+                # Symlinked folders are not walked; keep them, and so this folder
+                count += 1
+        cleanup.file_counts[root] = count
+
+        if remove_empty and count == 0 and root != top:
+            del cleanup.file_counts[root]
+            remove(cleanup, root, "empty")
+    return cleanup
+
+
+def remove(cleanup, path, reason):
+    """Delete one folder the walk is done with; a failed delete keeps it (and its parents)."""
+    if not cleanup.dry_run:
+        try:
+            if reason == "junk":
+                shutil.rmtree(path)
+            else:
+                # The subfolders are already gone, so this only succeeds on a really empty folder
+                os.rmdir(path)
+        except OSError as e:
+            print(f"Warning: Could not remove {path}: {e}")
+            cleanup.failed.append(path)
+            cleanup.file_counts[path] = 1
+            return
+    cleanup.removed[path] = reason
+    instrumentation.add(removed=1)
+
+
+def print_cleanup(cleanup, depth=0):
+    prefix = "  [DRY RUN] Would remove" if cleanup.dry_run else "  Removed"
+    for path, reason in cleanup.top_level_removed():
+        print(f"{prefix} {reason} folder: {os.path.relpath(path, cleanup.top)}")
+    if depth:
+        print(f"\n{'Files':<10} | Folder")
+        print("-" * 60)
+        for path, count in sorted(cleanup.file_counts.items()):
+            rel = os.path.relpath(path, cleanup.top)
+            if rel == '.' or rel.count(os.sep) < depth:
+                print(f"{count:<10} | {rel}")
+    print(f"\n{cleanup.summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove junk-named and empty folders in one bottom-up pass")
+    parser.add_argument("folder", help="Folder to clean (it is never removed itself)")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Only list what would be removed")
+    parser.add_argument("--keep-empty", action="store_true", help="Remove only the junk folders")
+    parser.add_argument("--junk", action="append", help=f"Junk folder name (repeatable; default: {' '.join(JUNK_NAMES)})")
+    parser.add_argument("--counts", type=int, default=0, metavar="DEPTH", help="Print the files left per folder down to this depth")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        print(f"Error: The directory '{args.folder}' does not exist.")
+        return 1
+
+    with instrumentation.instrumented_run("folder_cleanup", args):
+        with instrumentation.stage("clean_tree", unit="dirs"):
+            cleanup = clean_tree(args.folder, args.junk or JUNK_NAMES, not args.keep_empty, args.dry_run)
+        print_cleanup(cleanup, args.counts)
+    return 1 if cleanup.failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,252 @@
+# How to use:
+'''
+
+In a script's main():
+
+    import instrumentation
+
+    parser = argparse.ArgumentParser(...)
+    instrumentation.add_arguments(parser)          # adds --profile, --profile-out, --run-log, --progress-interval
+    args = parser.parse_args()
+
+    with instrumentation.instrumented_run("filter_data", args):
+        ...
+
+Anywhere below it (library functions included):
+
+    with instrumentation.stage("filter_files", total=len(files)) as st:
+        for file_path in files:
+            ...
+            st.add(files=1, lines=n_lines, bytes=n_bytes)   # prints a progress line at most every few seconds
+
+or, from a function that does not know about the stage it runs in:
+
+    instrumentation.add(files=1, lines=n_lines)             # counts towards the innermost running stage
+
+Every finished stage and run is appended to the JSONL run log (~/.cache/coild/run_log.jsonl by default).
+
+'''
+
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import pstats
+import cProfile
+from datetime import datetime
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- Configuration ---
+# Default run log, one JSON record per line. It is kept out of the working folder, so runs from
+# the repo or the corpus folders do not leave copies of it behind.
+RUN_LOG = os.environ.get("COILD_RUN_LOG", os.path.join(os.path.expanduser("~"), ".cache", "coild", "run_log.jsonl"))
+# Minimum number of seconds between two progress lines of a stage.
+PROGRESS_INTERVAL = 5.0
+# Number of functions shown from the profile.
+PROFILE_TOP = 25
+
+_current = None
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and its finished children, in MB."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(max(usage, children) / scale, 1)
+
+
+class Stage:
+    """Timer and counters of one stage, with a rate-limited progress line."""
+
+    def __init__(self, monitor, name, total=None, unit="files"):
+        self.monitor = monitor
+        self.name = name
+        self.total = total
+        self.unit = unit
+        self.counts = {"files": 0, "lines": 0, "bytes": 0}
+        self.start = time.perf_counter()
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.last_report = self.start
+        self.seconds = None
+        # add() may be called from worker threads
+        self.lock = threading.Lock()
+
+    def add(self, **counts):
+        """Add to the counters (files=, lines=, bytes= or any other name)."""
+        with self.lock:
+            for key, value in counts.items():
+                self.counts[key] = self.counts.get(key, 0) + value
+
+            now = time.perf_counter()
+            if self.monitor.progress_interval and now - self.last_report >= self.monitor.progress_interval:
+                self.last_report = now
+                print(self.progress_line(now - self.start), flush=True)
+
+    def progress_line(self, elapsed):
+        done = self.counts.get(self.unit, 0)
+        line = f"[{self.name}] {done}"
+        if self.total:
+            line += f"/{self.total} {self.unit} ({100 * done / self.total:.0f}%)"
+        else:
+            line += f" {self.unit}"
+        if self.counts["lines"] and self.unit != "lines":
+            line += f" | {self.counts['lines']} lines"
+        if self.counts["bytes"] and self.unit != "bytes":
+            line += f" | {self.counts['bytes'] / (1024 * 1024):.1f} MB"
+        if elapsed > 0:
+            line += f" | {done / elapsed:.1f} {self.unit}/s | {elapsed:.0f}s"
+        return line
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.start
+        record = {
+            "type": "stage",
+            "run_id": self.monitor.run_id,
+            "script": self.monitor.name,
+            "stage": self.name,
+            "started": self.started,
+            "seconds": round(self.seconds, 3),
+            **self.counts,
+            "files_per_sec": round(self.counts["files"] / self.seconds, 2) if self.seconds else None,
+            "lines_per_sec": round(self.counts["lines"] / self.seconds, 1) if self.seconds else None,
+            "mb_per_sec": round(self.counts["bytes"] / (1024 * 1024) / self.seconds, 2) if self.seconds else None,
+            "peak_rss_mb": peak_rss_mb()
+        }
+        if self.monitor.progress_interval and (self.counts["files"] or self.counts["lines"]):
+            print(self.progress_line(self.seconds) + " - done", flush=True)
+        self.monitor.write(record)
+        return record
+
+
+class RunMonitor:
+    """Collects the stages of one script run and writes them to the run log."""
+
+    def __init__(self, name, log_path=None, progress_interval=PROGRESS_INTERVAL):
+        self.name = name
+        self.log_path = log_path
+        self.progress_interval = progress_interval
+        self.run_id = uuid.uuid4().hex[:12]
+        self.start = time.perf_counter()
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.stages = []
+        self.active = []
+
+    def write(self, record):
+        if not self.log_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Warning: Could not write run log {self.log_path}: {e}", file=sys.stderr)
+
+    @contextmanager
+    def stage(self, name, total=None, unit="files"):
+        current = Stage(self, name, total, unit)
+        self.active.append(current)
+        try:
+            yield current
+        finally:
+            self.active.remove(current)
+            self.stages.append(current.finish())
+
+    def finish(self, status="ok"):
+        seconds = time.perf_counter() - self.start
+        record = {
+            "type": "run",
+            "run_id": self.run_id,
+            "script": self.name,
+            "argv": sys.argv,
+            "started": self.started,
+            "seconds": round(seconds, 3),
+            "status": status,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": [s["stage"] for s in self.stages]
+        }
+        self.write(record)
+        return record
+
+
+def get_monitor():
+    """The monitor of the current run; outside instrumented_run a silent one without a log."""
+    global _current
+    if _current is None:
+        _current = RunMonitor(None, log_path=None, progress_interval=PROGRESS_INTERVAL)
+    return _current
+
+
+def stage(name, total=None, unit="files"):
+    """Time a stage of the current run: `with instrumentation.stage("name") as st: st.add(files=1)`."""
+    return get_monitor().stage(name, total, unit)
+
+
+def add(**counts):
+    """Add to the counters of the innermost running stage (no-op outside a stage)."""
+    monitor = get_monitor()
+    if monitor.active:
+        monitor.active[-1].add(**counts)
+
+
+def add_arguments(parser):
+    """Add the --profile, --run-log and --progress-interval options to an argparse parser."""
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--profile", action="store_true",
+                       help="Run under cProfile and print the functions that take the most time")
+    group.add_argument("--profile-out", help="Where to save the cProfile data (default: <script>.prof)")
+    group.add_argument("--run-log", default=RUN_LOG,
+                       help=f"JSONL file the stage timings are appended to (default: {RUN_LOG}, '' to disable)")
+    group.add_argument("--progress-interval", type=float, default=PROGRESS_INTERVAL,
+                       help=f"Seconds between progress lines (default: {PROGRESS_INTERVAL}, 0 to disable)")
+    return parser
+
+
+@contextmanager
+def instrumented_run(name, args=None):
+    """
+    Wrap a script run: sets up the run monitor, optionally runs under cProfile,
+    and writes the run record (with status 'failed' if an exception escapes).
+    """
+    global _current
+    log_path = getattr(args, "run_log", RUN_LOG)
+    interval = getattr(args, "progress_interval", PROGRESS_INTERVAL)
+    profile = getattr(args, "profile", False)
+    profile_path = getattr(args, "profile_out", None) or f"{name}.prof"
+
+    previous = _current
+    _current = monitor = RunMonitor(name, log_path, interval)
+    profiler = cProfile.Profile() if profile else None
+
+    status = "ok"
+    if profiler:
+        profiler.enable()
+    try:
+        yield monitor
+    except SystemExit as e:
+        status = "ok" if e.code in (None, 0) else "failed"
+        raise
+    except BaseException as e:
+        status = "interrupted" if isinstance(e, KeyboardInterrupt) else "failed"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            print(f"\n=== Profile (top {PROFILE_TOP} by cumulative time), saved to {profile_path} ===")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(PROFILE_TOP)
+
+        record = monitor.finish(status)
+        _current = previous
+        if interval:
+            print(f"\n[{name}] finished in {record['seconds']:.1f}s, peak RSS {record['peak_rss_mb']} MB")
@@ -0,0 +1,248 @@
+# How to use:
+'''
+
+As a library:
+
+    import line_index
+
+    with line_index.LineIndex(file_path) as index:     # builds or loads the sidecar of file_path in INDEX_DIR
+        index[10]                                       # line 10 (1-based, like tsv_reader), without '\\n'
+        len(index)                                      # number of lines
+
+    # Many lines of many files: read file by file in offset order, returned in the order asked
+    texts = line_index.fetch([(file_a, 12), (file_b, 3), (file_a, 7)])
+
+From the command line:
+
+python3 line_index.py build /path/to/Parallel_v2 - write the .lidx sidecar of every .txt file
+python3 line_index.py get /path/to/file.txt 10 250 3000 - print lines of one file
+python3 line_index.py --index-dir /scratch/line_index build /path/to/Parallel_v2
+
+The sidecars are kept out of the corpus tree, in INDEX_DIR (~/.cache/line_index, or $LINE_INDEX_DIR),
+under the absolute path of each file: /data/Parallel_v2/a.txt -> INDEX_DIR/data/Parallel_v2/a.txt.lidx.
+
+'''
+
+import os
+import mmap
+import argparse
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import fs_crawler
+
+# --- Configuration ---
+SUFFIX = ".lidx"
+# Where the sidecars go, mirroring the absolute paths of the files, so that tools that walk the
+# corpus (pipeline hashes, file counts) never see them.
+INDEX_DIR = os.environ.get("LINE_INDEX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "line_index"))
+# Files kept open (and mapped) by fetch() at the same time.
+MAX_OPEN = 64
+# Written first in every sidecar, so other files and old formats are rebuilt.
+MAGIC = 0x4C49445831   # "LIDX1"
+
+# Sidecar layout, all unsigned 64-bit: MAGIC, file size, file mtime_ns, then the byte offset
+# of the start of every line and the file size (so line n is offsets[n - 1]:offsets[n]).
+
+
+def index_path(file_path, index_dir=None):
+    """The sidecar of file_path: its absolute path below index_dir (default INDEX_DIR), plus SUFFIX."""
+    drive, path = os.path.splitdrive(os.path.abspath(file_path))
+    return os.path.join(index_dir or INDEX_DIR, drive.strip(':\\/'), path.lstrip(os.sep + '/') + SUFFIX)
+
+
+def build(file_path):
+    """Byte offsets of the line starts of a file, plus its size, as array('Q')."""
+    offsets = array('Q', [0])
+    position = 0
+    with open(file_path, 'rb') as f:
+        for line in f:
+            position += len(line)
+            offsets.append(position)
+    # A last line without '\n' is still a line; an empty file has none
+    return offsets
+
+
+def save(file_path, offsets, index_dir=None):
+    """Write the sidecar of the file (atomically)."""
+    stat = os.stat(file_path)
+    header = array('Q', [MAGIC, stat.st_size, stat.st_mtime_ns])
+    path = index_path(file_path, index_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        header.tofile(f)
+        offsets.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def load(file_path, index_dir=None):
+    """The offsets from the sidecar, or None if it is missing or the file changed since."""
+    try:
+        with open(index_path(file_path, index_dir), 'rb') as f:
+            data = f.read()
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    if len(data) < 32 or len(data) % 8:
+        return None
+    values = array('Q')
+    values.frombytes(data)
+    if values[0] != MAGIC or values[1] != stat.st_size or values[2] != stat.st_mtime_ns:
+        return None
+    return values[3:]
+
+
+def get_offsets(file_path, write=True, index_dir=None):
+    """Load the sidecar, or build it (and save it, if write) when it is missing or stale."""
+    offsets = load(file_path, index_dir)
+    if offsets is None:
+        offsets = build(file_path)
+        if write:
+            try:
+                save(file_path, offsets, index_dir)
+            except OSError as e:
+                print(f"Warning: Could not write line index for {file_path}: {e}")
+    return offsets
+
+
+class LineIndex:
+    """Random access to the lines of one file through its offsets and an mmap of the file."""
+
+    def __init__(self, file_path, write=True, index_dir=None):
+        self.file_path = file_path
+        self.offsets = get_offsets(file_path, write, index_dir)
+        self._file = None
+        self._map = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _open(self):
+        if self._map is None and self.offsets[-1]:
+            self._file = open(self.file_path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get_bytes(self, lineno):
+        """Line lineno (1-based) as bytes, without the line ending."""
+        if not 1 <= lineno <= len(self):
+            raise IndexError(f"{self.file_path} has no line {lineno} (it has {len(self)})")
+        self._open()
+        return self._map[self.offsets[lineno - 1]:self.offsets[lineno]].rstrip(b"\r\n")
+
+    def __getitem__(self, lineno):
+        return self.get_bytes(lineno).decode('utf-8')
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class IndexCache:
+    """At most max_open LineIndex objects, the least recently used one is closed first."""
+
+    def __init__(self, max_open=MAX_OPEN, write=True, index_dir=None):
+        self.max_open = max_open
+        self.write = write
+        self.index_dir = index_dir
+        self.indexes = OrderedDict()
+
+    def get(self, file_path):
+        index = self.indexes.pop(file_path, None)
+        if index is None:
+            index = LineIndex(file_path, self.write, self.index_dir)
+            if len(self.indexes) >= self.max_open:
+                self.indexes.popitem(last=False)[1].close()
+        self.indexes[file_path] = index
+        return index
+
+    def close(self):
+        for index in self.indexes.values():
+            index.close()
+        self.indexes.clear()
+
+
+def fetch(requests, cache=None, missing=None):
+    """
+    Fetch many (file path, line number) lines. The lines are read file by file in offset
+    order, so each file is opened once and read front to back.
+
+    Args:
+        requests: (file path, 1-based line number) pairs.
+        cache (IndexCache): Reuse open files between calls; a temporary one by default.
+        missing: Returned for lines past the end of a file (default None).
+
+    Returns:
+        list: The line texts, in the order of requests.
+    """
+    requests = list(requests)
+    own_cache = cache is None
+    cache = cache or IndexCache()
+    results = [missing] * len(requests)
+    try:
+        order = sorted(range(len(requests)), key=lambda i: requests[i])
+        for i in order:
+            file_path, lineno = requests[i]
+            index = cache.get(file_path)
+            if 1 <= lineno <= len(index):
+                results[i] = index[lineno]
+    finally:
+        if own_cache:
+            cache.close()
+    return results
+
+
+def _build_job(job):
+    file_path, index_dir = job
+    offsets = get_offsets(file_path, index_dir=index_dir)
+    return file_path, len(offsets) - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Line offset indexes for random access to corpus lines")
+    parser.add_argument("--index-dir", help=f"Folder for the sidecars (default: {INDEX_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Write the missing or stale sidecars of a tree")
+    build_parser.add_argument("root", help="Folder (or a single file) to index")
+    build_parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    fs_crawler.add_arguments(build_parser)
+
+    get_parser = subparsers.add_parser("get", help="Print lines of a file")
+    get_parser.add_argument("file", help="Text file")
+    get_parser.add_argument("lines", nargs="+", type=int, help="1-based line numbers")
+
+    args = parser.parse_args()
+    if args.command == "get":
+        cache = IndexCache(index_dir=args.index_dir)
+        try:
+            for lineno, text in zip(args.lines, fetch(((args.file, n) for n in args.lines), cache)):
+                print(f"{lineno}\t{text if text is not None else '(no such line)'}")
+        finally:
+            cache.close()
+        return 0
+
+    if os.path.isfile(args.root):
+        files = [args.root]
+    else:
+        files = sorted(os.path.join(root, name) for root, dirs, names in fs_crawler.walk(args.root, args.scan_threads)
+                       for name in names if name.endswith('.txt'))
+    total_lines = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for file_path, lines in executor.map(_build_job, [(f, args.index_dir) for f in files], chunksize=16):
+            total_lines += lines
+    print(f"Indexed {len(files)} files, {total_lines} lines")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,265 @@
+# How to use:
+'''
+
+python3 lp_overlap.py /path/to/Parallel_v2 - LP x LP source overlap and "LPs per source" per domain
+python3 lp_overlap.py /path/to/Parallel_v2 --type source_translated --domains EDU GOV -o overlap/
+python3 lp_overlap.py /path/to/Parallel_v2 --min-fraction 0.6 --normalize
+
+As a library, for any {lang pair: set of sources}:
+
+    from lp_overlap import overlap_matrix
+    lang_pairs, matrix, distribution, missing = overlap_matrix(per_lp_sources, min_fraction=0.6)
+
+or, for sources that come one at a time with the lang pairs that have them (external_merge.merge_by_key):
+
+    from lp_overlap import OverlapCounter
+    counter = OverlapCounter(lang_pairs, min_fraction=0.6)
+    for source, targets in merge_by_key(runs):
+        counter.add(targets)
+    lang_pairs, matrix, distribution, missing = counter.result()
+
+'''
+
+import os
+import csv
+import hashlib
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from tsv_reader import TSVStats, read_tsv
+from text_normalize import normalize
+import corpus_paths
+import fs_crawler
+import instrumentation
+
+# --- Configuration ---
+# Folder whose sources are compared; find_translations_directly_new.py reads source_reviewed.
+FOLDER_TYPE = 'source_reviewed'
+# A source counts as common when this share of the lang pairs have it (as in find_translations_directly_new.py).
+MIN_FRACTION = 0.6
+ALL_DOMAINS = 'ALL'
+
+
+def source_hash(text):
+    """A 64-bit hash of a sentence, the same in every process (unlike hash())."""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def hash_sources(job):
+    """The sorted, distinct 64-bit hashes of the sources of a list of files, as array('Q')."""
+    file_paths, do_normalize = job
+    hashes = set()
+    lines = 0
+    for file_path in file_paths:
+        file_stats = TSVStats(file_path)
+        try:
+            for batch in read_tsv(file_path, stats=file_stats):
+                for src, _, _ in batch:
+                    if do_normalize:
+                        src = normalize(src, 'Devanagari')
+                    if src:
+                        hashes.add(source_hash(src))
+        except Exception as e:
+            print(f"Warning: Failed to read {file_path}: {e}")
+        lines += file_stats.lines
+    return array('Q', sorted(hashes)), len(file_paths), lines
+
+
+def overlap_matrix(per_lp_sources, min_fraction=MIN_FRACTION):
+    """
+    Pairwise overlap of the source sets of the lang pairs, with one bitmap per lang pair:
+    every distinct source gets a bit number, and the overlap of two lang pairs is the
+    popcount of the AND of their bitmaps.
+
+    Args:
+        per_lp_sources (dict): {lang pair: iterable of distinct hashable sources}.
+        min_fraction (float): Share of the lang pairs a source needs to count as common.
+
+    Returns:
+        tuple: (lang pairs, matrix {lp: {lp: shared sources}} with the source count on the diagonal,
+                distribution {number of lang pairs: sources}, missing {lp: common sources it lacks})
+    """
+    lang_pairs = sorted(per_lp_sources)
+    ids = {}
+    per_lp_ids = {}
+    for lp in lang_pairs:
+        per_lp_ids[lp] = array('Q', (ids.setdefault(source, len(ids)) for source in per_lp_sources[lp]))
+
+    n_bytes = len(ids) // 8 + 1
+    bitmaps = {}
+    lp_counts = array('H', bytes(2 * len(ids)))
+    for lp in lang_pairs:
+        bits = bytearray(n_bytes)
+        for i in per_lp_ids[lp]:
+            bits[i >> 3] |= 1 << (i & 7)
+            lp_counts[i] += 1
+        bitmaps[lp] = int.from_bytes(bits, 'little')
+
+    matrix = {a: {} for a in lang_pairs}
+    for x, a in enumerate(lang_pairs):
+        for b in lang_pairs[x:]:
+            matrix[a][b] = matrix[b][a] = (bitmaps[a] & bitmaps[b]).bit_count()
+
+    distribution = {n: 0 for n in range(1, len(lang_pairs) + 1)}
+    for n in lp_counts:
+        distribution[n] += 1
+
+    min_required = max(1, int(len(lang_pairs) * min_fraction))
+    common_bits = bytearray(n_bytes)
+    for i, n in enumerate(lp_counts):
+        if n >= min_required:
+            common_bits[i >> 3] |= 1 << (i & 7)
+    common = int.from_bytes(common_bits, 'little')
+    missing = {lp: (common & ~bitmaps[lp]).bit_count() for lp in lang_pairs}
+    return lang_pairs, matrix, distribution, missing
+
+
+class OverlapCounter:
+    """
+    The result of overlap_matrix, counted one source at a time from the lang pairs that have it,
+    so the sources themselves are never held in memory.
+    """
+
+    def __init__(self, lang_pairs, min_fraction=MIN_FRACTION):
+        self.lang_pairs = sorted(lang_pairs)
+        self.min_required = max(1, int(len(self.lang_pairs) * min_fraction))
+        self.matrix = {a: dict.fromkeys(self.lang_pairs, 0) for a in self.lang_pairs}
+        self.distribution = {n: 0 for n in range(1, len(self.lang_pairs) + 1)}
+        self.missing = dict.fromkeys(self.lang_pairs, 0)
+
+    def add(self, source_lps):
+        """Count one distinct source, given the lang pairs that have it."""
+        source_lps = sorted(source_lps)
+        for x, a in enumerate(source_lps):
+            row = self.matrix[a]
+            for b in source_lps[x:]:
+                row[b] += 1
+        self.distribution[len(source_lps)] += 1
+        if len(source_lps) >= self.min_required:
+            for lp in self.lang_pairs:
+                if lp not in source_lps:
+                    self.missing[lp] += 1
+
+    def result(self):
+        """(lang pairs, matrix, distribution, missing), as overlap_matrix returns them."""
+        for x, a in enumerate(self.lang_pairs):
+            for b in self.lang_pairs[x + 1:]:
+                self.matrix[b][a] = self.matrix[a][b]
+        return self.lang_pairs, self.matrix, self.distribution, self.missing
+
+
+def find_files(parallel_root, folder_type=FOLDER_TYPE, domains=None, scan_threads=0):
+    """{(domain, lang pair): [files]} of the folders of one type in a Parallel_v2 or Domain-wise tree."""
+    groups = {}
+    for root, dirs, files in fs_crawler.walk(parallel_root, scan_threads):
+        if os.path.basename(root) != folder_type:
+            continue
+        info = corpus_paths.lookup(root)
+        if info is None or (domains and info.domain not in domains):
+            continue
+        groups.setdefault((info.domain, info.lang_pair), []).extend(
+            os.path.join(root, name) for name in sorted(files) if name.endswith('.txt'))
+    return groups
+
+
+def analyze(parallel_root, folder_type=FOLDER_TYPE, domains=None, min_fraction=MIN_FRACTION, do_normalize=False,
+            workers=None, scan_threads=0):
+    """
+    Hash the sources of every (domain, lang pair) in a process pool and compute the overlap
+    per domain and over all domains together.
+
+    Returns:
+        dict: {domain: overlap_matrix result}
+    """
+    with instrumentation.stage("find_files"):
+        groups = find_files(parallel_root, folder_type, domains, scan_threads)
+
+    keys = sorted(groups)
+    hashed = {}
+    with instrumentation.stage("hash_sources", total=sum(len(groups[k]) for k in keys)) as st, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        for key, (hashes, files, lines) in zip(keys, executor.map(hash_sources, [(groups[k], do_normalize) for k in keys])):
+            hashed[key] = hashes
+            st.add(files=files, lines=lines)
+
+    results = {}
+    with instrumentation.stage("overlap", unit="domains") as st:
+        per_domain = {}
+        for (domain, lang_pair), hashes in hashed.items():
+            per_domain.setdefault(domain, {})[lang_pair] = hashes
+        for domain in sorted(per_domain):
+            results[domain] = overlap_matrix(per_domain[domain], min_fraction)
+            st.add(domains=1)
+
+        # The same source in two domains of a lang pair counts once
+        per_lp = {}
+        for (domain, lang_pair), hashes in hashed.items():
+            per_lp.setdefault(lang_pair, set()).update(hashes)
+        if len(per_domain) > 1:
+            results[ALL_DOMAINS] = overlap_matrix(per_lp, min_fraction)
+    return results
+
+
+def print_result(domain, result):
+    lang_pairs, matrix, distribution, missing = result
+    print(f"\n=== {domain}: sources shared by each two lang pairs (diagonal: sources of the lang pair) ===\n")
+    print(f"{'':<10} | " + " | ".join(f"{lp:>9}" for lp in lang_pairs) + f" | {'Missing':>9}")
+    print("-" * (13 + 12 * (len(lang_pairs) + 1)))
+    for a in lang_pairs:
+        print(f"{a:<10} | " + " | ".join(f"{matrix[a][b]:>9}" for b in lang_pairs) + f" | {missing[a]:>9}")
+    total = sum(distribution.values())
+    print(f"\nLang pairs per source ({total} distinct sources):")
+    for n, count in distribution.items():
+        print(f"  {n:>2}: {count:>9} ({100 * count / total if total else 0:.1f}%)")
+
+
+def save_result(out_dir, domain, result):
+    lang_pairs, matrix, distribution, missing = result
+    with open(os.path.join(out_dir, f"{domain}_overlap.csv"), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Language Pair"] + lang_pairs + ["Missing Common"])
+        for a in lang_pairs:
+            writer.writerow([a] + [matrix[a][b] for b in lang_pairs] + [missing[a]])
+    with open(os.path.join(out_dir, f"{domain}_lp_count_distribution.csv"), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Lang Pairs", "Sources"])
+        writer.writerows(distribution.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LP x LP source overlap and the number of lang pairs per source, per domain")
+    parser.add_argument("root", help="Parallel_v2 or Domain-wise arranged folder")
+    parser.add_argument("--type", default=FOLDER_TYPE, help=f"Folder whose sources are compared (default: {FOLDER_TYPE})")
+    parser.add_argument("--domains", nargs="+", help="Only these domains (default: all)")
+    parser.add_argument("--min-fraction", type=float, default=MIN_FRACTION,
+                        help=f"Share of the lang pairs for a source to be common; 'Missing' counts the common sources a lang pair lacks (default: {MIN_FRACTION})")
+    parser.add_argument("--normalize", action="store_true", help="Unicode-normalize the sources before comparing them (see text_normalize.py)")
+    parser.add_argument("-o", "--output", help="Folder to save DOMAIN_overlap.csv and DOMAIN_lp_count_distribution.csv to")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    fs_crawler.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Error: {args.root} is not a valid directory")
+        return 1
+
+    with instrumentation.instrumented_run("lp_overlap", args):
+        results = analyze(args.root, args.type, args.domains, args.min_fraction, args.normalize, args.workers, args.scan_threads)
+        if not results:
+            print(f"No {args.type} folders found.")
+            return 1
+        if args.output:
+            os.makedirs(args.output, exist_ok=True)
+        for domain, result in results.items():
+            print_result(domain, result)
+            if args.output:
+                save_result(args.output, domain, result)
+    if args.output:
+        print(f"\nReports saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,253 @@
+# How to use:
+'''
+
+python3 monolingual_dedup.py /path/to/Monolingual /path/to/Monolingual_clean - drop lines found in 5 or more files
+python3 monolingual_dedup.py /path/to/Monolingual /path/to/Monolingual_clean --min-files 20 --paragraphs
+python3 monolingual_dedup.py /path/to/Monolingual /path/to/Monolingual_clean -r boilerplate.tsv -c before_after.csv
+
+'''
+
+import os
+import re
+import csv
+import argparse
+from array import array
+
+from monolingual_stats import CATEGORIES, collect_stats, find_monolingual_files, line_hash
+
+# --- Configuration ---
+# A line (or paragraph) is boilerplate if it occurs in at least this many files.
+MIN_FILES = 5
+# Size of the count-min sketch: DEPTH rows of WIDTH 32-bit counters.
+SKETCH_WIDTH = 1 << 20
+SKETCH_DEPTH = 4
+
+DIGITS_RE = re.compile(r'\d+')
+SPACES_RE = re.compile(r'\s+')
+
+
+def fingerprint(text):
+    """
+    Fingerprint a line after collapsing whitespace, case and digits, so that
+    near-duplicates like 'Page 3 of 10' and 'Page 4 of 10' share a fingerprint.
+    """
+    text = SPACES_RE.sub(' ', text.strip()).casefold()
+    return line_hash(DIGITS_RE.sub('0', text))
+
+
+def paragraph_fingerprint(line_fps):
+    """Fingerprint a block of consecutive non-empty lines from its line fingerprints."""
+    return line_hash('\x1e'.join(map(str, line_fps)))
+
+
+class CountMinSketch:
+    """Fixed-memory frequency estimates for 64-bit fingerprints (never under-counts)."""
+
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+
+    def _indexes(self, fp):
+        h1 = fp & 0xffffffff
+        h2 = (fp >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, fp):
+        for row, idx in zip(self.rows, self._indexes(fp)):
+            row[idx] += 1
+
+    def estimate(self, fp):
+        return min(row[idx] for row, idx in zip(self.rows, self._indexes(fp)))
+
+
+def read_blocks(file_path):
+    """
+    Yield the file as blocks of (raw_line, fingerprint) tuples. A block is a run of
+    non-empty lines, empty lines are yielded as single-line blocks with fingerprint None.
+    """
+    block = []
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if line.strip():
+                block.append((line, fingerprint(line)))
+                continue
+            if block:
+                yield block
+                block = []
+            yield [(line, None)]
+    if block:
+        yield block
+
+
+def file_fingerprints(file_path, paragraphs):
+    """Distinct line (and paragraph) fingerprints of one file."""
+    fps = set()
+    for block in read_blocks(file_path):
+        line_fps = [fp for _, fp in block if fp is not None]
+        fps.update(line_fps)
+        if paragraphs and len(line_fps) > 1:
+            fps.add(paragraph_fingerprint(line_fps))
+    return fps
+
+
+def find_boilerplate(file_paths, min_files=MIN_FILES, paragraphs=False,
+                     width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+    """
+    Find fingerprints that occur in at least `min_files` files in two streaming passes:
+    a count-min sketch narrows down the candidates, then only the candidates are counted exactly.
+
+    Returns:
+        dict: {fingerprint: number of files it occurs in}
+    """
+    # --- 1. Approximate document frequencies ---
+    sketch = CountMinSketch(width, depth)
+    for file_path in file_paths:
+        for fp in file_fingerprints(file_path, paragraphs):
+            sketch.add(fp)
+
+    # --- 2. Exact document frequencies for the candidates only ---
+    candidates = {}
+    for file_path in file_paths:
+        for fp in file_fingerprints(file_path, paragraphs):
+            if fp in candidates:
+                candidates[fp] += 1
+            elif sketch.estimate(fp) >= min_files:
+                candidates[fp] = 1
+
+    print(f"Pass 2: {len(candidates)} candidate fingerprints from the sketch.")
+    return {fp: count for fp, count in candidates.items() if count >= min_files}
+
+
+def clean_file(source_path, dest_path, boilerplate, paragraphs=False, examples=None):
+    """
+    Write a copy of the file without boilerplate lines and paragraphs.
+
+    Returns:
+        tuple: (lines kept, lines removed)
+    """
+    kept = removed = 0
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+    with open(dest_path, 'w', encoding='utf-8') as dest_file:
+        for block in read_blocks(source_path):
+            line_fps = [fp for _, fp in block if fp is not None]
+            if paragraphs and len(line_fps) > 1 and paragraph_fingerprint(line_fps) in boilerplate:
+                removed += len(block)
+                continue
+
+            for line, fp in block:
+                if fp is not None and fp in boilerplate:
+                    removed += 1
+                    if examples is not None and fp not in examples:
+                        examples[fp] = line.strip()
+                    continue
+                dest_file.write(line)
+                kept += 1
+
+    return kept, removed
+
+
+def dedup_tree(source_dir, dest_dir, min_files=MIN_FILES, paragraphs=False, categories=CATEGORIES,
+               width=SKETCH_WIDTH, depth=SKETCH_DEPTH, report_path=None):
+    """
+    Remove boilerplate from every file of the monolingual tree and write cleaned
+    copies with the same layout under dest_dir.
+    """
+    files = [rel_path for rel_path, _ in find_monolingual_files(source_dir, categories)]
+    full_paths = [os.path.join(source_dir, rel_path) for rel_path in files]
+    print(f"Fingerprinting {len(files)} files...")
+
+    boilerplate = find_boilerplate(full_paths, min_files, paragraphs, width, depth)
+    print(f"Found {len(boilerplate)} lines/paragraphs repeated in at least {min_files} files.")
+
+    examples = {}
+    total_kept = total_removed = 0
+    for rel_path, full_path in zip(files, full_paths):
+        kept, removed = clean_file(full_path, os.path.join(dest_dir, rel_path), boilerplate, paragraphs, examples)
+        total_kept += kept
+        total_removed += removed
+
+    print(f"Kept {total_kept} lines, removed {total_removed} boilerplate lines.")
+
+    if report_path:
+        with open(report_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter='\t')
+            writer.writerow(["files", "line"])
+            for fp, line in sorted(examples.items(), key=lambda item: -boilerplate[item[0]]):
+                writer.writerow([boilerplate[fp], line])
+        print(f"Boilerplate report saved to {report_path}")
+
+    return boilerplate
+
+
+def compare_stats(before, after, output_csv=None):
+    """Print (and optionally save) the per-folder statistics before and after cleaning."""
+    after_map = {(r["Language"], r["Category"], r["Primary_Domain"]): r for r in after}
+    rows = []
+
+    print(f"\n{'Language':<12} | {'Category':<10} | {'Domain':<8} | {'Lines before':<12} | {'Lines after':<12} | {'Unique before':<13} | {'Unique after':<12}")
+    print("-" * 98)
+    for row in before:
+        key = (row["Language"], row["Category"], row["Primary_Domain"])
+        new = after_map.get(key, {})
+        rows.append({
+            "Language": row["Language"],
+            "Category": row["Category"],
+            "Primary_Domain": row["Primary_Domain"],
+            "Num_Files": row["Num_Files"],
+            "Num_Lines_Before": row["Num_Lines"],
+            "Num_Lines_After": new.get("Num_Lines", 0),
+            "Num_Words_Before": row["Num_Words"],
+            "Num_Words_After": new.get("Num_Words", 0),
+            "Unique_Lines_Before": row["Unique_Lines"],
+            "Unique_Lines_After": new.get("Unique_Lines", 0)
+        })
+        print(f"{key[0]:<12} | {key[1]:<10} | {key[2]:<8} | {row['Num_Lines']:<12} | {new.get('Num_Lines', 0):<12} | "
+              f"{row['Unique_Lines']:<13} | {new.get('Unique_Lines', 0):<12}")
+
+    if output_csv and rows:
+        with open(output_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\nBefore/after statistics saved to {output_csv}")
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove repeated boilerplate lines from the Monolingual tree")
+    parser.add_argument("source", help="Path to the Monolingual folder (Language/Raw|Validated/Domain/...)")
+    parser.add_argument("dest", help="Path where the cleaned copy of the tree is written")
+    parser.add_argument("--min-files", type=int, default=MIN_FILES, help=f"Boilerplate threshold in number of files (default: {MIN_FILES})")
+    parser.add_argument("--paragraphs", action="store_true", help="Also remove repeated multi-line paragraphs")
+    parser.add_argument("--sketch-width", type=int, default=SKETCH_WIDTH, help="Counters per sketch row (memory is 4 * depth * width bytes)")
+    parser.add_argument("--sketch-depth", type=int, default=SKETCH_DEPTH, help="Number of sketch rows")
+    parser.add_argument("--categories", nargs="+", default=CATEGORIES, help="Category folders to scan (default: Raw Validated)")
+    parser.add_argument("-r", "--report", help="Path to save the removed boilerplate lines as TSV (optional)")
+    parser.add_argument("-c", "--csv", help="Path to save the before/after statistics as CSV (optional)")
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source):
+        print(f"Error: {args.source} is not a valid directory")
+        return
+    if os.path.abspath(args.source) == os.path.abspath(args.dest):
+        print("Error: the destination must be different from the source folder")
+        return
+
+    print("Collecting statistics before cleaning...")
+    before = collect_stats(args.source, output_csv=None, categories=args.categories)
+
+    dedup_tree(args.source, args.dest, args.min_files, args.paragraphs, args.categories,
+               args.sketch_width, args.sketch_depth, args.report)
+
+    print("Collecting statistics after cleaning...")
+    after = collect_stats(args.dest, output_csv=None, categories=args.categories)
+
+    compare_stats(before, after, args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# How to use:
+'''
+
+python3 monolingual_stats.py /path/to/Monolingual - stats for the whole tree written to monolingual_stats.csv
+python3 monolingual_stats.py /path/to/Monolingual -o stats.csv -w 16 - use 16 worker processes
+python3 monolingual_stats.py /path/to/Monolingual -m manifest.json - only rescan files that changed since the last run
+python3 monolingual_stats.py /path/to/Monolingual --threads - use a thread pool instead of processes (network mounts)
+
+'''
+
+import os
+import re
+import csv
+import json
+import heapq
+import hashlib
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import stats_db
+
+# --- Configuration ---
+# The category folders expected under every language folder.
+CATEGORIES = ["Raw", "Validated"]
+# Columns of the output CSV, the first five match the old notebook output.
+FIELDNAMES = [
+    "Language", "Category", "Primary_Domain", "Num_Files", "Num_Lines",
+    "Num_Words", "Num_Chars", "Num_Empty_Lines", "Undecodable_Bytes", "Unique_Lines"
+]
+
+# Bytes that are not valid UTF-8 are decoded with 'surrogateescape' and end up here.
+UNDECODABLE_RE = re.compile('[\udc80-\udcff]')
+
+
+def line_hash(text):
+    """Return a 64-bit integer fingerprint of a (stripped) line."""
+    digest = hashlib.blake2b(text.encode('utf-8', 'surrogateescape'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def scan_file(file_path):
+    """
+    Scan a single monolingual file in one pass.
+
+    Returns:
+        tuple: (stats dict, sorted array('Q') of the unique line hashes),
+               or (None, error message) if the file could not be read.
+    """
+    stats = {"lines": 0, "words": 0, "chars": 0, "empty_lines": 0, "undecodable_bytes": 0}
+    hashes = set()
+
+    try:
+        with open(file_path, 'rb') as f:
+            for raw in f:
+                stats["lines"] += 1
+                text = raw.decode('utf-8', 'surrogateescape').rstrip('\r\n')
+
+                bad = len(UNDECODABLE_RE.findall(text))
+                if bad:
+                    # Mirror errors="ignore" of the old notebook for the other counts
+                    stats["undecodable_bytes"] += bad
+                    text = UNDECODABLE_RE.sub('', text)
+
+                stripped = text.strip()
+                if not stripped:
+                    stats["empty_lines"] += 1
+                    continue
+
+                stats["chars"] += len(text)
+                stats["words"] += len(text.split())
+                hashes.add(line_hash(stripped))
+    except OSError as e:
+        # Returned instead of raised, so executor.map goes on with the other files
+        return None, str(e)
+
+    stats["unique_lines"] = len(hashes)
+    return stats, array('Q', sorted(hashes))
+
+
+def count_unique(hash_arrays):
+    """Number of distinct values in several sorted hash arrays, merged without building a set."""
+    unique = 0
+    last = None
+    for value in heapq.merge(*hash_arrays):
+        if value != last:
+            unique += 1
+            last = value
+    return unique
+
+
+def find_monolingual_files(parent_folder, categories=CATEGORIES):
+    """
+    Find all files in the Language/Category/Primary_Domain/... structure.
+
+    Returns:
+        list: (relative path, (language, category, primary_domain)) tuples.
+    """
+    found = []
+
+    for language in sorted(os.listdir(parent_folder)):
+        lang_path = os.path.join(parent_folder, language)
+        if not os.path.isdir(lang_path):
+            continue
+
+        for category in categories:
+            category_path = os.path.join(lang_path, category)
+            if not os.path.isdir(category_path):
+                continue
+
+            for primary_domain in sorted(os.listdir(category_path)):
+                primary_path = os.path.join(category_path, primary_domain)
+                if not os.path.isdir(primary_path):
+                    continue
+
+                # Traverse all sub-domains recursively
+                for root, _, files in os.walk(primary_path):
+                    for file in files:
+                        rel_path = os.path.relpath(os.path.join(root, file), parent_folder)
+                        found.append((rel_path, (language, category, primary_domain)))
+
+    return found
+
+
+class Manifest:
+    """
+    Per-file results of previous runs, keyed by path relative to the tree root.
+    A file is rescanned only if its size or mtime changed. The unique line hashes of
+    each file are kept in a sidecar folder so folder-level unique counts can be rebuilt.
+    """
+
+    def __init__(self, manifest_path):
+        self.path = manifest_path
+        self.hash_dir = os.path.splitext(manifest_path)[0] + "_hashes"
+        self.files = {}
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get("files", {})
+
+    def _hash_file(self, rel_path):
+        name = hashlib.sha1(rel_path.encode('utf-8')).hexdigest() + ".bin"
+        return os.path.join(self.hash_dir, name)
+
+    def lookup(self, rel_path, st):
+        """Return the cached stats for a file if it has not changed, else None."""
+        entry = self.files.get(rel_path)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns \
+                and os.path.exists(self._hash_file(rel_path)):
+            return entry["stats"]
+        return None
+
+    def load_hashes(self, rel_path, count):
+        hashes = array('Q')
+        with open(self._hash_file(rel_path), 'rb') as f:
+            hashes.fromfile(f, count)
+        return hashes
+
+    def update(self, rel_path, st, stats, hashes):
+        os.makedirs(self.hash_dir, exist_ok=True)
+        with open(self._hash_file(rel_path), 'wb') as f:
+            hashes.tofile(f)
+        self.files[rel_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "stats": stats}
+
+    def prune(self, seen):
+        """Forget files that no longer exist in the tree."""
+        for rel_path in list(self.files):
+            if rel_path not in seen:
+                del self.files[rel_path]
+                try:
+                    os.remove(self._hash_file(rel_path))
+                except FileNotFoundError:
+                    pass
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+
+def collect_stats(parent_folder, output_csv="monolingual_stats.csv", workers=None,
+                  use_threads=False, manifest_path=None, categories=CATEGORIES, failed=None):
+    """
+    Collect per Language/Category/Primary_Domain statistics for the monolingual tree.
+
+    Args:
+        parent_folder (str): Root of the Monolingual tree.
+        output_csv (str): Where to save the statistics (None to skip saving).
+        workers (int): Number of pool workers (defaults to the CPU count).
+        use_threads (bool): Use a thread pool instead of a process pool.
+        manifest_path (str): Manifest of a previous run for incremental scanning.
+        failed (list): If given, (relative path, error) of every file that could not be read is added to it.
+
+    Returns:
+        list: One dict per folder, keyed by FIELDNAMES.
+    """
+    files = find_monolingual_files(parent_folder, categories)
+    manifest = Manifest(manifest_path) if manifest_path else None
+    errors = []
+    listed = False
+
+    try:
+        # --- 1. Split the files into cached and to-be-scanned ---
+        results = {}
+        to_scan = []
+        stat_results = {}
+        for rel_path, _ in files:
+            try:
+                st = os.stat(os.path.join(parent_folder, rel_path))
+            except OSError as e:
+                errors.append((rel_path, str(e)))
+                continue
+            stat_results[rel_path] = st
+            cached = manifest.lookup(rel_path, st) if manifest else None
+            if cached is not None:
+                results[rel_path] = (cached, None)
+            else:
+                to_scan.append(rel_path)
+        listed = True
+
+        print(f"Found {len(files)} files, {len(stat_results) - len(to_scan)} unchanged since the last run, "
+              f"{len(to_scan)} to scan.")
+
+        # --- 2. Scan the changed files in a pool ---
+        executor_class = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+        with executor_class(max_workers=workers) as executor:
+            full_paths = [os.path.join(parent_folder, rel_path) for rel_path in to_scan]
+            for rel_path, (file_stats, hashes) in zip(to_scan, executor.map(scan_file, full_paths, chunksize=8)):
+                if file_stats is None:
+                    errors.append((rel_path, hashes))
+                    continue
+                if manifest:
+                    manifest.update(rel_path, stat_results[rel_path], file_stats, hashes)
+                    # The hashes are on disk now, read back one folder at a time below
+                    hashes = None
+                results[rel_path] = (file_stats, hashes)
+
+        # --- 3. Aggregate per folder ---
+        groups = {}
+        for rel_path, key in files:
+            if rel_path in results:
+                groups.setdefault(key, []).append(rel_path)
+
+        stats = []
+        for (language, category, primary_domain), rel_paths in sorted(groups.items()):
+            totals = {"lines": 0, "words": 0, "chars": 0, "empty_lines": 0, "undecodable_bytes": 0}
+            hash_arrays = []
+            for rel_path in rel_paths:
+                file_stats, hashes = results.pop(rel_path)
+                if hashes is None:
+                    hashes = manifest.load_hashes(rel_path, file_stats["unique_lines"])
+                hash_arrays.append(hashes)
+                for field in totals:
+                    totals[field] += file_stats[field]
+
+            stats.append({
+                "Language": language,
+                "Category": category,
+                "Primary_Domain": primary_domain,
+                "Num_Files": len(rel_paths),
+                "Num_Lines": totals["lines"],
+                "Num_Words": totals["words"],
+                "Num_Chars": totals["chars"],
+                "Num_Empty_Lines": totals["empty_lines"],
+                "Undecodable_Bytes": totals["undecodable_bytes"],
+                "Unique_Lines": count_unique(hash_arrays)
+            })
+    finally:
+        # Keep what was scanned even if the run stops half way
+        if manifest:
+            if listed:
+                manifest.prune(stat_results)
+            manifest.save()
+            print(f"Manifest saved to {manifest_path}")
+
+    if errors:
+        print(f"Warning: {len(errors)} file(s) could not be read and are left out of the statistics:")
+        for rel_path, error in errors:
+            print(f"  - {rel_path}: {error}")
+        if failed is not None:
+            failed.extend(errors)
+
+    # Save to CSV
+    if output_csv:
+        with open(output_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(stats)
+        print(f"Statistics saved to {output_csv}")
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Line, word and character statistics for the Monolingual tree")
+    parser.add_argument("folder", help="Path to the Monolingual folder (Language/Raw|Validated/Domain/...)")
+    parser.add_argument("-o", "--output", default="monolingual_stats.csv", help="Path to save statistics as CSV")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of parallel workers (default: CPU count)")
+    parser.add_argument("--threads", action="store_true", help="Use threads instead of processes")
+    parser.add_argument("-m", "--manifest", help="Manifest JSON for incremental re-runs (created if missing)")
+    parser.add_argument("--categories", nargs="+", default=CATEGORIES, help="Category folders to scan (default: Raw Validated)")
+    stats_db.add_arguments(parser)
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        print(f"Error: {args.folder} is not a valid directory")
+        return
+
+    failed = []
+    stats = collect_stats(args.folder, args.output, args.workers, args.threads, args.manifest, args.categories, failed)
+    if args.db:
+        stats_db.record_run(args.db, "monolingual_stats", args.folder, args.db_label, monolingual_counts=stats)
+
+    # Pretty print
+    print(f"\n{'Language':<12} | {'Category':<10} | {'Domain':<8} | {'Files':<6} | {'Lines':<10} | {'Words':<12} | {'Unique':<10}")
+    print("-" * 84)
+    for row in stats:
+        print(f"{row['Language']:<12} | {row['Category']:<10} | {row['Primary_Domain']:<8} | {row['Num_Files']:<6} | "
+              f"{row['Num_Lines']:<10} | {row['Num_Words']:<12} | {row['Unique_Lines']:<10}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
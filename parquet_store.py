@@ -0,0 +1,325 @@
+# How to use:
+'''
+
+python3 parquet_store.py export /path/to/Parallel_v2 /path/to/parallel_parquet - convert the tree into a partitioned Parquet dataset
+python3 parquet_store.py query /path/to/parallel_parquet --lang-pair HIN-BAN --domain EDU --type source_reviewed --min-words 6 --max-words 55 -o out.tsv
+python3 parquet_store.py query /path/to/parallel_parquet --domain GOV --count - just count matching pairs
+python3 parquet_store.py import /path/to/parallel_parquet /path/to/Parallel_v2_copy - write the dataset back as tab-separated files
+
+'''
+
+import os
+import sys
+import argparse
+from collections import OrderedDict
+
+from tsv_reader import TSVStats, read_tsv
+import corpus_paths
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# --- Configuration ---
+# The specific folders that hold parallel data.
+FOLDERS_TO_EXPORT = {'source_translated', 'source_reviewed'}
+# Rows buffered before a row group is written.
+ROW_GROUP_SIZE = 100_000
+# Output files kept open at once by import; the least recently written one is closed (and reopened
+# for appending when more of its rows come), so a tree of thousands of files stays under the ulimit.
+MAX_OPEN_FILES = 64
+
+if pa is not None:
+    # lang_pair, domain and type are hive partition keys (lang_pair=HIN-BAN/domain=EDU/type=...)
+    # and come back as columns when the dataset is opened with `open_dataset`.
+    FILE_SCHEMA = pa.schema([
+        ("source", pa.string()),
+        ("target", pa.string()),
+        ("source_words", pa.int32()),
+        ("sub_domain", pa.string()),
+        ("file", pa.string()),
+        ("line_no", pa.int32()),
+    ])
+    PARTITIONING = ds.partitioning(
+        pa.schema([("lang_pair", pa.string()), ("domain", pa.string()), ("type", pa.string())]),
+        flavor="hive"
+    )
+
+
+def require_pyarrow():
+    if pa is None:
+        print("Error: pyarrow is required for the Parquet store (pip install pyarrow)", file=sys.stderr)
+        sys.exit(1)
+
+
+def find_parallel_dirs(parallel_root):
+    """
+    Find all source_translated/source_reviewed directories in the Parallel_v2 layout:
+    LANG_PAIR/DOMAIN/SUB_DOMAIN/translation_text/TYPE
+    """
+    found = []
+    for root, dirs, files in os.walk(parallel_root):
+        folder_type = os.path.basename(root)
+        if folder_type not in FOLDERS_TO_EXPORT:
+            continue
+
+        info = corpus_paths.lookup(root, layout='Parallel_v2')
+        if info is None:
+            continue
+
+        found.append({
+            "path": root,
+            "lang_pair": info.lang_pair,
+            "domain": info.domain,
+            "sub_domain": info.sub_domain,
+            "type": folder_type,
+            "files": sorted(f for f in files if f.endswith('.txt'))
+        })
+    return found
+
+
+def read_pairs(file_path):
+    """
+    Yield (line_no, source, target) for every pair of a file, skipping headers and malformed lines.
+    Undecodable bytes become U+FFFD, as before the shared reader.
+    """
+    file_stats = TSVStats(file_path)
+    for batch in read_tsv(file_path, stats=file_stats, errors='replace'):
+        for src, tgt, line_no in batch:
+            yield line_no, src, tgt
+    if file_stats.malformed:
+        print(f"Warning: {file_stats.malformed} malformed line(s) skipped in {file_path}")
+    if file_stats.replaced:
+        print(f"Warning: {file_stats.replaced} undecodable byte(s) replaced in {file_path}")
+
+
+def partition_file(dataset_dir, dir_info):
+    """Parquet file that holds one source directory (one sub-domain of one partition)."""
+    return os.path.join(
+        dataset_dir,
+        f"lang_pair={dir_info['lang_pair']}",
+        f"domain={dir_info['domain']}",
+        f"type={dir_info['type']}",
+        f"{dir_info['sub_domain']}.parquet"
+    )
+
+
+def export_dir(dir_info, out_path):
+    """Stream every file of one source directory into a single Parquet file, row group by row group."""
+    tmp_path = out_path + ".tmp"
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    rows = 0
+
+    try:
+        with pq.ParquetWriter(tmp_path, FILE_SCHEMA, compression="zstd") as writer:
+            buffer = {name: [] for name in FILE_SCHEMA.names}
+
+            def flush():
+                if buffer["source"]:
+                    writer.write_table(pa.table(buffer, schema=FILE_SCHEMA))
+                    for column in buffer.values():
+                        column.clear()
+
+            for filename in dir_info["files"]:
+                for line_no, src, tgt in read_pairs(os.path.join(dir_info["path"], filename)):
+                    buffer["source"].append(src)
+                    buffer["target"].append(tgt)
+                    buffer["source_words"].append(len(src.split()))
+                    buffer["sub_domain"].append(dir_info["sub_domain"])
+                    buffer["file"].append(filename)
+                    buffer["line_no"].append(line_no)
+                    rows += 1
+                    if len(buffer["source"]) >= ROW_GROUP_SIZE:
+                        flush()
+            flush()
+    except BaseException:
+        # Never leave a half-written partition behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, out_path)
+    return rows
+
+
+def export_tree(parallel_root, dataset_dir, overwrite=False):
+    """
+    Convert the Parallel_v2 tree into a hive-partitioned Parquet dataset.
+    A sub-domain is only re-exported if one of its files is newer than its Parquet file.
+    """
+    require_pyarrow()
+    dirs = find_parallel_dirs(parallel_root)
+    print(f"Found {len(dirs)} translation directories in {parallel_root}")
+
+    exported = skipped = total_rows = 0
+    failed = []
+    for dir_info in dirs:
+        out_path = partition_file(dataset_dir, dir_info)
+        if not dir_info["files"]:
+            continue
+
+        try:
+            if not overwrite and os.path.exists(out_path):
+                newest_input = max(os.path.getmtime(os.path.join(dir_info["path"], f)) for f in dir_info["files"])
+                if os.path.getmtime(out_path) >= newest_input:
+                    skipped += 1
+                    continue
+
+            rows = export_dir(dir_info, out_path)
+        except Exception as e:
+            # One unreadable directory does not stop the export; the old partition (if any) is kept
+            print(f"Error: Could not export {dir_info['path']}: {e}")
+            failed.append(dir_info["path"])
+            continue
+        total_rows += rows
+        exported += 1
+        print(f"  - Exported {rows} pairs: {out_path}")
+
+    print(f"\nExported {exported} partitions ({total_rows} pairs), {skipped} unchanged partitions skipped.")
+    if failed:
+        print(f"{len(failed)} directories could not be exported:")
+        for path in failed:
+            print(f"  - {path}")
+    return failed
+
+
+def open_dataset(dataset_dir):
+    """Open the dataset with the partition keys as columns."""
+    require_pyarrow()
+    return ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING)
+
+
+def build_filter(lang_pairs=None, domains=None, types=None, sub_domains=None, min_words=None, max_words=None):
+    """Build a dataset filter expression; partition keys prune whole folders, word bounds use row group statistics."""
+    conditions = []
+    if lang_pairs:
+        conditions.append(ds.field("lang_pair").isin(lang_pairs))
+    if domains:
+        conditions.append(ds.field("domain").isin(domains))
+    if types:
+        conditions.append(ds.field("type").isin(types))
+    if sub_domains:
+        conditions.append(ds.field("sub_domain").isin(sub_domains))
+    if min_words is not None:
+        conditions.append(ds.field("source_words") >= min_words)
+    if max_words is not None:
+        conditions.append(ds.field("source_words") <= max_words)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def query(dataset_dir, columns=None, **filters):
+    """Return the matching rows as a pyarrow Table."""
+    dataset = open_dataset(dataset_dir)
+    return dataset.to_table(columns=columns, filter=build_filter(**filters))
+
+
+def count(dataset_dir, **filters):
+    """Count the matching rows without materialising them."""
+    dataset = open_dataset(dataset_dir)
+    return dataset.count_rows(filter=build_filter(**filters))
+
+
+def import_tree(dataset_dir, parallel_root, **filters):
+    """Write the (filtered) dataset back into the Parallel_v2 layout as tab-separated files."""
+    dataset = open_dataset(dataset_dir)
+    written = 0
+    handles = OrderedDict()
+    created = set()
+    try:
+        for batch in dataset.to_batches(filter=build_filter(**filters)):
+            for row in batch.to_pylist():
+                key = (row["lang_pair"], row["domain"], row["sub_domain"], row["type"], row["file"])
+                handle = handles.get(key)
+                if handle is None:
+                    if len(handles) >= MAX_OPEN_FILES:
+                        handles.popitem(last=False)[1].close()
+                    out_dir = os.path.join(parallel_root, key[0], key[1], key[2], "translation_text", key[3])
+                    if key not in created:
+                        os.makedirs(out_dir, exist_ok=True)
+                    # Truncate on the first open only; a file closed by the LRU is continued
+                    handle = handles[key] = open(os.path.join(out_dir, key[4]), 'a' if key in created else 'w', encoding='utf-8')
+                    created.add(key)
+                else:
+                    handles.move_to_end(key)
+                handle.write(f"{row['source']}\t{row['target']}\n")
+                written += 1
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    print(f"Wrote {written} pairs into {len(created)} files under {parallel_root}")
+
+
+def add_filter_arguments(parser):
+    parser.add_argument("--lang-pair", nargs="+", help="Language pairs to keep (e.g. HIN-BAN HIN-ODI)")
+    parser.add_argument("--domain", nargs="+", help="Domains to keep (e.g. EDU GOV)")
+    parser.add_argument("--type", nargs="+", choices=sorted(FOLDERS_TO_EXPORT), help="Bi-text types to keep")
+    parser.add_argument("--sub-domain", nargs="+", help="Sub-domains to keep")
+    parser.add_argument("--min-words", type=int, help="Minimum number of source words")
+    parser.add_argument("--max-words", type=int, help="Maximum number of source words")
+
+
+def filters_from_args(args):
+    return {
+        "lang_pairs": args.lang_pair,
+        "domains": args.domain,
+        "types": args.type,
+        "sub_domains": args.sub_domain,
+        "min_words": args.min_words,
+        "max_words": args.max_words
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar Parquet store for the Parallel_v2 tree")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Convert the Parallel_v2 tree into a Parquet dataset")
+    export_parser.add_argument("parallel_root", help="Path to the Parallel_v2 folder")
+    export_parser.add_argument("dataset", help="Path to the Parquet dataset folder")
+    export_parser.add_argument("--overwrite", action="store_true", help="Re-export partitions even if they are up to date")
+
+    query_parser = subparsers.add_parser("query", help="Select pairs from the dataset")
+    query_parser.add_argument("dataset", help="Path to the Parquet dataset folder")
+    add_filter_arguments(query_parser)
+    query_parser.add_argument("-o", "--output", help="Path to save the matching pairs as TSV")
+    query_parser.add_argument("--count", action="store_true", help="Only print the number of matching pairs")
+
+    import_parser = subparsers.add_parser("import", help="Write the dataset back as tab-separated files")
+    import_parser.add_argument("dataset", help="Path to the Parquet dataset folder")
+    import_parser.add_argument("parallel_root", help="Path of the Parallel_v2-style folder to create")
+    add_filter_arguments(import_parser)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        if not os.path.isdir(args.parallel_root):
+            print(f"Error: {args.parallel_root} is not a valid directory")
+            return
+        if export_tree(args.parallel_root, args.dataset, args.overwrite):
+            return 1
+
+    elif args.command == "query":
+        filters = filters_from_args(args)
+        if args.count or not args.output:
+            print(f"Matching pairs: {count(args.dataset, **filters)}")
+        if args.output:
+            table = query(args.dataset, columns=["source", "target"], **filters)
+            with open(args.output, 'w', encoding='utf-8') as f:
+                for src, tgt in zip(table.column("source").to_pylist(), table.column("target").to_pylist()):
+                    f.write(f"{src}\t{tgt}\n")
+            print(f"Saved {table.num_rows} pairs to {args.output}")
+
+    elif args.command == "import":
+        import_tree(args.dataset, args.parallel_root, **filters_from_args(args))
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,373 @@
+# How to use:
+'''
+
+python3 pipeline.py pipeline_example.json - run every stage whose inputs changed since the last run
+python3 pipeline.py pipeline_example.json --dry-run - only show which stages would run
+python3 pipeline.py pipeline_example.json --only filter_data - run one stage (and nothing downstream)
+python3 pipeline.py pipeline_example.json --force combine_stats - rerun a stage even if its inputs are unchanged
+python3 pipeline.py pipeline_example.json --var parallel_root=/data/Parallel_v2 -j 4
+PIPELINE_PARALLEL_ROOT=/data/Parallel_v2 python3 pipeline.py pipeline_example.json - the same, from the environment
+
+Variables that are null in the config (all the paths of pipeline_example.json) have to be set
+with --var NAME=VALUE or a PIPELINE_<NAME> environment variable.
+
+'''
+
+import os
+import sys
+import json
+import time
+import shlex
+import hashlib
+import argparse
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# --- Configuration ---
+# Number of stages that may run at the same time.
+MAX_PARALLEL = 2
+# Files are read in blocks of this size when hashed.
+HASH_BLOCK_SIZE = 1 << 20
+
+
+class HashCache:
+    """
+    Content hashes of files, reused while a file's size and mtime stay the same,
+    so an unchanged tree is not read again on every run.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def file_hash(self, path):
+        st = os.stat(path)
+        entry = self.entries.get(path)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        self.entries[path] = [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path_hash(self, path):
+        """Hash of a file, or of all file names and contents below a directory. None if missing."""
+        if os.path.isfile(path):
+            return self.file_hash(path)
+        if not os.path.isdir(path):
+            return None
+
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                full_path = os.path.join(root, filename)
+                digest.update(os.path.relpath(full_path, path).encode('utf-8', 'surrogateescape'))
+                digest.update(self.file_hash(full_path).encode('ascii'))
+        return digest.hexdigest()
+
+
+class Stage:
+    """One step of the pipeline: a command with declared inputs and outputs."""
+
+    def __init__(self, name, command, inputs=(), outputs=(), after=(), stdin=None, cwd=None):
+        self.name = name
+        self.command = command
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.after = list(after)
+        self.stdin = stdin
+        self.cwd = cwd
+
+    @classmethod
+    def from_config(cls, entry, variables, base_dir):
+        def expand(value):
+            value = value.format(**variables)
+            return value if os.path.isabs(value) else os.path.normpath(os.path.join(base_dir, value))
+
+        command = entry["command"]
+        if isinstance(command, str):
+            command = shlex.split(command)
+
+        return cls(
+            name=entry["name"],
+            command=[arg.format(**variables) for arg in command],
+            inputs=[expand(p) for p in entry.get("inputs", [])],
+            outputs=[expand(p) for p in entry.get("outputs", [])],
+            after=entry.get("after", []),
+            stdin=entry["stdin"].format(**variables) if "stdin" in entry else None,
+            cwd=expand(entry.get("cwd", "."))
+        )
+
+
+class Pipeline:
+    """
+    Runs the stages in dependency order. A stage depends on the stages listed in its
+    'after' field and on every stage that writes one of its inputs: an output equal to an
+    input, inside an input directory, or a directory the input lies in. A stage is skipped
+    when its command and the content of its inputs are the same as after its last successful
+    run and its outputs still exist. The inputs are hashed again after a stage succeeds, so a
+    stage that changes its own inputs (deletes the zips it unpacked, removes junk folders) is
+    compared with what it left behind.
+    """
+
+    def __init__(self, stages, state_path, max_parallel=MAX_PARALLEL):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.max_parallel = max_parallel
+        self.state = {"hashes": {}, "stages": {}}
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        self.hashes = HashCache(self.state.get("hashes"))
+        self.deps = self._dependencies()
+
+    def _dependencies(self):
+        producers = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                producers[output] = stage.name
+
+        deps = {}
+        for stage in self.stages.values():
+            names = set(stage.after)
+            for input_path in stage.inputs:
+                for output, producer in producers.items():
+                    # An input equal to, inside, or containing another stage's output depends on it
+                    if producer != stage.name and (input_path == output or input_path.startswith(output + os.sep)
+                                                   or output.startswith(input_path + os.sep)):
+                        names.add(producer)
+            unknown = names - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {', '.join(sorted(unknown))}")
+            deps[stage.name] = names
+
+        # Reject cycles before anything runs
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage '{name}'")
+            visiting.add(name)
+            for dep in deps[name]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in deps:
+            visit(name)
+        return deps
+
+    def stage_key(self, stage):
+        """Content address of a stage run: its command plus the hashes of its inputs."""
+        digest = hashlib.sha256(json.dumps([stage.command, stage.stdin]).encode('utf-8'))
+        for input_path in sorted(stage.inputs):
+            digest.update(input_path.encode('utf-8'))
+            digest.update(str(self.hashes.path_hash(input_path)).encode('ascii'))
+        return digest.hexdigest()
+
+    def is_up_to_date(self, stage, key):
+        previous = self.state["stages"].get(stage.name)
+        return (previous is not None and previous.get("key") == key and previous.get("status") == "ok"
+                and all(os.path.exists(output) for output in stage.outputs))
+
+    def run_stage(self, stage):
+        print(f"[{stage.name}] $ {' '.join(shlex.quote(arg) for arg in stage.command)}")
+        start = time.perf_counter()
+        result = subprocess.run(
+            stage.command,
+            cwd=stage.cwd,
+            input=stage.stdin,
+            text=True,
+            capture_output=True
+        )
+        elapsed = time.perf_counter() - start
+
+        log_tail = (result.stdout + result.stderr).strip().splitlines()[-5:]
+        for line in log_tail:
+            print(f"[{stage.name}]   {line}")
+        return result.returncode, elapsed
+
+    def run(self, only=None, force=(), dry_run=False):
+        """Run the pipeline; returns a record of what happened to every stage."""
+        selected = set(only) if only else set(self.stages)
+        pending = {name for name in selected}
+        finished, failed = set(), set()
+        # Dry run: stages that would run, so the stages after them would see new inputs
+        would_run = set()
+        record = {}
+        running = {}
+
+        def ready(name):
+            # Stages outside the selection count as done
+            return all(dep in finished or dep not in selected for dep in self.deps[name])
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while pending or running:
+                for name in sorted(pending):
+                    if any(dep in failed for dep in self.deps[name]):
+                        pending.discard(name)
+                        failed.add(name)
+                        record[name] = {"status": "blocked"}
+                        print(f"[{name}] blocked by a failed upstream stage")
+                        continue
+                    if not ready(name) or len(running) >= self.max_parallel:
+                        continue
+
+                    stage = self.stages[name]
+                    pending.discard(name)
+                    key = self.stage_key(stage)
+                    upstream = sorted(dep for dep in self.deps[name] if dep in would_run)
+                    if dry_run and upstream:
+                        # Its inputs are not written yet, so the current hashes say nothing
+                        finished.add(name)
+                        would_run.add(name)
+                        record[name] = {"status": "would-run", "key": None}
+                        print(f"[{name}] would run (after {', '.join(upstream)})")
+                    elif name not in force and self.is_up_to_date(stage, key):
+                        finished.add(name)
+                        record[name] = {"status": "cached", "key": key}
+                        print(f"[{name}] up to date, skipped")
+                    elif dry_run:
+                        finished.add(name)
+                        would_run.add(name)
+                        record[name] = {"status": "would-run", "key": key}
+                        print(f"[{name}] would run")
+                    else:
+                        running[executor.submit(self.run_stage, stage)] = (name, key)
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key = running.pop(future)
+                    try:
+                        returncode, elapsed = future.result()
+                    except OSError as e:
+                        print(f"[{name}] could not start: {e}")
+                        returncode, elapsed = -1, 0.0
+
+                    status = "ok" if returncode == 0 else "failed"
+                    if status == "ok":
+                        # The stage may have consumed or cleaned its inputs: store the key of what it left
+                        key = self.stage_key(self.stages[name])
+                    record[name] = {"status": status, "key": key, "returncode": returncode, "seconds": round(elapsed, 2)}
+                    if status == "ok":
+                        finished.add(name)
+                        self.state["stages"][name] = {"key": key, "status": "ok", "finished": datetime.now().isoformat()}
+                        print(f"[{name}] done in {elapsed:.1f}s")
+                    else:
+                        failed.add(name)
+                        print(f"[{name}] FAILED with exit code {returncode}")
+
+        if not dry_run:
+            self.save_state()
+        return record
+
+    def save_state(self):
+        self.state["hashes"] = self.hashes.entries
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+
+def load_config(config_path, overrides=()):
+    """
+    Read the pipeline config; '{name}' in commands and paths is replaced from its 'vars',
+    then PIPELINE_<NAME> environment variables, then the NAME=VALUE overrides.
+
+    Raises:
+        ValueError: If a variable that is null in the config is not set.
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    variables = dict(config.get("vars", {}))
+    for name in variables:
+        env_name = "PIPELINE_" + name.upper()
+        if env_name in os.environ:
+            variables[name] = os.environ[env_name]
+    for override in overrides:
+        name, _, value = override.partition("=")
+        variables[name] = value
+    variables.setdefault("python", sys.executable)
+
+    missing = sorted(name for name, value in variables.items() if value is None)
+    if missing:
+        raise ValueError("Set the variable(s) " + ", ".join(missing) + " with "
+                         + " ".join(f"--var {name}=..." for name in missing) + " or the environment variable(s) "
+                         + ", ".join("PIPELINE_" + name.upper() for name in missing))
+
+    base_dir = os.path.dirname(os.path.abspath(config_path))
+    stages = [Stage.from_config(entry, variables, base_dir) for entry in config["stages"]]
+    return config, variables, stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the biweekly processing stages, skipping the ones whose inputs did not change")
+    parser.add_argument("config", help="Pipeline JSON file (see pipeline_example.json)")
+    parser.add_argument("--only", nargs="+", help="Run only these stages")
+    parser.add_argument("--force", nargs="+", default=[], help="Run these stages even if they are up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Only show which stages would run")
+    parser.add_argument("--var", "--set", dest="set", action="append", default=[], metavar="NAME=VALUE",
+                        help="Set a variable of the config (also PIPELINE_<NAME> in the environment)")
+    parser.add_argument("-j", "--jobs", type=int, default=MAX_PARALLEL, help=f"Stages run at the same time (default: {MAX_PARALLEL})")
+    parser.add_argument("--state", help="State file (default: .pipeline_state.json next to the config)")
+    parser.add_argument("--runs-dir", help="Folder for the run records (default: pipeline_runs next to the config)")
+    args = parser.parse_args()
+
+    try:
+        config, variables, stages = load_config(args.config, args.set)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    base_dir = os.path.dirname(os.path.abspath(args.config))
+    state_path = args.state or os.path.join(base_dir, ".pipeline_state.json")
+
+    try:
+        pipeline = Pipeline(stages, state_path, args.jobs)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    unknown = set(args.only or []) - set(pipeline.stages)
+    if unknown:
+        print(f"Error: unknown stage(s): {', '.join(sorted(unknown))}")
+        return 1
+
+    started = datetime.now()
+    record = pipeline.run(args.only, set(args.force), args.dry_run)
+
+    # Record the configuration and outcome of this run
+    if not args.dry_run:
+        runs_dir = args.runs_dir or os.path.join(base_dir, "pipeline_runs")
+        os.makedirs(runs_dir, exist_ok=True)
+        run_path = os.path.join(runs_dir, started.strftime("%Y%m%d_%H%M%S_%f") + ".json")
+        with open(run_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "started": started.isoformat(),
+                "finished": datetime.now().isoformat(),
+                "config": os.path.abspath(args.config),
+                "vars": variables,
+                "stages": [{"name": s.name, "command": s.command, "inputs": s.inputs, "outputs": s.outputs} for s in stages],
+                "result": record
+            }, f, indent=2)
+        print(f"\nRun record saved to {run_path}")
+
+    print("\nSUMMARY:")
+    for name in pipeline.stages:
+        if name in record:
+            print(f"  - {name:<28} {record[name]['status']}")
+
+    return 1 if any(r["status"] in ("failed", "blocked") for r in record.values()) else 0
+
+
+if __name__ == "__main__":
+    exit(main())
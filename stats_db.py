@@ -0,0 +1,379 @@
+# How to use:
+'''
+
+The stat scripts write into the database with --db (and --db-label, default: the name of the scanned folder):
+
+python3 combine_translated_files.py /path/to/iitp -c stats_iitp_31Jul.csv --db stats.db
+python3 monolingual_stats.py /path/to/Monolingual --db stats.db
+python3 Filtering/word_count_distribution.py /path/to/Domain_Wise --db stats.db
+python3 Filtering/compare_old_new_word_count_post_filtering.py /path/to/Domain_Wise /path/to/Filtered --db stats.db
+
+Then:
+
+python3 stats_db.py runs stats.db - list the runs
+python3 stats_db.py biweekly stats.db --label iitp -o iitp_biweekly_31Jul.csv - what biweekly_stats.ipynb computed
+python3 stats_db.py export stats.db translation_trend -o trend.csv - any table or view as CSV
+python3 stats_db.py query stats.db "SELECT * FROM institute_counts WHERE lang_pair = 'HIN-BAN'"
+python3 stats_db.py import stats.db stats_iitp_21Jul.csv --label iitp --date 2025-07-21 - load an old combine CSV
+
+'''
+
+import os
+import sys
+import csv
+import json
+import uuid
+import sqlite3
+import argparse
+from datetime import datetime
+
+import corpus_paths
+import instrumentation
+
+# --- Configuration ---
+STATS_DB = "stats.db"
+# Columns of the combine_translated_files.py CSV, also used for the biweekly delta.
+TRANSLATION_COLUMNS = ["Language Pair", "Domain", "Type", "Files", "Lines", "Words"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    script TEXT NOT NULL,
+    label TEXT,
+    root TEXT,
+    started TEXT NOT NULL,
+    argv TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_label ON runs (script, label, started);
+
+-- One row per file ever counted, with the metadata of its folder (NULL for malformed paths)
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    lang_pair TEXT,
+    domain TEXT,
+    sub_domain TEXT,
+    folder_type TEXT
+);
+CREATE INDEX IF NOT EXISTS files_by_group ON files (lang_pair, domain, sub_domain, folder_type);
+
+-- Per-file counts of a run; filtered_lines only for compare_old_new_word_count_post_filtering.py
+CREATE TABLE IF NOT EXISTS file_counts (
+    run_id TEXT NOT NULL REFERENCES runs,
+    file_id INTEGER NOT NULL REFERENCES files,
+    lines INTEGER,
+    words INTEGER,
+    bytes INTEGER,
+    mtime REAL,
+    filtered_lines INTEGER,
+    PRIMARY KEY (run_id, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS file_counts_by_file ON file_counts (file_id);
+
+-- Per-file histograms, e.g. name 'source_words' with the bins of word_count_distribution.py
+CREATE TABLE IF NOT EXISTS distributions (
+    run_id TEXT NOT NULL REFERENCES runs,
+    file_id INTEGER NOT NULL REFERENCES files,
+    name TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (run_id, name, file_id, bucket)
+) WITHOUT ROWID;
+
+-- The rows of the combine_translated_files.py CSV (also loaded from old CSVs by 'import')
+CREATE TABLE IF NOT EXISTS translation_counts (
+    run_id TEXT NOT NULL REFERENCES runs,
+    lang_pair TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    folder_type TEXT NOT NULL,
+    files INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    PRIMARY KEY (run_id, lang_pair, domain, folder_type)
+) WITHOUT ROWID;
+
+-- The rows of monolingual_stats.py
+CREATE TABLE IF NOT EXISTS monolingual_counts (
+    run_id TEXT NOT NULL REFERENCES runs,
+    language TEXT NOT NULL,
+    category TEXT NOT NULL,
+    primary_domain TEXT NOT NULL,
+    files INTEGER,
+    lines INTEGER,
+    words INTEGER,
+    chars INTEGER,
+    empty_lines INTEGER,
+    undecodable_bytes INTEGER,
+    unique_lines INTEGER,
+    PRIMARY KEY (run_id, language, category, primary_domain)
+) WITHOUT ROWID;
+
+-- Every run with the run of the same script and label before it. started has whole seconds,
+-- so runs of the same second are ordered by rowid, i.e. in the order they were saved.
+-- (Dropped first: databases created before the rowid tie-break had run_id there.)
+DROP VIEW IF EXISTS run_sequence;
+CREATE VIEW run_sequence AS
+SELECT run_id, script, label, root, started,
+       LAG(run_id) OVER (PARTITION BY script, label ORDER BY started, rowid) AS previous_run_id
+FROM runs;
+
+DROP VIEW IF EXISTS latest_runs;
+CREATE VIEW latest_runs AS
+SELECT * FROM runs r
+WHERE NOT EXISTS (SELECT 1 FROM runs n WHERE n.script = r.script AND n.label IS r.label
+                  AND (n.started, n.rowid) > (r.started, r.rowid));
+
+-- New lines and words since the previous run of the same label, as biweekly_stats.ipynb
+-- (files are the current count; groups that are new count from 0)
+CREATE VIEW IF NOT EXISTS translation_deltas AS
+SELECT s.run_id, s.label, s.started, s.previous_run_id, c.lang_pair, c.domain, c.folder_type, c.files,
+       c.lines - COALESCE(p.lines, 0) AS lines, c.words - COALESCE(p.words, 0) AS words
+FROM run_sequence s
+JOIN translation_counts c ON c.run_id = s.run_id
+LEFT JOIN translation_counts p ON p.run_id = s.previous_run_id AND p.lang_pair = c.lang_pair
+     AND p.domain = c.domain AND p.folder_type = c.folder_type;
+
+-- Per-institute (run label) rollup of the latest run of every label
+CREATE VIEW IF NOT EXISTS institute_counts AS
+SELECT r.label AS institute, r.started, c.lang_pair, c.domain, c.folder_type,
+       SUM(c.files) AS files, SUM(c.lines) AS lines, SUM(c.words) AS words
+FROM latest_runs r JOIN translation_counts c USING (run_id)
+GROUP BY r.run_id, c.lang_pair, c.domain, c.folder_type;
+
+CREATE VIEW IF NOT EXISTS translation_trend AS
+SELECT r.label, r.started, c.lang_pair, c.folder_type,
+       SUM(c.files) AS files, SUM(c.lines) AS lines, SUM(c.words) AS words
+FROM runs r JOIN translation_counts c USING (run_id)
+GROUP BY r.run_id, c.lang_pair, c.folder_type;
+
+CREATE VIEW IF NOT EXISTS sub_domain_counts AS
+SELECT c.run_id, f.lang_pair, f.domain, f.sub_domain, f.folder_type,
+       COUNT(*) AS files, SUM(c.lines) AS lines, SUM(c.words) AS words
+FROM file_counts c JOIN files f USING (file_id)
+GROUP BY c.run_id, f.lang_pair, f.domain, f.sub_domain, f.folder_type;
+
+-- Lines removed by the filtering, per sub-domain (compare_old_new_word_count_post_filtering.py)
+CREATE VIEW IF NOT EXISTS filtering_loss AS
+SELECT c.run_id, f.lang_pair, f.domain, f.sub_domain, f.folder_type,
+       SUM(c.lines) AS lines_old, SUM(c.filtered_lines) AS lines_filtered,
+       SUM(c.lines) - SUM(c.filtered_lines) AS difference
+FROM file_counts c JOIN files f USING (file_id)
+WHERE c.filtered_lines IS NOT NULL
+GROUP BY c.run_id, f.lang_pair, f.domain, f.sub_domain, f.folder_type;
+
+-- Lines and words per week of the file mtimes (weeks start on Monday, as in throughput.py)
+-- of the latest run of every label
+CREATE VIEW IF NOT EXISTS weekly_throughput AS
+SELECT r.label AS institute, f.lang_pair, f.domain, f.sub_domain, f.folder_type,
+       date(c.mtime, 'unixepoch', 'localtime', 'weekday 0', '-6 days') AS week,
+       COUNT(*) AS files, SUM(c.lines) AS lines, SUM(c.words) AS words
+FROM latest_runs r JOIN file_counts c USING (run_id) JOIN files f USING (file_id)
+WHERE c.mtime IS NOT NULL AND r.script = 'combine_translated_files'
+GROUP BY r.run_id, f.lang_pair, f.domain, f.sub_domain, f.folder_type, week;
+
+CREATE VIEW IF NOT EXISTS distribution_counts AS
+SELECT d.run_id, d.name, f.lang_pair, f.domain, f.folder_type, d.bucket, SUM(d.count) AS count
+FROM distributions d JOIN files f USING (file_id)
+GROUP BY d.run_id, d.name, f.lang_pair, f.domain, f.folder_type, d.bucket;
+"""
+
+
+def connect(db_path):
+    """Open (and create, or bring up to date) the stats database."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def add_arguments(parser):
+    """Add the --db and --db-label options to an argparse parser."""
+    group = parser.add_argument_group("stats database")
+    group.add_argument("--db", help=f"Also write the statistics to this SQLite database (e.g. {STATS_DB})")
+    group.add_argument("--db-label", help="Label of the run in the database, e.g. the institute (default: name of the scanned folder)")
+    return parser
+
+
+def _file_ids(conn, paths):
+    """{path: file_id}, adding the files that are new with the metadata of their folder."""
+    ids = {}
+    for path in dict.fromkeys(paths):
+        row = conn.execute("SELECT file_id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            ids[path] = row[0]
+            continue
+        try:
+            info = corpus_paths.resolve_file(path)
+        except corpus_paths.MalformedPath:
+            info = None
+        ids[path] = conn.execute(
+            "INSERT INTO files (path, lang_pair, domain, sub_domain, folder_type) VALUES (?, ?, ?, ?, ?)",
+            (path, *(info[:4] if info else (None,) * 4))
+        ).lastrowid
+    return ids
+
+
+def record_run(db_path, script, root=None, label=None, files=(), distributions=(), translation_counts=(),
+               monolingual_counts=(), started=None):
+    """
+    Write one run and its rows in a single transaction.
+
+    Args:
+        files: dicts with path and any of lines, words, bytes, mtime, filtered_lines.
+        distributions: (path, name, {bucket: count}) tuples.
+        translation_counts: (lang pair, domain, type, files, lines, words) tuples, as the combine CSV.
+        monolingual_counts: dicts keyed by monolingual_stats.FIELDNAMES.
+        started (str): ISO time of the run (default: the start of the current instrumented run).
+
+    Returns:
+        str: The run id (the run id of the run log when called inside instrumented_run).
+    """
+    monitor = instrumentation.get_monitor()
+    run_id = monitor.run_id if monitor.name else uuid.uuid4().hex[:12]
+    started = started or (monitor.started if monitor.name else datetime.now().isoformat(timespec="seconds"))
+    root = os.path.abspath(root) if root else None
+    if label is None and root:
+        label = os.path.basename(os.path.normpath(root))
+    files = list(files)
+    distributions = list(distributions)
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                         (run_id, script, label, root, started, json.dumps(sys.argv, ensure_ascii=False)))
+            ids = _file_ids(conn, [os.path.abspath(f["path"]) for f in files] +
+                            [os.path.abspath(path) for path, _, _ in distributions])
+            conn.executemany(
+                "INSERT OR REPLACE INTO file_counts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((run_id, ids[os.path.abspath(f["path"])], f.get("lines"), f.get("words"), f.get("bytes"), f.get("mtime"),
+                  f.get("filtered_lines")) for f in files)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO distributions VALUES (?, ?, ?, ?, ?)",
+                ((run_id, ids[os.path.abspath(path)], name, bucket, count)
+                 for path, name, bins in distributions for bucket, count in bins.items())
+            )
+            conn.executemany("INSERT OR REPLACE INTO translation_counts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             ((run_id, *row) for row in translation_counts))
+            conn.executemany(
+                "INSERT OR REPLACE INTO monolingual_counts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((run_id, r["Language"], r["Category"], r["Primary_Domain"], r["Num_Files"], r["Num_Lines"], r["Num_Words"],
+                  r["Num_Chars"], r["Num_Empty_Lines"], r["Undecodable_Bytes"], r["Unique_Lines"]) for r in monolingual_counts)
+            )
+    finally:
+        conn.close()
+    print(f"Run {run_id} saved to database {db_path}")
+    return run_id
+
+
+def import_translation_csv(db_path, csv_path, label, started):
+    """Load a CSV written by combine_translated_files.py -c (the TOTAL row is skipped) as a run."""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = [(r["Language Pair"], r["Domain"], r["Type"], int(float(r["Files"])), int(float(r["Lines"])), int(float(r["Words"])))
+                for r in csv.DictReader(f) if r["Language Pair"] != "TOTAL"]
+    return record_run(db_path, "combine_translated_files", root=None, label=label, translation_counts=rows, started=started)
+
+
+def biweekly(conn, label, run_id=None):
+    """The translation_deltas rows of a run (default: the latest run of the label), as the combine CSV columns."""
+    if run_id is None:
+        row = conn.execute("SELECT run_id FROM latest_runs WHERE script = 'combine_translated_files' AND label IS ?",
+                           (label,)).fetchone()
+        if row is None:
+            raise ValueError(f"No combine_translated_files run with label '{label}'")
+        run_id = row[0]
+    return conn.execute(
+        "SELECT lang_pair, domain, folder_type, files, lines, words FROM translation_deltas WHERE run_id = ? "
+        "ORDER BY lang_pair, domain, folder_type", (run_id,)
+    ).fetchall()
+
+
+def write_csv(output, header, rows):
+    if output:
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        print(f"Saved {len(rows)} rows to {output}")
+    else:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query, export and import the SQLite stats database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    runs_parser = subparsers.add_parser("runs", help="List the runs")
+    runs_parser.add_argument("db", help="Stats database")
+
+    biweekly_parser = subparsers.add_parser("biweekly", help="Lines and words added since the previous run of a label")
+    biweekly_parser.add_argument("db", help="Stats database")
+    biweekly_parser.add_argument("--label", required=True, help="Label of the combine runs, e.g. iitp")
+    biweekly_parser.add_argument("--run", help="Run id (default: the latest run of the label)")
+    biweekly_parser.add_argument("-o", "--output", help="CSV to write (default: print)")
+
+    export_parser = subparsers.add_parser("export", help="Write a table or view as CSV")
+    export_parser.add_argument("db", help="Stats database")
+    export_parser.add_argument("name", help="Table or view, e.g. translation_counts, translation_deltas, sub_domain_counts")
+    export_parser.add_argument("--run", help="Only the rows of this run id")
+    export_parser.add_argument("-o", "--output", help="CSV to write (default: print)")
+
+    query_parser = subparsers.add_parser("query", help="Run an SQL query")
+    query_parser.add_argument("db", help="Stats database")
+    query_parser.add_argument("sql", help="SELECT statement")
+    query_parser.add_argument("-o", "--output", help="CSV to write (default: print)")
+
+    import_parser = subparsers.add_parser("import", help="Load a combine_translated_files.py CSV written before the database")
+    import_parser.add_argument("db", help="Stats database")
+    import_parser.add_argument("csv", help="CSV with the columns " + ", ".join(TRANSLATION_COLUMNS))
+    import_parser.add_argument("--label", required=True, help="Label of the run, e.g. iitp")
+    import_parser.add_argument("--date", required=True, help="Date of the stats, e.g. 2025-07-21")
+
+    args = parser.parse_args()
+    if args.command == "import":
+        import_translation_csv(args.db, args.csv, args.label, args.date)
+        return 0
+
+    if not os.path.isfile(args.db):
+        print(f"Error: {args.db} is not a valid file")
+        return 1
+    conn = connect(args.db)
+    try:
+        if args.command == "runs":
+            rows = conn.execute("SELECT run_id, script, label, started, root FROM runs ORDER BY started, rowid").fetchall()
+            print(f"{'Run':<12} | {'Script':<42} | {'Label':<16} | {'Started':<19} | Root")
+            print("-" * 110)
+            for run_id, script, label, started, root in rows:
+                print(f"{run_id:<12} | {script:<42} | {label or '':<16} | {started:<19} | {root or ''}")
+        elif args.command == "biweekly":
+            try:
+                write_csv(args.output, TRANSLATION_COLUMNS, biweekly(conn, args.label, args.run))
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+        else:
+            if args.command == "export":
+                names = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+                if args.name not in names:
+                    print(f"Error: No table or view '{args.name}' (there are: {', '.join(sorted(names))})", file=sys.stderr)
+                    return 1
+                sql, params = f'SELECT * FROM "{args.name}"', ()
+                if args.run:
+                    sql, params = sql + " WHERE run_id = ?", (args.run,)
+            else:
+                sql, params = args.sql, ()
+            try:
+                cursor = conn.execute(sql, params)
+            except sqlite3.Error as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+            write_csv(args.output, [d[0] for d in cursor.description], cursor.fetchall())
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
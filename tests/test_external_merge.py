@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from external_merge import SortedRuns, merge_by_key
+
+
+class SortedRunsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_carriage_return_in_spilled_value(self):
+        with SortedRuns(self.tmp.name, run_size=2) as runs:
+            runs['a'] = 'x\ry'
+            runs['b'] = '1'
+            runs['c'] = '2'
+            self.assertTrue(runs.paths)
+            self.assertEqual(list(runs), [('a', 'x\ry'), ('b', '1'), ('c', '2')])
+
+    def test_spilled_matches_in_memory(self):
+        pairs = [('k%d' % (i % 7), 'v%d\r' % i) for i in range(20)]
+        with SortedRuns(self.tmp.name, run_size=3) as spilled, SortedRuns(self.tmp.name) as in_memory:
+            for key, value in pairs:
+                spilled[key] = value
+                in_memory[key] = value
+            self.assertEqual(list(spilled), list(in_memory))
+            self.assertEqual(dict(spilled), dict(pairs))
+
+    def test_merge_by_key_after_spill(self):
+        with SortedRuns(self.tmp.name, run_size=1) as first, SortedRuns(self.tmp.name, run_size=1) as second:
+            first['a'] = 'x\ry'
+            first['c'] = '1'
+            second['a'] = '2'
+            second['b'] = '3'
+            self.assertEqual(list(merge_by_key({'first': first, 'second': second})),
+                             [('a', {'first': 'x\ry', 'second': '2'}), ('b', {'second': '3'}), ('c', {'first': '1'})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,298 @@
+# How to use:
+'''
+
+As a library:
+
+    from text_normalize import normalize, normalizers_for_lang_pair
+
+    clean = normalize(text)                              # rules shared by all scripts
+    clean = normalize(text, script='Devanagari')         # plus the Devanagari rules ('|' -> '।', ...)
+    normalize_source, normalize_target = normalizers_for_lang_pair('HIN-URD')
+
+    counts = {}
+    clean = normalize(text, counts=counts)               # counts[rule] += characters changed by the rule
+
+From the command line, write a normalized copy of a Parallel_v2 or Domain-wise tree:
+
+python3 text_normalize.py /path/to/Parallel_v2 /path/to/Parallel_v2_normalized -s normalize_counts.csv
+python3 text_normalize.py /path/to/Parallel_v2 --dry-run - only count what would change
+
+'''
+
+import os
+import re
+import sys
+import csv
+import shutil
+import argparse
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+import fs_crawler
+import corpus_paths
+import instrumentation
+
+# --- Configuration ---
+# Folders whose files are normalized; all other files are copied as they are.
+FOLDERS_TO_NORMALIZE = {'source_translated', 'source_reviewed', 'translated_reviewed'}
+# Normalization form; NFC is what keyboards and most tools produce.
+FORM = 'NFC'
+
+# Script of every language code used in the lang pair folders.
+LANG_SCRIPTS = {
+    'ASM': ['Bengali'], 'BAN': ['Bengali'], 'BEN': ['Bengali'],
+    'BOD': ['Devanagari'], 'DOG': ['Devanagari'], 'KOK': ['Devanagari'], 'MAI': ['Devanagari'],
+    'MAR': ['Devanagari'], 'NEP': ['Devanagari'], 'SAN': ['Devanagari'], 'HIN': ['Devanagari'],
+    'GUJ': ['Gujarati'], 'KAN': ['Kannada'], 'MAL': ['Malayalam'], 'ODI': ['Odia'], 'ORI': ['Odia'],
+    'PAN': ['Gurmukhi'], 'TAM': ['Tamil'], 'TEL': ['Telugu'], 'SIN': ['Sinhala'],
+    'SAT': ['Ol Chiki'], 'MNI': ['Meetei Mayek', 'Bengali'],
+    'URD': ['Arabic'], 'KAS': ['Arabic'], 'SND': ['Arabic', 'Devanagari'], 'ENG': ['Latin'],
+}
+# Scripts that end sentences with the danda (Gujarati and the Dravidian scripts normally use '.',
+# Ol Chiki and Meetei Mayek have their own full stops).
+DANDA_SCRIPTS = {'Devanagari', 'Bengali', 'Gurmukhi', 'Odia'}
+
+# --- Rules ---
+# Deleted everywhere: byte order marks, zero-width space, soft hyphen, word joiner, C0/C1 controls
+# (not tab, newline or '\r', so CRLF line endings and a '\r' inside a cell are kept).
+INVISIBLE = ['\ufeff', '\u200b', '\u00ad', '\u2060'] + [chr(c) for c in range(0x00, 0x20) if chr(c) not in '\t\n\r'] \
+    + [chr(c) for c in range(0x7f, 0xa0)]
+# Spaces that are not ' ': no-break spaces, the U+2000 spaces, ideographic space.
+SPACES = ['\u00a0', '\u202f', '\u2007', '\u3000'] + [chr(c) for c in range(0x2000, 0x200b)]
+# Characters typed instead of the danda (pipe, Latin dental click, divides, full-width pipe).
+DANDA_LOOKALIKES = '|\u01c0\u2223\uff5c'
+# Arabic letters written in place of their Urdu forms (yeh, kaf, alef maksura).
+ARABIC_TABLE = str.maketrans({'\u064a': '\u06cc', '\u0643': '\u06a9', '\u0649': '\u06cc'})
+
+INVISIBLE_TABLE = str.maketrans(dict.fromkeys(INVISIBLE))
+SPACE_TABLE = str.maketrans(dict.fromkeys(SPACES, ' '))
+# A ZWJ/ZWNJ is only meaningful between two characters of a word
+STRAY_JOINER_RE = re.compile('(?:^|(?<=\\s))[\u200c\u200d]+|[\u200c\u200d]+(?=\\s|$)')
+# After a letter or an Indic/Ol Chiki/Meetei Mayek character (vowel signs are not letters to re)
+INDIC_BEFORE = '(?<=[^\\W\\d]|[\u0900-\u0dff\u1c50-\u1c7f\uabc0-\uabff])'
+# Lookalikes after a letter or mark (optionally a space) and before a space or the end: a danda
+DOUBLE_DANDA_RE = re.compile(INDIC_BEFORE + rf'(\s?)(?:[{re.escape(DANDA_LOOKALIKES)}]{{2}}|\u0964\u0964)(?=\s|$)')
+DANDA_RE = re.compile(INDIC_BEFORE + rf'(\s?)[{re.escape(DANDA_LOOKALIKES)}](?=\s|$)')
+SPACE_RUN_RE = re.compile(r' {2,}')
+# Anything one of the rules could change; lines without it only need the NFC check.
+SUSPECT_RE = re.compile('[' + re.escape(''.join(INVISIBLE + SPACES) + DANDA_LOOKALIKES) + '\u200c\u200d\u0964\u0643\u064a\u0649]| {2}|^ | $')
+
+RULES = ['invisible', 'spaces', 'joiners', 'nfc', 'danda', 'arabic', 'whitespace']
+
+
+def _count(counts, rule, n):
+    if n:
+        counts[rule] = counts.get(rule, 0) + n
+
+
+class Normalizer:
+    """The cleaning rules of one script, applied in a fixed order."""
+
+    def __init__(self, script=None, form=FORM):
+        self.script = script
+        self.form = form
+        self.danda = script in DANDA_SCRIPTS
+        self.arabic = script == 'Arabic'
+
+    def __call__(self, text, counts=None):
+        return self.normalize(text, counts)
+
+    def normalize(self, text, counts=None):
+        """Return the cleaned text; if counts is a dict, add the characters changed per rule to it."""
+        # Fast path: most lines are already clean
+        if not SUSPECT_RE.search(text):
+            if unicodedata.is_normalized(self.form, text):
+                return text
+            suspect = False
+        else:
+            suspect = True
+
+        counts = {} if counts is None else counts
+        if suspect:
+            before = len(text)
+            text = text.translate(INVISIBLE_TABLE)
+            _count(counts, 'invisible', before - len(text))
+
+            changed = sum(text.count(c) for c in SPACES if c in text)
+            if changed:
+                text = text.translate(SPACE_TABLE)
+                _count(counts, 'spaces', changed)
+
+            text, n = STRAY_JOINER_RE.subn('', text)
+            _count(counts, 'joiners', n)
+
+        if not unicodedata.is_normalized(self.form, text):
+            normalized = unicodedata.normalize(self.form, text)
+            # Characters merged (or split) by the normalization
+            _count(counts, 'nfc', abs(len(text) - len(normalized)) or sum(a != b for a, b in zip(text, normalized)))
+            text = normalized
+
+        if suspect:
+            if self.danda:
+                text, n = DOUBLE_DANDA_RE.subn('\\1\u0965', text)
+                _count(counts, 'danda', n)
+                text, n = DANDA_RE.subn('\\1\u0964', text)
+                _count(counts, 'danda', n)
+
+            if self.arabic:
+                changed = sum(text.count(c) for c in '\u064a\u0643\u0649')
+                if changed:
+                    text = text.translate(ARABIC_TABLE)
+                    _count(counts, 'arabic', changed)
+
+            before = len(text)
+            text = SPACE_RUN_RE.sub(' ', text).strip(' ')
+            _count(counts, 'whitespace', before - len(text))
+        return text
+
+
+_normalizers = {}
+
+
+def get_normalizer(script=None):
+    """Shared Normalizer of a script (None for the rules shared by all scripts)."""
+    if script not in _normalizers:
+        _normalizers[script] = Normalizer(script)
+    return _normalizers[script]
+
+
+def normalize(text, script=None, counts=None):
+    """Normalize one string; see Normalizer.normalize."""
+    return get_normalizer(script).normalize(text, counts)
+
+
+def normalizers_for_lang_pair(lang_pair):
+    """(source normalizer, target normalizer) of a lang pair like 'HIN-ODI'; unknown languages get the shared rules."""
+    scripts = []
+    for lang in lang_pair.split('-', 1) if lang_pair and '-' in lang_pair else ['', '']:
+        scripts.append(LANG_SCRIPTS.get(lang, [None])[0])
+    return get_normalizer(scripts[0]), get_normalizer(scripts[1])
+
+
+def normalize_file(job):
+    """
+    Normalize one source/target file (runs in a worker process); returns (path, lang pair, lines, counts, error).
+    The copy is written to a temporary file that replaces dest_path only when the whole file went through;
+    on an error, error is the message and no copy is left behind.
+    """
+    source_path, dest_path, lang_pair = job
+    normalize_source, normalize_target = normalizers_for_lang_pair(lang_pair)
+    counts = {}
+    lines = 0
+    out = None
+    tmp_path = dest_path + ".tmp" if dest_path else None
+    error = None
+    try:
+        if dest_path:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            out = open(tmp_path, 'w', encoding='utf-8', newline='')
+        with open(source_path, 'r', encoding='utf-8', newline='') as f:
+            for line in f:
+                lines += 1
+                ending = '\n' if line.endswith('\n') else ''
+                cells = line[:len(line) - len(ending)].split('\t')
+                # First cell is the source, the others the target (and any extra columns)
+                cells = [normalize_source(cells[0], counts)] + [normalize_target(cell, counts) for cell in cells[1:]]
+                if out is not None:
+                    out.write('\t'.join(cells) + ending)
+        if out is not None:
+            out.close()
+            os.replace(tmp_path, dest_path)
+    except Exception as e:
+        print(f"An error occurred while processing {source_path}: {e}")
+        error = str(e)
+    finally:
+        if out is not None:
+            out.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return source_path, lang_pair, lines, counts, error
+
+
+def normalize_tree(source_dir, dest_dir=None, workers=None, scan_threads=0):
+    """
+    Write a normalized copy of a corpus tree (or only count the changes if dest_dir is None).
+
+    Returns:
+        dict: {lang pair: {'files': n, 'lines': n, 'failed': n, rule: characters changed}};
+              a file that failed counts only in 'failed'
+    """
+    jobs = []
+    for root, dirs, files in fs_crawler.walk(source_dir, scan_threads):
+        relative_dir = os.path.relpath(root, source_dir)
+        normalize_here = os.path.basename(root) in FOLDERS_TO_NORMALIZE
+        lang_pair = None
+        if normalize_here:
+            info = corpus_paths.lookup(root, action="Only the rules shared by all scripts are applied.")
+            lang_pair = info.lang_pair if info else None
+        for filename in files:
+            source_path = os.path.join(root, filename)
+            dest_path = os.path.join(dest_dir, relative_dir, filename) if dest_dir else None
+            if normalize_here and filename.endswith('.txt'):
+                jobs.append((source_path, dest_path, lang_pair))
+            elif dest_path:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                shutil.copy2(source_path, dest_path)
+
+    print(f"Normalizing {len(jobs)} files from '{source_dir}'...")
+    totals = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for source_path, lang_pair, lines, counts, error in executor.map(normalize_file, jobs, chunksize=4):
+            total = totals.setdefault(lang_pair or 'Unknown', dict.fromkeys(['files', 'lines', 'failed'] + RULES, 0))
+            if error is not None:
+                total['failed'] += 1
+                continue
+            instrumentation.add(files=1, lines=lines, bytes=os.path.getsize(source_path))
+            total['files'] += 1
+            total['lines'] += lines
+            for rule, n in counts.items():
+                total[rule] += n
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unicode normalization and cleaning of the source/target files")
+    parser.add_argument("source_dir", help="Parallel_v2 or Domain-wise arranged folder")
+    parser.add_argument("dest_dir", nargs="?", help="Folder for the normalized copy (not needed with --dry-run)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the characters each rule would change")
+    parser.add_argument("-s", "--summary", help="Path to save the counts per lang pair as CSV")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    fs_crawler.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source_dir):
+        print(f"Error: {args.source_dir} is not a valid directory")
+        return 1
+    if not args.dry_run and not args.dest_dir:
+        parser.error("give a destination folder or --dry-run")
+    if args.dest_dir and os.path.abspath(args.dest_dir) == os.path.abspath(args.source_dir):
+        parser.error("the destination must be a different folder")
+
+    with instrumentation.instrumented_run("text_normalize", args):
+        with instrumentation.stage("normalize_files"):
+            totals = normalize_tree(args.source_dir, None if args.dry_run else args.dest_dir, args.workers, args.scan_threads)
+
+        rows = [{'Language Pair': lang_pair, **total} for lang_pair, total in sorted(totals.items())]
+        if args.summary and rows:
+            with open(args.summary, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"Counts saved to {args.summary}")
+
+        print(f"\n{'Lang Pair':<10} | {'Lines':<9} | {'Failed':<6} | " + " | ".join(f"{rule:<10}" for rule in RULES))
+        print("-" * (33 + 13 * len(RULES)))
+        for row in rows:
+            print(f"{row['Language Pair']:<10} | {row['lines']:<9} | {row['failed']:<6} | "
+                  + " | ".join(f"{row[rule]:<10}" for rule in RULES))
+
+    failed = sum(row['failed'] for row in rows)
+    if failed:
+        print(f"\nError: {failed} file(s) could not be normalized; see the messages above.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# How to use:
+'''
+
+combine_translated_files.py fills the counters from the same file scan as its stats:
+
+python3 combine_translated_files.py /path/to/iitp -t iitp_weekly.csv - lines/words per institute, sub-domain and week
+python3 combine_translated_files.py /path/to/iitp -t batches.csv --group-by lang_pair batch --counters iitp_counters.json
+
+From saved counters, without scanning the corpus again (counters of several runs are merged):
+
+python3 throughput.py -l iitp_counters.json -l iiith_counters.json --group-by institute week -o weekly.csv
+python3 throughput.py -l iitp_counters.json --group-by sub_domain week --since 2025-07-01
+
+Dimensions: institute (the name of the scanned folder, or --institute), lang_pair, domain, sub_domain,
+folder_type, batch (sub-domain and the day its files were written, i.e. unzipped) and week (the
+Monday of the week of the file mtime).
+
+'''
+
+import os
+import csv
+import json
+import argparse
+from datetime import datetime, timedelta
+
+import corpus_paths
+
+# --- Configuration ---
+DIMENSIONS = ("institute", "lang_pair", "domain", "sub_domain", "folder_type", "batch", "week")
+GROUP_BY = ("institute", "sub_domain", "week")
+COUNTS = ("files", "lines", "words")
+
+
+def week_start(day):
+    """The Monday of the week of a date, as the week bucket."""
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+class Throughput:
+    """
+    Files, lines and words per combination of all DIMENSIONS. Counters of different runs
+    (e.g. one per institute) merge by adding, and any group-by is a rollup of the counters.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, key, files=0, lines=0, words=0):
+        counts = self.counts.setdefault(key, [0, 0, 0])
+        counts[0] += files
+        counts[1] += lines
+        counts[2] += words
+
+    def add_file(self, institute, path, mtime, lines, words):
+        """Count one file under the folder metadata of its path and the day of its mtime."""
+        info = corpus_paths.lookup(os.path.dirname(path), action="Counted as Unknown.")
+        lang_pair, domain, sub_domain, folder_type = info[:4] if info else ("Unknown",) * 4
+        day = datetime.fromtimestamp(mtime).date()
+        self.add((institute, lang_pair, domain, sub_domain, folder_type, f"{sub_domain}@{day.isoformat()}", week_start(day)),
+                 files=1, lines=lines, words=words)
+
+    def merge(self, other):
+        for key, (files, lines, words) in other.counts.items():
+            self.add(key, files, lines, words)
+        return self
+
+    def rollup(self, group_by=GROUP_BY, since=None):
+        """[(group values, files, lines, words)] sorted by the group values; since is the first week (YYYY-MM-DD) kept."""
+        positions = [DIMENSIONS.index(d) for d in group_by]
+        week = DIMENSIONS.index("week")
+        groups = {}
+        for key, (files, lines, words) in self.counts.items():
+            if since and key[week] < since:
+                continue
+            counts = groups.setdefault(tuple(key[p] for p in positions), [0, 0, 0])
+            counts[0] += files
+            counts[1] += lines
+            counts[2] += words
+        return [(group, *counts) for group, counts in sorted(groups.items())]
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"dimensions": DIMENSIONS, "counts": [[*key, *counts] for key, counts in sorted(self.counts.items())]},
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if tuple(data.get("dimensions", ())) != DIMENSIONS:
+            raise ValueError(f"'{path}' has the dimensions {data.get('dimensions')}, expected {list(DIMENSIONS)}")
+        counters = cls()
+        n = len(DIMENSIONS)
+        for row in data["counts"]:
+            counters.add(tuple(row[:n]), *row[n:])
+        return counters
+
+
+def validate_group_by(group_by):
+    unknown = [d for d in group_by if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimension(s) {', '.join(unknown)} (choose from {', '.join(DIMENSIONS)})")
+
+
+def save_csv(rows, group_by, csv_path):
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(group_by) + list(COUNTS))
+        writer.writerows([*group, files, lines, words] for group, files, lines, words in rows)
+    print(f"Throughput saved to {csv_path}")
+
+
+def display(rows, group_by):
+    widths = [max([len(d)] + [len(str(group[i])) for group, *_ in rows]) for i, d in enumerate(group_by)]
+    print("\n=== Throughput by " + ", ".join(group_by) + " ===\n")
+    print(" | ".join(f"{d:<{w}}" for d, w in zip(group_by, widths)) + f" | {'Files':<6} | {'Lines':<8} | {'Words':<10}")
+    print("-" * (sum(widths) + 3 * len(widths) + 30))
+    for group, files, lines, words in rows:
+        print(" | ".join(f"{str(v):<{w}}" for v, w in zip(group, widths)) + f" | {files:<6} | {lines:<8} | {words:<10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up saved throughput counters by any dimensions")
+    parser.add_argument("-l", "--load", action="append", required=True, help="Counters JSON written by combine --counters (repeatable)")
+    parser.add_argument("--group-by", nargs="+", default=list(GROUP_BY), help=f"Dimensions (default: {' '.join(GROUP_BY)}; from {', '.join(DIMENSIONS)})")
+    parser.add_argument("--since", help="First week to count, e.g. 2025-07-01")
+    parser.add_argument("-o", "--output", help="CSV to save the rollup to")
+    parser.add_argument("-s", "--save", help="Save the merged counters to this JSON")
+    args = parser.parse_args()
+
+    try:
+        validate_group_by(args.group_by)
+        counters = Throughput()
+        for path in args.load:
+            counters.merge(Throughput.load(path))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    rows = counters.rollup(args.group_by, args.since)
+    display(rows, args.group_by)
+    if args.output:
+        save_csv(rows, args.group_by, args.output)
+    if args.save:
+        counters.save(args.save)
+        print(f"Counters saved to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,218 @@
+# How to use:
+'''
+
+As a library:
+
+    from tsv_reader import read_tsv, TSVStats
+
+    stats = TSVStats(file_path)
+    for batch in read_tsv(file_path, stats=stats):
+        for src, tgt, lineno in batch:
+            ...
+    print(stats.malformed)
+
+From the command line:
+
+python3 tsv_reader.py file1.txt file2.txt - report malformed lines per file
+python3 tsv_reader.py /path/to/Parallel_v2 - same, for every .txt file in the tree
+python3 tsv_reader.py /path/to/Parallel_v2 --benchmark - compare the reading speed against csv.reader
+
+'''
+
+import os
+import csv
+import sys
+import time
+import argparse
+
+# --- Configuration ---
+# Header cells written by the translation tool. Headers only ever appear on the first line.
+HEADERS = frozenset({"Source_Text", "Translated_Text", "Reviewed_Text"})
+# Number of (src, tgt, lineno) tuples per yielded batch.
+BATCH_SIZE = 10000
+
+
+class TSVStats:
+    """Line counts of one file, filled in while the file is read."""
+
+    __slots__ = ("file", "lines", "pairs", "header", "empty_lines", "short_rows", "extra_columns", "replaced")
+
+    def __init__(self, file=None):
+        self.file = file
+        self.lines = 0
+        self.pairs = 0
+        self.header = False
+        self.empty_lines = 0
+        self.short_rows = 0
+        self.extra_columns = 0
+        # Undecodable bytes replaced by U+FFFD (only with errors='replace')
+        self.replaced = 0
+
+    @property
+    def malformed(self):
+        """Non-empty lines that could not be read as a (source, target) pair."""
+        return self.short_rows
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__} | {"malformed": self.malformed}
+
+
+def is_header(line):
+    """Check whether a line is a header row (any cell is one of HEADERS)."""
+    return any(cell.strip() in HEADERS for cell in line.split('\t'))
+
+
+def read_tsv(file_path, batch_size=BATCH_SIZE, stats=None, strip=True, errors='strict'):
+    """
+    Read a tab-separated source/target file in batches.
+
+    Quoting is disabled: quote characters are ordinary text. Lines are split on '\\n' only,
+    a trailing '\\r' (CRLF files) is removed. A header on the first line is skipped,
+    empty lines are skipped, lines without a tab are counted as short rows and skipped,
+    and columns after the second are ignored (counted as extra_columns).
+
+    Args:
+        file_path (str): Path to the file.
+        batch_size (int): Number of tuples per batch.
+        stats (TSVStats): Optional object that receives the line counts.
+        strip (bool): Strip whitespace around the source and target text.
+        errors (str): Decoding errors: 'strict' raises UnicodeDecodeError, 'replace' turns
+            every bad byte into U+FFFD and counts it in stats.replaced.
+
+    Yields:
+        list: Batches of (src, tgt, lineno) tuples, lineno is 1-based.
+    """
+    if stats is None:
+        stats = TSVStats(file_path)
+
+    batch = []
+    append = batch.append
+    lineno = 0
+
+    count_replaced = errors != 'strict'
+    with open(file_path, 'r', encoding='utf-8-sig', newline='\n', errors=errors) as f:
+        first = f.readline()
+        if is_header(first.rstrip('\r\n')):
+            stats.header = True
+            lineno = 1
+            if count_replaced:
+                stats.replaced += first.count('\ufffd')
+        else:
+            # Not a header: rewind and read it like every other line
+            f.seek(0)
+
+        for lineno, line in enumerate(f, lineno + 1):
+            if count_replaced and '\ufffd' in line:
+                stats.replaced += line.count('\ufffd')
+            parts = line.rstrip('\r\n').split('\t', 2)
+            if len(parts) < 2:
+                if parts[0].strip():
+                    stats.short_rows += 1
+                else:
+                    stats.empty_lines += 1
+                continue
+            if len(parts) > 2:
+                stats.extra_columns += 1
+
+            if strip:
+                append((parts[0].strip(), parts[1].strip(), lineno))
+            else:
+                append((parts[0], parts[1], lineno))
+
+            if len(batch) >= batch_size:
+                stats.pairs += len(batch)
+                yield batch
+                batch = []
+                append = batch.append
+
+    stats.lines = lineno
+    if batch:
+        stats.pairs += len(batch)
+        yield batch
+
+
+def iter_pairs(file_path, stats=None, strip=True, errors='strict'):
+    """Same as read_tsv, one (src, tgt, lineno) tuple at a time."""
+    for batch in read_tsv(file_path, stats=stats, strip=strip, errors=errors):
+        yield from batch
+
+
+def find_txt_files(paths):
+    """Expand directories into the .txt files they contain."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                found.extend(os.path.join(root, f) for f in sorted(files) if f.endswith('.txt'))
+        else:
+            found.append(path)
+    return found
+
+
+def csv_reader_pairs(file_path):
+    """The csv.reader based parsing the scripts used so far, for the benchmark."""
+    pairs = 0
+    with open(file_path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.reader(f, delimiter='\t'):
+            if len(row) >= 2:
+                pairs += 1
+    return pairs
+
+
+def benchmark(file_paths, repeat=3):
+    """Time read_tsv against csv.reader on the same files (best of `repeat` runs)."""
+    total_bytes = sum(os.path.getsize(p) for p in file_paths)
+
+    def best_of(func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for file_path in file_paths:
+                func(file_path)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    csv_time = best_of(csv_reader_pairs)
+    tsv_time = best_of(lambda p: sum(len(b) for b in read_tsv(p)))
+
+    mb = total_bytes / (1024 * 1024)
+    print(f"\nBenchmark on {len(file_paths)} files ({mb:.1f} MB), best of {repeat}:")
+    print(f"  csv.reader : {csv_time:8.3f} s  ({mb / csv_time if csv_time else 0:8.1f} MB/s)")
+    print(f"  read_tsv   : {tsv_time:8.3f} s  ({mb / tsv_time if tsv_time else 0:8.1f} MB/s)")
+    print(f"  speed-up   : {csv_time / tsv_time if tsv_time else 0:.2f}x")
+    return csv_time, tsv_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read tab-separated corpus files and report malformed lines")
+    parser.add_argument("paths", nargs="+", help="Files or folders (all .txt files below a folder are read)")
+    parser.add_argument("--benchmark", action="store_true", help="Compare the reading speed against csv.reader")
+    parser.add_argument("--repeat", type=int, default=3, help="Benchmark repetitions (default: 3)")
+    args = parser.parse_args()
+
+    file_paths = find_txt_files(args.paths)
+    if not file_paths:
+        print("No files found.", file=sys.stderr)
+        return
+
+    print(f"{'File':<60} | {'Lines':<8} | {'Pairs':<8} | {'Header':<6} | {'Empty':<6} | {'Short':<6} | {'Extra':<6}")
+    print("-" * 116)
+    for file_path in file_paths:
+        stats = TSVStats(file_path)
+        try:
+            for _ in read_tsv(file_path, stats=stats):
+                pass
+        except UnicodeDecodeError as e:
+            print(f"Warning: Could not decode {file_path}: {e}", file=sys.stderr)
+            continue
+        if stats.malformed or not args.benchmark:
+            print(f"{file_path[-60:]:<60} | {stats.lines:<8} | {stats.pairs:<8} | {str(stats.header):<6} | "
+                  f"{stats.empty_lines:<6} | {stats.short_rows:<6} | {stats.extra_columns:<6}")
+
+    if args.benchmark:
+        benchmark(file_paths, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+# How to use:
+'''
+
+python3 watch_deliveries.py /path/to/Parallel_v2 --downloads /path/to/downloads - arrange deliveries and keep live_stats.json/.csv current
+python3 watch_deliveries.py /path/to/Parallel_v2 -j stats/live.json -c stats/live.csv - only keep the stats of Parallel_v2 current
+python3 watch_deliveries.py /path/to/Parallel_v2 --downloads /path/to/downloads --poll --interval 120 - poll instead of inotify (network mounts)
+python3 watch_deliveries.py /path/to/Parallel_v2 --downloads /path/to/downloads --once - arrange what is there, write the stats and exit
+
+Parallel_v2 is the old_parent of arrange_downloaded.py (LP/DOMAIN/SUB). A delivery is a zip or a folder
+at the top of the download folder. When one lands it is unzipped and cleaned like with --preprocess,
+and it replaces the SUB folder of the same name like with --no-dry-run --skip-confirmation. Deliveries
+without a matching folder are left in the download folder, as before.
+
+The stats JSON and CSV have the format of combine_translated_files.py -j and -c. Only the
+LP/DOMAIN folders that changed are counted again.
+
+'''
+
+import os
+import sys
+import json
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import signal
+import struct
+import zipfile
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+import fs_crawler
+import corpus_paths
+import instrumentation
+from arrange_downloaded import unzip_delivery, preprocess_new_folder, find_actual_folders_in_old_parent, replace_folder
+from combine_translated_files import delete_extra_folders, find_translation_dirs, process_translation_files
+
+# --- Configuration ---
+STATS_JSON = "live_stats.json"
+STATS_CSV = "live_stats.csv"
+# A batch of changes is handled once nothing changed for DEBOUNCE seconds, or at the latest MAX_DELAY
+# seconds after its first change (a delivery copied file by file is one burst of events).
+DEBOUNCE = 30.0
+MAX_DELAY = 300.0
+# Seconds between two scans of the trees when polling.
+POLL_INTERVAL = 60.0
+# Files still being downloaded; the rename to the final name is a change of its own.
+PARTIAL_SUFFIXES = ('.part', '.crdownload', '.download', '.tmp')
+COUNTS = ("files", "lines", "words")
+
+# inotify(7), see <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT = struct.Struct('iIII')   # wd, mask, cookie, name length
+READ_SIZE = 1024 * 1024
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    _libc.inotify_init1, _libc.inotify_add_watch
+except (OSError, AttributeError):  # not Linux
+    _libc = None
+
+
+class InotifyWatcher:
+    """Reports the paths that change under the roots, with one inotify watch per folder."""
+
+    def __init__(self, roots):
+        if _libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this system")
+        self.roots = roots
+        self.fd = _libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self.paths = {}
+        try:
+            for root in roots:
+                self.watch_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def watch_tree(self, top):
+        for root, dirs, files in os.walk(top):
+            wd = _libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                if code == errno.ENOENT:   # removed in the meantime
+                    continue
+                hint = " (raise fs.inotify.max_user_watches or use --poll)" if code == errno.ENOSPC else ""
+                raise OSError(code, f"Cannot watch {root}: {os.strerror(code)}{hint}")
+            # Watching a folder again (after a move) gives the same wd, with the new path
+            self.paths[wd] = root
+
+    def poll(self, timeout):
+        """The paths changed since the last call, waiting up to timeout seconds for the first one."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, READ_SIZE)
+        changed = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            name = data[offset + EVENT.size:offset + EVENT.size + length].rstrip(b'\0')
+            offset += EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: everything may have changed
+                changed.extend(self.roots)
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            base = self.paths.get(wd)
+            if base is None:
+                continue
+            path = os.path.join(base, os.fsdecode(name)) if name else base
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # Files written into a new folder before its watch was added are covered by the folder path
+                try:
+                    self.watch_tree(path)
+                except OSError as e:
+                    print(f"Warning: {e}")
+            changed.append(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Reports the paths that change under the roots by comparing the size and mtime of every file."""
+
+    def __init__(self, roots, interval=POLL_INTERVAL, scan_threads=0):
+        self.roots = roots
+        self.interval = interval
+        self.scan_threads = scan_threads
+        self.snapshot = self.scan()
+
+    def scan(self):
+        state = {}
+        for top in self.roots:
+            for root, dirs, files in fs_crawler.walk(top, self.scan_threads):
+                # Folders are in the snapshot too, so that removed (or emptied) folders are noticed
+                state[root] = None
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    state[path] = (st.st_size, st.st_mtime_ns)
+        return state
+
+    def poll(self, timeout):
+        """The paths changed since the last call; a whole interval passes between two scans."""
+        time.sleep(self.interval)
+        current = self.scan()
+        changed = [path for path, value in current.items() if path not in self.snapshot or self.snapshot[path] != value]
+        changed.extend(path for path in self.snapshot if path not in current)
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(roots, poll=False, interval=POLL_INTERVAL, scan_threads=0):
+    """An InotifyWatcher, or a PollingWatcher with poll=True or where inotify cannot be used."""
+    if not poll:
+        try:
+            return InotifyWatcher(roots)
+        except OSError as e:
+            print(f"Warning: {e}. Polling every {interval:.0f}s instead.")
+    return PollingWatcher(roots, interval, scan_threads)
+
+
+def _write_atomic(path, write):
+    """Write a file through a temporary file, so readers never see it half written."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class LiveStats:
+    """The counts of combine_translated_files.py, kept per LP/DOMAIN folder of a Parallel_v2 tree."""
+
+    def __init__(self, parallel_root, json_path=STATS_JSON, csv_path=STATS_CSV):
+        self.parallel_root = parallel_root
+        self.json_path = json_path
+        self.csv_path = csv_path
+        # (LP folder, DOMAIN folder) -> {lang pair: {domain: {type: counts}}} of the folders below it
+        self.parts = {}
+
+    def subtrees(self):
+        """Every (LP, DOMAIN) folder pair of the tree."""
+        found = []
+        for lang_pair in sorted(os.listdir(self.parallel_root)):
+            lp_dir = os.path.join(self.parallel_root, lang_pair)
+            if corpus_paths.is_lang_pair(lang_pair) and os.path.isdir(lp_dir):
+                found.extend((lang_pair, domain) for domain in sorted(os.listdir(lp_dir))
+                             if os.path.isdir(os.path.join(lp_dir, domain)))
+        return found
+
+    def update(self, lang_pair, domain):
+        """Count one LP/DOMAIN folder again (it is dropped if it no longer exists)."""
+        subtree = os.path.join(self.parallel_root, lang_pair, domain)
+        if not os.path.isdir(subtree):
+            self.parts.pop((lang_pair, domain), None)
+            return
+        delete_extra_folders(subtree)
+        stats = process_translation_files(find_translation_dirs(subtree), keep_text=False)
+        self.parts[(lang_pair, domain)] = {
+            lp: {d: {t: {k: data[k] for k in COUNTS} for t, data in types.items()} for d, types in domains.items()}
+            for lp, domains in stats.items()
+        }
+
+    def merged(self):
+        stats = {}
+        for part in self.parts.values():
+            for lp, domains in part.items():
+                for domain, types in domains.items():
+                    for folder_type, data in types.items():
+                        counts = stats.setdefault(lp, {}).setdefault(domain, {}).setdefault(folder_type, dict.fromkeys(COUNTS, 0))
+                        for k in COUNTS:
+                            counts[k] += data[k]
+        return stats
+
+    def save(self):
+        """Write the JSON (as combine -j) and the CSV (as combine -c, with the TOTAL row)."""
+        stats = self.merged()
+        if self.json_path:
+            _write_atomic(self.json_path, lambda f: json.dump(stats, f, indent=2))
+        if self.csv_path:
+            rows = [(lp, domain, folder_type, data["files"], data["lines"], data["words"])
+                    for lp, domains in sorted(stats.items())
+                    for domain, types in sorted(domains.items())
+                    for folder_type, data in sorted(types.items())]
+            totals = [sum(row[i] for row in rows) for i in (3, 4, 5)]
+
+            def write(f):
+                f.write("Language Pair,Domain,Type,Files,Lines,Words\n")
+                f.writelines(",".join(map(str, row)) + "\n" for row in rows + [("TOTAL", "", "", *totals)])
+            _write_atomic(self.csv_path, write)
+        return stats
+
+
+def _under(path, root):
+    return path == root or path.startswith(root + os.sep)
+
+
+def changed_subtrees(paths, live):
+    """The (LP, DOMAIN) folders the changed paths are in; a change of a lang pair folder or the root covers all below it."""
+    subtrees = set()
+    for path in paths:
+        parts = os.path.relpath(path, live.parallel_root).split(os.sep)
+        if parts == ['.']:
+            subtrees.update(live.subtrees())
+            subtrees.update(live.parts)
+        elif corpus_paths.is_lang_pair(parts[0]):
+            if len(parts) > 1:
+                subtrees.add((parts[0], parts[1]))
+            else:
+                subtrees.update(s for s in live.subtrees() if s[0] == parts[0])
+                subtrees.update(s for s in live.parts if s[0] == parts[0])
+    return subtrees
+
+
+def arrange_deliveries(paths, downloads, parallel_root, warned):
+    """
+    Unzip, clean and move the deliveries the changed paths belong to.
+
+    Returns:
+        tuple: ((LP, DOMAIN) folders that got a delivery, paths to look at again in the next batch)
+    """
+    names = set()
+    for path in paths:
+        rel = os.path.relpath(path, downloads)
+        names.update(os.listdir(downloads) if rel == '.' else [rel.split(os.sep)[0]])
+
+    moved = set()
+    retry = []
+    old_folders = None
+    for name in sorted(names):
+        path = Path(downloads) / name
+        if not path.exists() or name.endswith(PARTIAL_SUFFIXES):
+            continue
+        if path.suffix == '.zip':
+            if not zipfile.is_zipfile(path):
+                # Still being copied (or broken): looked at again in the next batch
+                if name not in warned:
+                    warned.add(name)
+                    print(f"Warning: {path} is not a complete zip yet. Retrying.")
+                retry.append(str(path))
+                continue
+            path = unzip_delivery(path)
+        if not path.is_dir():
+            continue
+        preprocess_new_folder(path)
+
+        if old_folders is None:
+            old_folders = find_actual_folders_in_old_parent(parallel_root)
+        old_path = old_folders.get(path.name)
+        if old_path is None:
+            if path.name not in warned:
+                warned.add(path.name)
+                print(f"Warning: No folder named {path.name} in {parallel_root}. Left in {downloads}.")
+            continue
+        print(f"Delivery {path.name} -> {old_path}")
+        if replace_folder(old_path, path):
+            moved.add((old_path.parent.parent.name, old_path.parent.name))
+    return moved, retry
+
+
+def process_batch(batch, live, downloads=None, warned=None):
+    """Handle one batch of changed paths; returns the paths to look at again in the next batch."""
+    with instrumentation.stage("update", unit="subtrees") as st:
+        moved, retry = set(), []
+        if downloads:
+            moved, retry = arrange_deliveries([p for p in batch if _under(p, downloads)], downloads,
+                                              live.parallel_root, warned if warned is not None else set())
+        subtrees = changed_subtrees([p for p in batch if _under(p, live.parallel_root)], live) | moved
+        for lang_pair, domain in sorted(subtrees):
+            live.update(lang_pair, domain)
+            st.add(subtrees=1)
+        if subtrees:
+            live.save()
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Updated {', '.join(f'{lp}/{d}' for lp, d in sorted(subtrees))}")
+    return retry
+
+
+def watch(live, watcher, downloads=None, debounce=DEBOUNCE, max_delay=MAX_DELAY):
+    """Process the changes reported by the watcher in debounced batches, until interrupted."""
+    pending = set()
+    warned = set()
+    first = last = None
+    while True:
+        changed = watcher.poll(1.0)
+        now = time.monotonic()
+        if changed:
+            pending.update(changed)
+            last = now
+            first = first or now
+        if pending and (now - last >= debounce or now - first >= max_delay):
+            batch, pending = pending, set()
+            retry = process_batch(batch, live, downloads, warned)
+            first = last = None
+            if retry:
+                pending.update(retry)
+                first = last = time.monotonic()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arrange new deliveries and keep the combine stats current as the trees change")
+    parser.add_argument("parallel_root", help="Parallel_v2 folder (LP/DOMAIN/SUB), the old_parent of arrange_downloaded.py")
+    parser.add_argument("--downloads", help="Download folder the institutes deliver zips or folders to (optional)")
+    parser.add_argument("-j", "--json", default=STATS_JSON, help=f"Live statistics JSON, as combine -j (default: {STATS_JSON}, '' to disable)")
+    parser.add_argument("-c", "--csv", default=STATS_CSV, help=f"Live statistics CSV, as combine -c (default: {STATS_CSV}, '' to disable)")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE, help=f"Seconds without changes before a batch is handled (default: {DEBOUNCE:.0f})")
+    parser.add_argument("--max-delay", type=float, default=MAX_DELAY, help=f"Seconds after its first change a batch is handled at the latest (default: {MAX_DELAY:.0f})")
+    parser.add_argument("--poll", action="store_true", help="Poll the trees instead of using inotify (network mounts, non-Linux)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help=f"Seconds between two scans with --poll (default: {POLL_INTERVAL:.0f})")
+    parser.add_argument("--once", action="store_true", help="Arrange the deliveries there are, write the stats and exit")
+    fs_crawler.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    parallel_root = os.path.abspath(args.parallel_root)
+    downloads = os.path.abspath(args.downloads) if args.downloads else None
+    for folder in filter(None, [parallel_root, downloads]):
+        if not os.path.isdir(folder):
+            print(f"Error: {folder} is not a valid directory")
+            return 1
+
+    # A service manager stops the daemon with SIGTERM; end the run like with Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    live = LiveStats(parallel_root, args.json, args.csv)
+    with instrumentation.instrumented_run("watch_deliveries", args):
+        # Watch first, so nothing that changes during the first scan is missed
+        watcher = None if args.once else open_watcher(list(filter(None, [parallel_root, downloads])), args.poll,
+                                                      args.interval, args.scan_threads)
+        try:
+            with instrumentation.stage("initial_scan", unit="subtrees") as st:
+                for lang_pair, domain in live.subtrees():
+                    live.update(lang_pair, domain)
+                    st.add(subtrees=1)
+                live.save()
+            print(f"Counted {len(live.parts)} LP/DOMAIN folders of {parallel_root}")
+            if downloads:
+                process_batch([downloads], live, downloads)
+            if args.once:
+                return 0
+            print(f"Watching {parallel_root}" + (f" and {downloads}" if downloads else "") +
+                  f" ({'polling' if isinstance(watcher, PollingWatcher) else 'inotify'}), Ctrl+C to stop")
+            watch(live, watcher, downloads, args.debounce, args.max_delay)
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+        finally:
+            if watcher is not None:
+                watcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,169 @@
+# How to use:
+'''
+
+Module version of word_count_split2.ipynb, reads and writes each file in chunks so memory stays flat.
+
+python3 filter_word_count.py Domain_Wise_Arranged_Parallel test_filtered2_copy
+python3 filter_word_count.py input_dir output_dir --min-words 6 --max-words 55 --chunksize 200000
+python3 filter_word_count.py input_dir output_dir --no-quoting - treat quote characters as plain text
+
+'''
+
+import os
+import sys
+import csv
+import argparse
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import instrumentation
+
+# --- Configuration ---
+# The word count limits for the first column.
+MIN_WORDS = 6
+MAX_WORDS = 55
+# Rows read, counted and written at a time.
+CHUNKSIZE = 100_000
+# Maximal runs of non-whitespace, i.e. what str.split() returns.
+WORD_RE = r'\S+'
+
+
+def filter_and_recount_sentences(input_tsv_path: str, output_tsv_path: str, min_words: int = MIN_WORDS,
+                                 max_words: int = MAX_WORDS, chunksize: int = CHUNKSIZE, quoting: int = csv.QUOTE_MINIMAL):
+    """
+    Filters a TSV file based on the word count of its first column, chunk by chunk.
+
+    It removes rows where the word count in the first column is less than min_words
+    or greater than max_words and writes every chunk straight to the output file.
+    Cells are read as text, so the kept rows are written back unchanged. The output is written
+    to a temporary file and only replaces output_tsv_path once the whole file is done.
+
+    Args:
+        input_tsv_path (str): The path to the input TSV file.
+        output_tsv_path (str): The path where the filtered TSV file will be saved.
+        min_words (int): Minimum number of words in the first column.
+        max_words (int): Maximum number of words in the first column.
+        chunksize (int): Number of rows per chunk.
+        quoting (int): csv quoting mode, csv.QUOTE_NONE treats quotes as plain text.
+
+    Returns:
+        tuple: (initial rows, final rows), or None if the file was skipped.
+    """
+    initial_rows = 0
+    final_rows = 0
+    # Written next to the output and renamed on success, so a failure never leaves a partial file
+    tmp_path = output_tsv_path + ".tmp"
+
+    try:
+        reader = pd.read_csv(input_tsv_path, sep='\t', dtype=str, keep_default_na=False,
+                             chunksize=chunksize, quoting=quoting)
+
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as outfile:
+            # Without quoting there is no quote character, quotes in the text are written as they are
+            writer = csv.writer(outfile, delimiter='\t', quoting=quoting,
+                                quotechar=None if quoting == csv.QUOTE_NONE else '"')
+            column_to_filter = None
+            for chunk in reader:
+                if column_to_filter is None:
+                    column_to_filter = chunk.columns[0]
+                    # Header written once, from the first chunk
+                    writer.writerow(chunk.columns)
+
+                # Count the words without building a list per row
+                word_counts = chunk[column_to_filter].str.count(WORD_RE)
+                keep = (word_counts >= min_words) & (word_counts <= max_words)
+
+                initial_rows += len(chunk)
+                final_rows += int(keep.sum())
+                writer.writerows(chunk[keep].itertuples(index=False, name=None))
+
+            if column_to_filter is None:
+                # A header without rows gives no chunk (depending on the pandas version): copy the header
+                with open(input_tsv_path, 'r', newline='', encoding='utf-8') as infile:
+                    header = next(csv.reader(infile, delimiter='\t', quoting=quoting), [])
+                writer.writerow(header)
+            if initial_rows == 0:
+                print(f"Warning: The file {input_tsv_path} has a header but no rows. Writing the header only.")
+        os.replace(tmp_path, output_tsv_path)
+
+    except pd.errors.EmptyDataError:
+        print(f"Warning: The file {input_tsv_path} is empty or has no columns. Skipping.")
+        return None
+    except FileNotFoundError:
+        print(f"Error: The file at {input_tsv_path} was not found.")
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred while processing {input_tsv_path}: {e}")
+        return None
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    instrumentation.add(files=1, lines=initial_rows, kept_lines=final_rows, bytes=os.path.getsize(input_tsv_path))
+    return initial_rows, final_rows
+
+
+def process_directory(input_dir: str, output_dir: str, **filter_kwargs):
+    """
+    Recursively processes all tab-separated files in a directory structure.
+
+    For each file, it applies filter_and_recount_sentences and recreates the
+    same directory structure in the specified output directory.
+
+    Args:
+        input_dir (str): The path to the parent input directory.
+        output_dir (str): The path to the parent output directory.
+        **filter_kwargs: Passed on to filter_and_recount_sentences.
+    """
+    print(f"Starting to process directory: {input_dir}")
+    total_initial = 0
+    total_final = 0
+
+    with instrumentation.stage("filter_files"):
+        for dirpath, _, filenames in os.walk(input_dir):
+            # Create a corresponding directory structure in the output directory.
+            relative_path = os.path.relpath(dirpath, input_dir)
+            output_subdir = os.path.join(output_dir, relative_path)
+            os.makedirs(output_subdir, exist_ok=True)
+
+            for filename in filenames:
+                input_file = os.path.join(dirpath, filename)
+                output_file = os.path.join(output_subdir, filename)
+
+                result = filter_and_recount_sentences(input_file, output_file, **filter_kwargs)
+                if result:
+                    total_initial += result[0]
+                    total_final += result[1]
+
+    print("\nDirectory processing complete.")
+    print(f"Total sentences: {total_initial}, kept: {total_final}, removed: {total_initial - total_final}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filter TSV files by the word count of their first column")
+    parser.add_argument("input_dir", help="Path to the parent input directory")
+    parser.add_argument("output_dir", help="Path to the parent output directory")
+    parser.add_argument("--min-words", type=int, default=MIN_WORDS, help=f"Minimum words in the first column (default: {MIN_WORDS})")
+    parser.add_argument("--max-words", type=int, default=MAX_WORDS, help=f"Maximum words in the first column (default: {MAX_WORDS})")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help=f"Rows per chunk (default: {CHUNKSIZE})")
+    parser.add_argument("--no-quoting", action="store_true", help="Treat quote characters as plain text instead of CSV quoting")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Error: Input directory not found at '{args.input_dir}'")
+        return
+
+    with instrumentation.instrumented_run("filter_word_count", args):
+        process_directory(
+            args.input_dir, args.output_dir,
+            min_words=args.min_words,
+            max_words=args.max_words,
+            chunksize=args.chunksize,
+            quoting=csv.QUOTE_NONE if args.no_quoting else csv.QUOTE_MINIMAL
+        )
+    print(f"Check the '{args.output_dir}' folder for the results.")
+
+
+if __name__ == '__main__':
+    main()